@@ -23,5 +23,47 @@ class Settings(BaseSettings):
     MIN_WEEKLY_REST_HOURS: float = 35.0
     MAX_CONSECUTIVE_DAYS: int = 6
 
+    # Moteur de contrôle des plannings : "numpy" (vectorisé) ou "legacy"
+    SCHEDULE_ENGINE: str = "numpy"
+    # Tri externe des vacations : au-delà de ce nombre de lignes, débord sur disque
+    SCHEDULE_SORT_SPILL_ROWS: int = 200_000
+    # Lecture parallèle des fichiers de planning : 0 = nb de CPU, 1 = séquentiel
+    SCHEDULE_INGEST_WORKERS: int = 0
+    SCHEDULE_FILE_TIMEOUT_S: float = 300.0
+    # État persistant par dossier entreprise pour le contrôle incrémental
+    SCHEDULE_STATE_DIR: str = str(PROJECT_ROOT / "data" / "schedule_state")
+    # Extraction PDF : pages réparties par plages entre processus (0 = nb de CPU, 1 = séquentiel)
+    PDF_PAGE_WORKERS: int = 0
+    PDF_PAGES_PER_CHUNK: int = 25
+    # Grille de texte pdfium avant la détection de tableau pdfplumber ; repli page par
+    # page sous ce taux de lignes complètes
+    PDF_TEXT_GRID: bool = True
+    PDF_TEXT_GRID_MIN_CONFIDENCE: float = 0.9
+    # Gabarit de colonnes relevé sur la 1re page reconnue et réutilisé sur les suivantes
+    PDF_HEADER_LOCK: bool = True
+    # Garde-fous mémoire : lecture abandonnée (PdfTooLarge) au-delà ; 0 = sans limite.
+    # PDF_MAX_RSS_MB : croissance de la mémoire résidente d'un worker pendant la lecture
+    # d'un PDF, sous la limite de 1 Go du conteneur ; non mesurée dans le processus
+    # serveur, partagé avec les autres requêtes
+    PDF_MAX_PAGES: int = 2000
+    PDF_MAX_RSS_MB: int = 768
+    # OCR des PDF scannés (pypdfium2 + tesseract) ; 0 worker = nb de CPU
+    OCR_ENABLED: bool = True
+    OCR_LANG: str = "fra"
+    OCR_DPI: int = 300
+    OCR_WORKERS: int = 0
+    OCR_PAGE_TIMEOUT_S: float = 120.0
+    # Cache par contenu (sha256) des vacations lues et des résultats ; 0 = désactivé
+    SCHEDULE_CACHE_DIR: str = str(PROJECT_ROOT / "data" / "schedule_cache")
+    SCHEDULE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Pool des traitements lourds des routes (0 = nb de CPU) ; au-delà de la file : 503
+    WORK_POOL_SIZE: int = 0
+    WORK_POOL_QUEUE: int = 8
+    WORK_POOL_RETRY_AFTER_S: int = 10
+    # Processus de travail (fichiers, pages PDF, OCR) partagés par tous les traitements
+    # en cours du processus serveur (0 = nb de CPU)
+    WORK_PROCESSES: int = 0
+
 def get_settings() -> Settings:
     return Settings()
@@ -0,0 +1,156 @@
+# app/core/executor.py
+"""
+Pool borné pour les traitements lourds (contrôle des plannings, pdfplumber, reportlab).
+
+Les routes sont `async` : un appel synchrone long y bloquerait la boucle
+d'événements, donc toutes les autres requêtes du worker (healthcheck compris).
+Les appels lourds passent par `run_heavy`, qui les exécute dans un pool de
+threads partagé (le GIL est relâché régulièrement : la boucle reste réactive ;
+check_schedules parallélise lui-même la lecture en processus).
+
+Les pools de processus ouverts par ces traitements (fichiers, pages PDF, OCR)
+réservent leurs workers sur un budget unique, WORK_PROCESSES (cf. ProcessBudget) :
+N threads du pool ne lancent pas N fois os.cpu_count() processus.
+
+Au plus WORK_POOL_SIZE traitements en cours + WORK_POOL_QUEUE en attente ; au-delà
+la requête est refusée tout de suite (503 + Retry-After) plutôt que de s'empiler.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+
+class PoolSaturated(RuntimeError):
+    """Plus de place dans le pool (traitements en cours + file d'attente pleins)."""
+
+
+class BoundedExecutor:
+    def __init__(self, workers: int, queue_depth: int) -> None:
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="csi-heavy")
+        self._lock = threading.Lock()
+        self._pending = 0  # seul compteur d'admission
+
+    @property
+    def pending(self) -> int:
+        """Traitements en cours ou en attente."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_depth:
+                raise PoolSaturated(f"{self.workers} traitements en cours, {self.queue_depth} en attente")
+            self._pending += 1
+        try:
+            fut = self._pool.submit(partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # place rendue à la fin du traitement, pas de l'attente : une requête annulée
+        # laisse tourner son thread, qui compte jusqu'au bout
+        fut.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(fut)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[BoundedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> BoundedExecutor:
+    """Pool partagé du processus, créé au premier appel selon Settings."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                S = get_settings()
+                _executor = BoundedExecutor(S.WORK_POOL_SIZE or os.cpu_count() or 1, S.WORK_POOL_QUEUE)
+    return _executor
+
+
+async def run_heavy(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Exécute `fn` dans le pool partagé ; 503 + Retry-After si le pool est saturé."""
+    try:
+        return await get_executor().run(fn, *args, **kwargs)
+    except PoolSaturated as e:
+        raise HTTPException(
+            503,
+            f"Serveur occupé ({e}), réessayez plus tard.",
+            headers={"Retry-After": str(get_settings().WORK_POOL_RETRY_AFTER_S)},
+        )
+
+
+class ProcessBudget:
+    """
+    Processus de travail disponibles pour tout le processus serveur. Un pool réserve
+    ses workers avant de démarrer et les rend à la fermeture ; moins de 2 workers
+    accordés = 0 : le traitement reste séquentiel dans le thread appelant.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = max(0, size)
+        self._free = self.size
+        self._lock = threading.Lock()
+
+    @property
+    def free(self) -> int:
+        return self._free
+
+    def acquire(self, wanted: int) -> int:
+        """Réserve jusqu'à `wanted` workers ; renvoie le nombre accordé (0 ou >= 2)."""
+        with self._lock:
+            n = min(wanted, self._free)
+            if n < 2:
+                return 0
+            self._free -= n
+            return n
+
+    def release(self, n: int) -> None:
+        with self._lock:
+            self._free += n
+
+
+_budget: Optional[ProcessBudget] = None
+_in_worker = False
+
+
+def get_process_budget() -> ProcessBudget:
+    """
+    Budget du processus selon Settings.WORK_PROCESSES (0 = nb de CPU), recréé si le
+    réglage change ; les réservations en cours sont rendues au budget qui les a accordées.
+    Dans un worker (cf. no_worker_processes) : budget vide, pas de pool imbriqué.
+    """
+    global _budget
+    size = 0 if _in_worker else (get_settings().WORK_PROCESSES or os.cpu_count() or 1)
+    with _executor_lock:
+        if _budget is None or _budget.size != size:
+            _budget = ProcessBudget(size)
+        return _budget
+
+
+def no_worker_processes() -> None:
+    """Initialiseur des workers : pas de pool de processus dans un worker."""
+    global _in_worker
+    _in_worker = True
+
+
+def in_worker_process() -> bool:
+    """Vrai dans un worker (cf. no_worker_processes) : processus dédié à une seule tâche."""
+    return _in_worker
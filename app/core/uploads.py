@@ -0,0 +1,65 @@
+# app/core/uploads.py
+"""
+Fichiers envoyés (UploadFile) lus sans copie intermédiaire.
+
+Starlette reçoit chaque fichier dans un SpooledTemporaryFile : en mémoire jusqu'à
+1 Mo, sur disque au-delà. `await upload.read()` recopie tout le contenu en bytes
+(puis `BytesIO(data)` une seconde fois) : avec plusieurs gros envois simultanés,
+la mémoire est multipliée d'autant.
+
+- `upload_stream` : le fichier sous-jacent, rembobiné, à passer tel quel aux
+  lecteurs (pandas, openpyxl, pdfplumber, pypdfium2 acceptent un fichier binaire)
+- `save_upload` : copie vers un chemin, par os.sendfile (copie dans le noyau)
+  quand le fichier est déjà sur disque, par blocs sinon
+- `store_upload` : idem depuis une route async (thread à part, la boucle reste libre)
+"""
+from __future__ import annotations
+import os
+import shutil
+from pathlib import Path
+from typing import BinaryIO, Union
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+COPY_BLOCK = 1 << 20
+
+
+def upload_stream(upload: UploadFile) -> BinaryIO:
+    """Fichier binaire de l'envoi, positionné au début."""
+    upload.file.seek(0)
+    return upload.file
+
+
+def _on_disk(f: BinaryIO) -> bool:
+    # SpooledTemporaryFile._rolled : même test que starlette (UploadFile._in_memory)
+    return getattr(f, "_rolled", True)
+
+
+def save_upload(upload: UploadFile, dest: Union[str, Path]) -> Path:
+    """Écrit le contenu de l'envoi dans `dest` sans le charger en mémoire ; renvoie le chemin."""
+    dest = Path(dest)
+    src = upload_stream(upload)
+    with open(dest, "wb") as out:
+        if _on_disk(src):
+            try:
+                src.flush()
+                fd, offset = src.fileno(), 0
+                size = os.fstat(fd).st_size
+                while offset < size:
+                    sent = os.sendfile(out.fileno(), fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return dest
+            except (AttributeError, OSError):
+                # pas de descripteur (fichier en mémoire d'un autre type) ou sendfile indisponible
+                out.seek(0)
+                out.truncate()
+                src.seek(0)
+        shutil.copyfileobj(src, out, COPY_BLOCK)
+    return dest
+
+
+async def store_upload(upload: UploadFile, dest: Union[str, Path]) -> Path:
+    return await run_in_threadpool(save_upload, upload, dest)
@@ -1,9 +1,11 @@
 # app/plannings/ingest.py
 from __future__ import annotations
 
-from io import BytesIO
+import codecs
+import csv
+import re
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 
@@ -14,6 +16,132 @@ except Exception:  # pragma: no cover
 
 from fastapi import UploadFile
 
+from ..core.config import get_settings
+from ..core.executor import run_heavy
+from ..core.uploads import upload_stream
+from ..services.pdf_ocr import ocr_available, ocr_page_words
+from ..services.pdf_schedule_parser import rows_from_tables, table_from_words
+
+
+# --- CSV : détection rapide sur les premiers Ko, puis parseur C de pandas ---
+SNIFF_BYTES = 64 * 1024
+SNIFF_LINES = 50
+CSV_SEPARATORS = (";", ",", "\t", "|")
+_QUOTED = re.compile(r'"[^"]*"')
+_DECIMAL_COMMA = re.compile(r"(?:^|[;\t|])\s*-?\d+,\d+\s*(?=[;\t|]|$)")
+
+# colonnes connues du planning -> type explicite (pas d'inférence sur ces colonnes) ;
+# drapeaux (is_minor, has_derogation_...) : booléens numpy via CSV_TRUE / CSV_FALSE
+CSV_TEXT_COLUMNS = ("agent_id", "date", "start", "end")
+CSV_NUMERIC_COLUMNS = ("pause_min",)
+CSV_TRUE = ["true", "True", "TRUE", "vrai", "VRAI", "oui", "OUI"]
+CSV_FALSE = ["false", "False", "FALSE", "faux", "FAUX", "non", "NON"]
+
+
+def _sniff_encoding(head: bytes) -> str:
+    """UTF-8 avec BOM, UTF-8, sinon cp1252 (exports Excel français)."""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False : un caractère multi-octets coupé en fin d'échantillon n'est pas une erreur
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def _sniff_separator(lines: List[str]) -> str:
+    """Séparateur présent le même nombre de fois (> 0) sur chaque ligne ; à défaut le plus fréquent."""
+    lines = [_QUOTED.sub("", l) for l in lines if l.strip()]
+    if not lines:
+        return ","
+    best, best_score = ",", (False, 0)
+    for sep in CSV_SEPARATORS:
+        counts = [l.count(sep) for l in lines]
+        score = (min(counts) > 0 and len(set(counts)) == 1, sum(counts))
+        if score > best_score:
+            best, best_score = sep, score
+    return best
+
+
+def sniff_csv(head: bytes) -> Tuple[str, str, str]:
+    """(encodage, séparateur, séparateur décimal) déduits des premiers octets du fichier."""
+    encoding = _sniff_encoding(head)
+    text = head.decode(encoding, errors="ignore")
+    lines = text.splitlines()[:SNIFF_LINES]
+    if len(head) >= SNIFF_BYTES and len(lines) > 1:
+        lines = lines[:-1]  # dernière ligne probablement tronquée
+    sep = _sniff_separator(lines)
+    decimal = "."
+    if sep != ",":
+        body = [_QUOTED.sub("", l).replace(sep, ";") for l in lines[1:]]
+        if any(_DECIMAL_COMMA.search(l) for l in body):
+            decimal = ","
+    return encoding, sep, decimal
+
+
+def _csv_dtypes(header: List[str]) -> Dict[str, str]:
+    dtypes: Dict[str, str] = {}
+    for name in header:
+        key = name.strip().lower()
+        if key in CSV_TEXT_COLUMNS:
+            dtypes[name] = "str"
+        elif key in CSV_NUMERIC_COLUMNS:
+            dtypes[name] = "float64"
+    return dtypes
+
+
+def read_planning_csv(source: BinaryIO) -> pd.DataFrame:
+    """
+    CSV de planning (fichier binaire, lu sur place) -> DataFrame, avec le parseur C de pandas.
+    Encodage, séparateur et décimale sont déduits des SNIFF_BYTES premiers octets ;
+    les colonnes connues (CSV_TEXT_COLUMNS, CSV_NUMERIC_COLUMNS) sont typées
+    explicitement, les drapeaux vrai / faux lus en booléens. Si une valeur ne correspond pas au type attendu
+    (ex. pause "30 min"), seules les colonnes texte restent typées.
+    """
+    head = source.read(SNIFF_BYTES)
+    encoding, sep, decimal = sniff_csv(head)
+    first = head.decode(encoding, errors="ignore").splitlines()[:1]
+    header = next(csv.reader(first, delimiter=sep), []) if first else []
+    dtypes = _csv_dtypes(header)
+    opts = dict(sep=sep, decimal=decimal, encoding=encoding, engine="c",
+                true_values=CSV_TRUE, false_values=CSV_FALSE)
+    try:
+        source.seek(0)
+        return pd.read_csv(source, dtype=dtypes, **opts)
+    except (ValueError, TypeError):
+        text_only = {k: v for k, v in dtypes.items() if v == "str"}
+        source.seek(0)
+        return pd.read_csv(source, dtype=text_only, **opts)
+
+
+# --- PDF : tableaux -> planning aux colonnes canoniques (mêmes noms que le CSV) ---
+# champs de pdf_schedule_parser.HEADER_ALIASES -> colonnes du planning
+PDF_CANONICAL_COLUMNS = {
+    "agent_id": "agent_id",
+    "date": "date",
+    "start_time": "start",
+    "end_time": "end",
+    "break_minutes": "pause_min",
+}
+# drapeaux absents des PDF : valeurs par défaut (cf. audit.frame_from_shifts)
+PLANNING_FLAGS = ("has_derogation_daily_12h", "is_minor", "is_night_worker")
+
+
+def planning_frame_from_tables(pages: Iterable[List[list]]) -> pd.DataFrame:
+    """
+    Tableaux PDF (page par page) -> planning typé.
+    En-têtes reconnus par la table d'alias du parseur PDF ; un en-tête répété en haut
+    de page ouvre simplement un nouveau tableau (il n'est jamais pris pour une ligne),
+    une page sans en-tête continue le tableau précédent. Dates ISO, heures HH:MM
+    (conversion par colonne), pause en minutes ; lignes incomplètes écartées.
+    """
+    df = pd.DataFrame(list(rows_from_tables(pages)), columns=list(PDF_CANONICAL_COLUMNS)).rename(columns=PDF_CANONICAL_COLUMNS)
+    df = df.astype({"agent_id": "str", "date": "str", "start": "str", "end": "str", "pause_min": "int64"})
+    for flag in PLANNING_FLAGS:
+        df[flag] = False
+    return df
+
 
 def _safe_lower(s: Optional[str]) -> str:
     """Lowercase tolérant au None."""
@@ -50,26 +178,34 @@ def _detect_format(upload: UploadFile) -> str:
 
 async def load_schedule(upload: UploadFile) -> pd.DataFrame:
     """
-    Charge un planning en DataFrame depuis CSV/XLSX/PDF natif.
+    Charge un planning en DataFrame depuis CSV/XLSX/PDF (natif, ou scanné via OCR).
+    - PDF : planning typé aux colonnes du CSV (cf. planning_frame_from_tables).
     - Tolère content_type/filename manquants.
     - Donne des messages d'erreur explicites.
+    Lecture, analyse PDF et OCR hors de la boucle d'événements (cf. core.executor).
     """
     kind = _detect_format(upload)
+    if kind == "unknown":
+        raise ValueError(
+            f"Format non supporté. Nom='{upload.filename}', Content-Type='{getattr(upload, 'content_type', None)}'. "
+            "Formats acceptés : CSV, XLSX ou PDF."
+        )
+    # Fichier spoolé par starlette lu sur place (pas de copie en bytes, cf. core.uploads)
+    return await run_heavy(read_schedule, upload_stream(upload), kind)
 
-    # Lecture des octets (UploadFile est un file-like asynchrone)
-    data = await upload.read()
-    bio = BytesIO(data)
 
+def read_schedule(src: BinaryIO, kind: str) -> pd.DataFrame:
+    """Lecture synchrone d'un planning ; kind : csv | xlsx | pdf (cf. _detect_format)."""
     if kind == "csv":
-        # sep=None + engine='python' pour détecter ; ; , \t automatiquement
+        # séparateur / encodage / décimale détectés sur les premiers Ko (cf. sniff_csv)
         try:
-            return pd.read_csv(bio, sep=None, engine="python")
+            return read_planning_csv(src)
         except Exception as e:
             raise ValueError(f"Lecture CSV impossible : {e}") from e
 
     if kind == "xlsx":
         try:
-            return pd.read_excel(bio)
+            return pd.read_excel(src)
         except Exception as e:
             raise ValueError(f"Lecture Excel impossible : {e}") from e
 
@@ -79,32 +215,37 @@ async def load_schedule(upload: UploadFile) -> pd.DataFrame:
                 "Lecture PDF indisponible (dépendance pdfplumber manquante sur l’hébergement)."
             )
         try:
-            rows = []
-            with pdfplumber.open(bio) as pdf:
-                for page in pdf.pages:
-                    tables = page.extract_tables() or []
-                    for t in tables:
-                        for row in t:
-                            rows.append(row)
-
-            if not rows:
+            by_page = {}
+            scanned = []
+            with pdfplumber.open(src) as pdf:
+                for i, page in enumerate(pdf.pages):
+                    if not page.chars and page.images:
+                        scanned.append(i)  # page scannée : OCR plus bas
+                        continue
+                    by_page[i] = page.extract_tables() or []
+                    page.close()  # libère les objets analysés de la page
+
+            if scanned and get_settings().OCR_ENABLED and ocr_available():
+                words = ocr_page_words(src, scanned)
+                for i in scanned:
+                    table = table_from_words(words.get(i) or [])
+                    by_page[i] = [table] if table else []
+
+            if not any(by_page.values()):
                 raise ValueError(
-                    "Aucune table lisible trouvée dans le PDF (PDF probablement scanné). "
+                    "Aucune table lisible trouvée dans le PDF (PDF probablement scanné, OCR indisponible). "
                     "Convertissez en CSV/XLSX ou utilisez un PDF 'natif'."
                 )
 
-            width = max(len(r) for r in rows)
-            norm = [(r + [""] * (width - len(r))) for r in rows]
-            df = pd.DataFrame(norm)
-            # Option : essayer de détecter une ligne d'en-têtes plausible
-            # Ici on ne force rien pour rester générique.
+            df = planning_frame_from_tables(by_page[i] for i in sorted(by_page))
+            if df.empty:
+                raise ValueError(
+                    "Aucune ligne de planning reconnue dans les tableaux du PDF "
+                    "(en-têtes attendus : matricule/agent, date, début, fin, pause)."
+                )
             return df
 
         except Exception as e:
             raise ValueError(f"Lecture PDF impossible : {e}") from e
 
-    # Si on arrive ici : format pas géré
-    raise ValueError(
-        f"Format non supporté. Nom='{upload.filename}', Content-Type='{getattr(upload, 'content_type', None)}'. "
-        "Formats acceptés : CSV, XLSX ou PDF 'natif' (non scanné)."
-    )
+    raise ValueError(f"Format non supporté : {kind}")
@@ -2,9 +2,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from .config import SETTINGS
+from ..services.column_formats import days_to_iso
+from ..services.schedule_engine import Sweep, group_sum, table_from_bounds
+from ..services.shift_table import ShiftTable
 
 
 @dataclass
@@ -17,7 +21,44 @@ class Violation:
     details: dict[str, Any]
 
 
-def analyze_schedule(df: pd.DataFrame) -> dict[str, Any]:
+def frame_from_shifts(table: ShiftTable) -> pd.DataFrame:
+    """
+    ShiftTable -> colonnes attendues par analyze_schedule.
+    La table ne porte pas de nom : employee_name reprend l'identifiant.
+    """
+    f = table.to_frame()
+    base = pd.Timestamp("1900-01-01")
+    start_min = f["start_min"].astype("int64")
+    end_min = f["end_min"].astype("int64")
+    duration = end_min - start_min
+    duration = duration.where(duration > 0, duration + 24 * 60)
+    agent = f["agent_id"].astype(str)
+    return pd.DataFrame({
+        "employee_id": agent,
+        "employee_name": agent,
+        "date": f["day"],
+        "start": base + pd.to_timedelta(start_min, unit="m"),
+        "end": base + pd.to_timedelta(end_min, unit="m"),
+        "day": f["day"].dt.date,
+        "hours": ((duration - f["break_min"]).clip(lower=0) / 60.0).round(2),
+    })
+
+
+def shift_sweep(df: pd.DataFrame) -> Sweep:
+    """Noyau de conformité partagé sur les vacations (start_dt / end_dt absolus, end_dt reporté)."""
+    epoch = pd.Timestamp("1970-01-01")
+    return Sweep(table_from_bounds(
+        df["employee_id"].to_numpy(),
+        ((df["start_dt"] - epoch) / pd.Timedelta(minutes=1)).to_numpy(dtype=float),
+        ((df["end_dt"] - epoch) / pd.Timedelta(minutes=1)).to_numpy(dtype=float),
+        minutes=df["hours"].to_numpy(dtype=float) * 60.0,
+        hours=df["hours"].to_numpy(dtype=float),
+        name=df["employee_name"].to_numpy(),
+        date=df["date"].to_numpy(dtype=object),
+    ))
+
+
+def analyze_schedule(df: pd.DataFrame | ShiftTable) -> dict[str, Any]:
     """
     Calcule les non-conformités clés :
     - durée journalière max
@@ -27,6 +68,8 @@ def analyze_schedule(df: pd.DataFrame) -> dict[str, Any]:
     - jours consécutifs (> 6)
     - pause ≥ 30min si poste >= 6h (approx. en l’absence de colonnes de pause)
     """
+    if isinstance(df, ShiftTable):
+        df = frame_from_shifts(df)
     R = SETTINGS.RULES
     violations: list[dict[str, Any]] = []
 
@@ -35,97 +78,73 @@ def analyze_schedule(df: pd.DataFrame) -> dict[str, Any]:
 
     # index utiles
     df = df.sort_values(["employee_id", "date", "start"]).copy()
+    df["start_dt"] = pd.to_datetime(df["date"].dt.date) + (df["start"] - pd.Timestamp("1900-01-01"))
+    df["end_dt"]   = pd.to_datetime(df["date"].dt.date) + (df["end"]   - pd.Timestamp("1900-01-01"))
+    # si fin < début => +1 jour
+    mask_wrap = (df["end_dt"] < df["start_dt"])
+    df.loc[mask_wrap, "end_dt"] = df.loc[mask_wrap, "end_dt"] + pd.Timedelta(days=1)
 
-    # Par jour & salarié : somme des heures
-    daily = df.groupby(["employee_id", "employee_name", "day"], as_index=False)["hours"].sum()
-    daily["week"] = pd.to_datetime(daily["day"]).dt.isocalendar().week
-    daily["year"] = pd.to_datetime(daily["day"]).dt.isocalendar().year
+    # noyau partagé (schedule_engine.Sweep) : vacations triées par (salarié, début),
+    # agrégats par jour / semaine, repos et séries calculés une fois
+    sw = shift_sweep(df)
+    t, d, w = sw.t, sw.daily, sw.weekly
+    names = df.groupby("employee_id", sort=False)["employee_name"].first()  # 1er nom renseigné
+    emp_names = [None if pd.isna(n) else n for n in names.reindex(sw.names).tolist()]
 
     # 1) Durée journalière max
-    mask = daily["hours"] > R.max_daily_hours
-    for _, r in daily[mask].iterrows():
+    d_hours = sw.per_day("hours")
+    d_dates = days_to_iso(d["day"]).tolist()
+    for i in np.flatnonzero(d_hours > R.max_daily_hours).tolist():
+        a = d["agent"][i]
         violations.append(Violation(
-            r.employee_id, r.employee_name, str(r.day),
-            "MAX_DAILY", f"Durée journalière {r.hours}h > {R.max_daily_hours}h",
-            {"hours": r.hours}
+            sw.names[a], emp_names[a], d_dates[i],
+            "MAX_DAILY", f"Durée journalière {d_hours[i]}h > {R.max_daily_hours}h",
+            {"hours": d_hours[i]}
         ).__dict__)
 
-    # 2) Durée hebdomadaire max
-    weekly = daily.groupby(["employee_id", "employee_name", "year", "week"], as_index=False)["hours"].sum()
-    mask = weekly["hours"] > R.max_weekly_hours
-    for _, r in weekly[mask].iterrows():
+    # 2) Durée hebdomadaire max (somme des journées de la semaine ISO)
+    w_hours = group_sum(d_hours, w["idx"])
+    for i in np.flatnonzero(w_hours > R.max_weekly_hours).tolist():
+        a = w["agent"][i]
         violations.append(Violation(
-            r.employee_id, r.employee_name, f"S{int(r.week)}-{int(r.year)}",
-            "MAX_WEEKLY", f"Durée hebdomadaire {r.hours}h > {R.max_weekly_hours}h",
-            {"hours": r.hours}
+            sw.names[a], emp_names[a], f"S{w['week'][i]}-{w['year'][i]}",
+            "MAX_WEEKLY", f"Durée hebdomadaire {w_hours[i]}h > {R.max_weekly_hours}h",
+            {"hours": w_hours[i]}
         ).__dict__)
 
     # 3) Repos quotidien (>= 11h) entre deux vacations
-    # On calcule l'écart entre la fin d'un service et le début du suivant (même salarié)
-    df["start_dt"] = pd.to_datetime(df["date"].dt.date) + (df["start"] - pd.Timestamp("1900-01-01"))
-    df["end_dt"]   = pd.to_datetime(df["date"].dt.date) + (df["end"]   - pd.Timestamp("1900-01-01"))
-    # si fin < début => +1 jour
-    mask_wrap = (df["end_dt"] < df["start_dt"])
-    df.loc[mask_wrap, "end_dt"] = df.loc[mask_wrap, "end_dt"] + pd.Timedelta(days=1)
-
-    df = df.sort_values(["employee_id", "start_dt"])
-    df["prev_end"] = df.groupby("employee_id")["end_dt"].shift()
-    df["rest_hours"] = (df["start_dt"] - df["prev_end"]).dt.total_seconds() / 3600.0
-    mask = df["prev_end"].notna() & (df["rest_hours"] < R.min_daily_rest_hours)
-    for _, r in df[mask].iterrows():
+    # écart entre la fin d'un service et le début du suivant (même salarié)
+    rest_h = sw.rest_hours
+    for i in np.flatnonzero(rest_h < R.min_daily_rest_hours).tolist():
+        a = t["agent"][i]
         violations.append(Violation(
-            r.employee_id, r.employee_name, str(r.date.date()),
-            "DAILY_REST", f"Repos quotidien {round(r.rest_hours,2)}h < {R.min_daily_rest_hours}h",
-            {"rest_hours": round(r.rest_hours,2)}
+            sw.names[a], t["name"][i], str(t["date"][i].date()),
+            "DAILY_REST", f"Repos quotidien {round(rest_h[i],2)}h < {R.min_daily_rest_hours}h",
+            {"rest_hours": round(rest_h[i],2)}
         ).__dict__)
 
     # 4) Repos hebdomadaire (>= 35h)
-    # on repère des séquences avec écart >= 35h sur la semaine ; si aucune -> violation
-    # Approximation : on cherche, pour chaque semaine, s'il existe au moins une fenêtre de repos >= 35h
-    weekly_rest_viol = []
-    for (emp, yr, wk), grp in df.groupby(["employee_id", df["start_dt"].dt.isocalendar().year, df["start_dt"].dt.isocalendar().week]):
-        grp = grp.sort_values("start_dt")
-        # concatène toutes les fins & débuts pour trouver les repos
-        ends = grp["end_dt"].tolist()
-        starts = grp["start_dt"].tolist()
-        ok = False
-        for i in range(len(grp)-1):
-            rest = (starts[i+1] - ends[i]).total_seconds()/3600.0
-            if rest >= R.min_weekly_rest_hours:
-                ok = True
-                break
-        if not ok and len(grp) > 0:
-            weekly_rest_viol.append((emp, yr, wk))
-    for emp, yr, wk in weekly_rest_viol:
-        name = df[df["employee_id"] == emp]["employee_name"].dropna().head(1).tolist()
+    # Approximation : pour chaque semaine ISO (du début de vacation), au moins un écart
+    # fin -> début suivant >= 35h ; sinon violation
+    wr = sw.week_rows
+    for i in np.flatnonzero(~sw.week_has_rest(R.min_weekly_rest_hours)).tolist():
+        a = wr["agent"][i]
         violations.append(Violation(
-            emp, name[0] if name else None, f"S{int(wk)}-{int(yr)}",
+            sw.names[a], emp_names[a], f"S{wr['week'][i]}-{wr['year'][i]}",
             "WEEKLY_REST", f"Repos hebdomadaire < {R.min_weekly_rest_hours}h",
             {}
         ).__dict__)
 
-    # 5) Jours consécutifs > seuil
-    # on repère des suites de jours travaillés sans trou
-    def consecutive_days(days: list[pd.Timestamp]) -> int:
-        if not days: return 0
-        days = sorted(set(pd.to_datetime(days)))
-        maxi, cur = 1, 1
-        for i in range(1, len(days)):
-            if (days[i] - days[i-1]).days == 1:
-                cur += 1
-                maxi = max(maxi, cur)
-            else:
-                cur = 1
-        return maxi
-
-    for (emp, name), grp in daily.groupby(["employee_id", "employee_name"]):
-        maxi = consecutive_days(pd.to_datetime(grp["day"]).tolist())
-        if maxi > R.max_consecutive_days:
-            violations.append(Violation(
-                emp, name, "-", "CONSEC_DAYS",
-                f"{maxi} jours travaillés consécutifs > {R.max_consecutive_days}",
-                {"consecutive_days": int(maxi)}
-            ).__dict__)
+    # 5) Jours consécutifs > seuil (plus longue suite de jours travaillés sans trou)
+    runs = sw.runs
+    longest = np.zeros(len(sw.names), dtype=np.int64)
+    np.maximum.at(longest, runs["agent"], runs["length"])
+    for a in np.flatnonzero(longest > R.max_consecutive_days).tolist():
+        violations.append(Violation(
+            sw.names[a], emp_names[a], "-", "CONSEC_DAYS",
+            f"{longest[a]} jours travaillés consécutifs > {R.max_consecutive_days}",
+            {"consecutive_days": int(longest[a])}
+        ).__dict__)
 
     # 6) Pause ≥ 30 min si poste >= 6h (approx.)
     # Si une vacation journalière >= 6h et aucune info de pause, on lève un warning
@@ -139,9 +158,9 @@ def analyze_schedule(df: pd.DataFrame) -> dict[str, Any]:
 
     # Résumé
     summary = {
-        "employees": int(daily["employee_id"].nunique()),
-        "days": int(daily["day"].nunique()),
-        "total_hours": float(round(daily["hours"].sum(), 2)),
+        "employees": len(sw.names),
+        "days": int(np.unique(d["day"]).size),
+        "total_hours": float(round(d_hours.sum(), 2)),
         "violations_count": len(violations),
         "by_code": pd.Series([v["code"] for v in violations]).value_counts().to_dict() if violations else {},
     }
@@ -6,6 +6,8 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import FileResponse
 
 from ..core.config import get_settings
+from ..core.executor import run_heavy
+from ..core.uploads import store_upload
 from ..models.schemas import AnalysisResult, TrainPayload
 from ..services.analyzer import Analyzer
 from ..services.learning import LearningDB
@@ -64,18 +66,17 @@ async def analyze_file(
         fname = os.path.basename(file.filename).replace(os.sep, "_")
         save_path = os.path.join(base_dir, f"upload_{fname}")
 
-        # Sauvegarde du fichier uploadé
-        content = await file.read()
-        with open(save_path, "wb") as f_out:
-            f_out.write(content)
+        # Sauvegarde du fichier uploadé (copie disque à disque, sans passer par la mémoire)
+        await store_upload(file, save_path)
 
+        # analyse + rapport PDF : hors boucle d'événements (pool borné, 503 si saturé)
         analyzer = _get_analyzer()
-        result = analyzer.analyze_file(save_path)
+        result = await run_heavy(analyzer.analyze_file, save_path)
 
         if export_pdf:
             pdf_name = f"report_{os.path.splitext(os.path.basename(save_path))[0]}.pdf"
             pdf_path = os.path.join(base_dir, pdf_name)
-            analyzer.export_pdf(result, pdf_path)
+            await run_heavy(analyzer.export_pdf, result, pdf_path)
 
             # Ajoute le chemin du PDF au retour
             if hasattr(result, "model_dump"):
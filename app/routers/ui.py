@@ -6,7 +6,9 @@ from fastapi import APIRouter, Form, HTTPException, Request
 from starlette.templating import Jinja2Templates
 
 from ..core.config import get_settings
-from ..services.schedule_checker import check_schedules  # stub ou version complète OK
+from ..core.executor import run_heavy
+from ..services.result_cache import cached_check
+from ..services.schedule_state import check_schedules_incremental
 
 router = APIRouter(prefix="/ui", tags=["ui"])
 templates = Jinja2Templates(directory=str(Path(__file__).resolve().parents[1] / "templates"))
@@ -99,7 +101,11 @@ async def ui_analyze(request: Request, company_folder: str = Form(...)):
     error = None
     if plan_parsed:
         try:
-            schedules = check_schedules(plan_parsed)
+            schedules = await run_heavy(
+                cached_check, plan_parsed, lambda: check_schedules_incremental(company_folder, plan_parsed)
+            )
+        except HTTPException:
+            raise
         except Exception as e:
             error = f"Erreur analyse des plannings : {e}"
 
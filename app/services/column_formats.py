@@ -0,0 +1,223 @@
+# app/services/column_formats.py
+"""
+Conversion des colonnes date / heure des plannings, par colonne et non par cellule.
+
+Le format est déduit une fois sur un échantillon de la colonne :
+- dates  : ISO (2025-08-01), dd/mm/YYYY, dd/mm/yy (séparateurs / . -), série Excel (45870)
+- heures : 08:30, 8h30, 08.30, fraction de jour Excel (0.354166...)
+puis toute la colonne est convertie en un appel vectorisé (pandas / NumPy).
+Seules les cellules non vides que ce format ne reconnaît pas repassent par le
+chemin lent (essai de tous les formats, cellule par cellule) ; elles sont comptées.
+
+Résultats : jours depuis le 1970-01-01 (dates) et minutes depuis minuit (heures),
+en int64, avec un masque de validité.
+"""
+from __future__ import annotations
+import re
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse as dt_parse
+
+from .schedule_engine import EPOCH_ORDINAL
+
+# À incrémenter dès que la normalisation des lignes change de résultat (ColumnParser,
+# _iter_normalized, _RowNormalizer) : invalide les vacations et résultats en cache
+NORMALIZER_VERSION = 1
+
+SAMPLE_SIZE = 200
+EXCEL_EPOCH_SERIAL = 25569          # série Excel du 1970-01-01
+EXCEL_MAX_SERIAL = 2958465          # 9999-12-31
+
+# format -> séparateurs remplacés par "/" avant conversion
+DATE_FORMATS: Tuple[str, ...] = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y")
+EXCEL = "excel"
+_DMY_SEPARATORS = re.compile(r"[.\-]")
+
+TIME_PATTERNS = {
+    ":": re.compile(r"^(\d{1,2}):(\d{2})$"),
+    "h": re.compile(r"^(\d{1,2})h(\d{2})$"),
+    ".": re.compile(r"^(\d{1,2})\.(\d{2})$"),
+}
+_ANY_TIME = re.compile(r"^(\d{1,2})[:h.](\d{2})$")
+
+
+def _as_text(values: Sequence) -> pd.Series:
+    s = pd.Series(values, dtype=object)
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+
+def _sample(s: pd.Series) -> pd.Series:
+    return s[s != ""].head(SAMPLE_SIZE)
+
+
+# --- dates ---
+def _excel_days(s: pd.Series) -> pd.Series:
+    n = pd.to_numeric(s, errors="coerce")
+    n = n.where((n >= 1) & (n <= EXCEL_MAX_SERIAL))
+    return np.floor(n) - EXCEL_EPOCH_SERIAL
+
+
+def _dates_with(s: pd.Series, fmt: str) -> pd.Series:
+    """Jours depuis le 1970-01-01 (float, NaN si invalide) pour un format donné."""
+    if fmt == EXCEL:
+        return _excel_days(s)
+    if fmt != "%Y-%m-%d":
+        s = s.str.replace(_DMY_SEPARATORS, "/", regex=True)
+    dt = pd.to_datetime(s, format=fmt, errors="coerce")
+    days = dt.to_numpy(dtype="datetime64[D]").astype("int64").astype("float64")
+    days[dt.isna().to_numpy()] = np.nan
+    return pd.Series(days, index=s.index)
+
+
+def infer_date_format(values: Sequence) -> Optional[str]:
+    """Format majoritaire sur un échantillon non vide (None si rien ne convient)."""
+    sample = _sample(_as_text(values))
+    if sample.empty:
+        return None
+    scores = {fmt: int(_dates_with(sample, fmt).notna().sum()) for fmt in (*DATE_FORMATS, EXCEL)}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def parse_date_cell(value) -> Optional[int]:
+    """Chemin lent : une cellule, tous les formats."""
+    s = str(value if value is not None else "").strip()
+    if not s:
+        return None
+    for fmt in DATE_FORMATS:
+        txt = s if fmt == "%Y-%m-%d" else _DMY_SEPARATORS.sub("/", s)
+        try:
+            return datetime.strptime(txt, fmt).toordinal() - EPOCH_ORDINAL
+        except ValueError:
+            pass
+    try:
+        f = float(s)
+    except ValueError:
+        return None
+    return int(f) - EXCEL_EPOCH_SERIAL if 1 <= f <= EXCEL_MAX_SERIAL else None
+
+
+# --- heures ---
+def _times_with(s: pd.Series, fmt: str) -> pd.Series:
+    """Minutes depuis minuit (float, NaN si invalide) pour un format donné."""
+    if fmt == EXCEL:
+        n = pd.to_numeric(s, errors="coerce")
+        n = n.where((n >= 0) & (n < 1))
+        return np.round(n * 1440).where(lambda m: m < 1440)
+    parts = s.str.lower().str.replace(" ", "", regex=False).str.extract(TIME_PATTERNS[fmt])
+    hh = pd.to_numeric(parts[0], errors="coerce")
+    mm = pd.to_numeric(parts[1], errors="coerce")
+    return (hh * 60 + mm).where((hh <= 23) & (mm <= 59))
+
+
+def infer_time_format(values: Sequence) -> Optional[str]:
+    sample = _sample(_as_text(values))
+    if sample.empty:
+        return None
+    scores = {fmt: int(_times_with(sample, fmt).notna().sum()) for fmt in (*TIME_PATTERNS, EXCEL)}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def parse_time_cell(value) -> Optional[int]:
+    s = str(value if value is not None else "").strip().lower().replace(" ", "")
+    m = _ANY_TIME.match(s)
+    if m and int(m.group(1)) <= 23 and int(m.group(2)) <= 59:
+        return int(m.group(1)) * 60 + int(m.group(2))
+    try:
+        f = float(s)
+    except ValueError:
+        return None
+    return int(round(f * 1440)) if 0 <= f < 1 and round(f * 1440) < 1440 else None
+
+
+# --- colonnes ---
+class ColumnParser:
+    """
+    Convertit les blocs successifs d'une même colonne (un fichier lu par paquets) :
+    le format est déduit sur le premier bloc non vide puis réutilisé.
+    `slow` : nb de cellules passées par le chemin lent.
+    """
+
+    def __init__(self, kind: str, fmt: Optional[str] = None) -> None:
+        if kind not in ("date", "time"):
+            raise ValueError(f"Type de colonne inconnu: {kind}")
+        self.kind = kind
+        self.fmt = fmt
+        self.slow = 0
+
+    def parse(self, values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+        """-> (valeurs int64, masque de validité)."""
+        s = _as_text(values)
+        if self.fmt is None:
+            self.fmt = infer_date_format(s) if self.kind == "date" else infer_time_format(s)
+        if self.fmt is None:
+            out = pd.Series(np.nan, index=s.index)
+        elif self.kind == "date":
+            out = _dates_with(s, self.fmt)
+        else:
+            out = _times_with(s, self.fmt)
+
+        arr = out.to_numpy(dtype="float64", copy=True)
+        outliers = np.flatnonzero(np.isnan(arr) & (s != "").to_numpy())
+        if len(outliers):
+            self.slow += len(outliers)
+            cell = parse_date_cell if self.kind == "date" else parse_time_cell
+            raw = s.to_numpy()
+            for i in outliers.tolist():
+                v = cell(raw[i])
+                if v is not None:
+                    arr[i] = v
+        valid = ~np.isnan(arr)
+        return np.where(valid, arr, 0).astype(np.int64), valid
+
+
+def parse_dates(values: Sequence, fmt: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Colonne de dates -> (jours depuis le 1970-01-01, validité, nb de cellules en chemin lent)."""
+    p = ColumnParser("date", fmt)
+    days, valid = p.parse(values)
+    return days, valid, p.slow
+
+
+def parse_times(values: Sequence, fmt: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Colonne d'heures -> (minutes depuis minuit, validité, nb de cellules en chemin lent)."""
+    p = ColumnParser("time", fmt)
+    minutes, valid = p.parse(values)
+    return minutes, valid, p.slow
+
+
+# --- heures d'horloge (audit des plannings) ---
+CLOCK_FORMATS: Tuple[str, ...] = ("%H:%M", "%H:%M:%S")
+
+
+def time_of_day_seconds(values: Sequence) -> np.ndarray:
+    """
+    Heure du jour en secondes (float). Chaque valeur distincte n'est lue qu'une fois
+    (une colonne d'horaires en compte rarement plus de quelques centaines) :
+    formats CLOCK_FORMATS en bloc, les autres une à une par dateutil (même lecture
+    que l'audit ligne à ligne, mêmes erreurs sur une valeur illisible).
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    u = pd.Series(uniques, dtype=object)
+    secs = np.full(len(u), np.nan)
+    for fmt in CLOCK_FORMATS:
+        todo = np.isnan(secs)
+        if not todo.any():
+            break
+        ts = pd.to_datetime(u[todo], format=fmt, errors="coerce")
+        secs[todo] = (ts - ts.dt.normalize()).dt.total_seconds().to_numpy()
+    for i in np.flatnonzero(np.isnan(secs)).tolist():
+        t = dt_parse(u.iat[i]).time()
+        secs[i] = t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+    return secs[codes]
+
+
+def days_to_iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(np.asarray(days, dtype="int64").astype("datetime64[D]"), unit="D")
+
+
+def minutes_to_hhmm(minutes: np.ndarray) -> list:
+    return [f"{m // 60:02d}:{m % 60:02d}" for m in np.asarray(minutes, dtype="int64").tolist()]
@@ -0,0 +1,72 @@
+# app/services/external_sort.py
+"""
+Tri externe à mémoire bornée.
+
+Les éléments sont accumulés par paquets de `max_in_memory`, chaque paquet est trié
+puis écrit sur disque (pickle par blocs) ; les paquets sont ensuite fusionnés
+(heapq.merge) en flux. Sous le seuil, tout reste en mémoire sans fichier.
+Le tri est stable : à clé égale, l'ordre d'arrivée est conservé.
+"""
+from __future__ import annotations
+import heapq
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+BLOCK_SIZE = 4096  # éléments par pickle.dump dans un run
+
+
+def _write_run(items: List[T], path: Path) -> None:
+    with open(path, "wb") as f:
+        for i in range(0, len(items), BLOCK_SIZE):
+            pickle.dump(items[i:i + BLOCK_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path: Path) -> Iterator[T]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def external_sort(
+    items: Iterable[T],
+    key: Optional[Callable[[T], object]] = None,
+    max_in_memory: int = 200_000,
+    tmp_dir: Optional[str] = None,
+) -> Iterator[T]:
+    """
+    Générateur trié de `items`.
+    - max_in_memory : nb d'éléments au-delà duquel on déborde sur disque
+    - tmp_dir : dossier des fichiers temporaires (défaut : tempfile)
+    """
+    buf: List[T] = []
+    runs: List[Path] = []
+    workdir: Optional[tempfile.TemporaryDirectory] = None
+    try:
+        for it in items:
+            buf.append(it)
+            if len(buf) >= max_in_memory:
+                if workdir is None:
+                    workdir = tempfile.TemporaryDirectory(prefix="csi-sort-", dir=tmp_dir)
+                buf.sort(key=key)
+                run = Path(workdir.name) / f"run_{len(runs):05d}.pkl"
+                _write_run(buf, run)
+                runs.append(run)
+                buf = []
+
+        buf.sort(key=key)
+        if not runs:
+            yield from buf
+            return
+        # heapq.merge privilégie le premier itérable à égalité : stabilité conservée
+        yield from heapq.merge(*(_read_run(r) for r in runs), iter(buf), key=key)
+    finally:
+        if workdir is not None:
+            workdir.cleanup()
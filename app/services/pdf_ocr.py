@@ -0,0 +1,192 @@
+# app/services/pdf_ocr.py
+"""
+OCR des pages PDF sans couche texte (plannings scannés).
+
+- rendu des pages avec pypdfium2 (niveaux de gris, OCR_DPI)
+- OCR par le binaire tesseract (installé dans l'image Docker, langue OCR_LANG),
+  sortie TSV = mots + boîtes englobantes ; une page par tâche, en ProcessPoolExecutor
+  (workers réservés sur le budget WORK_PROCESSES, cf. core.executor)
+- cache par empreinte de l'image rendue (sha256 des pixels + dpi + langue) :
+  une page déjà lue n'est pas ré-OCRisée, même dans un autre PDF
+- pages rendues par paquets de 2 par worker : seuls les PNG des pages du paquet
+  absentes du cache restent en mémoire le temps de leur OCR
+- `words_to_table` reconstruit les cellules : lignes par ordonnée des mots,
+  colonnes par les blancs verticaux communs aux lignes du tableau
+
+Dépendances optionnelles : sans pypdfium2 ou tesseract, `ocr_available()` est faux.
+"""
+from __future__ import annotations
+import csv
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import median
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except Exception:
+    pdfium = None
+
+from ..core.config import get_settings
+from ..core.executor import get_process_budget, no_worker_processes
+from .result_cache import ResultCache
+
+# (texte, x0, top, x1, bottom) en pixels de l'image rendue
+Word = Tuple[str, float, float, float, float]
+Table = List[List[str]]
+
+_COLUMN_GAP = 0.9   # blanc minimal entre colonnes, en hauteur médiane de mot
+_LINE_GAP = 0.5     # écart vertical de centre au-delà duquel on change de ligne
+
+
+def ocr_available() -> bool:
+    return pdfium is not None and shutil.which("tesseract") is not None
+
+
+# --- rendu & OCR ---
+def _render_page(doc, i: int, dpi: int, lang: str):
+    """(image, empreinte) de la page i ; l'empreinte porte sur les pixels rendus."""
+    image = doc[i].render(scale=dpi / 72, grayscale=True).to_pil()
+    h = hashlib.sha256(image.tobytes())
+    h.update(f"{image.size}|{dpi}|{lang}".encode())
+    return image, h.hexdigest()
+
+
+def _png(image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _ocr_png(png: bytes, lang: str, timeout: float) -> List[Word]:
+    """Tâche d'un worker : tesseract (une page, un thread) -> mots avec boîtes."""
+    proc = subprocess.run(
+        ["tesseract", "stdin", "stdout", "-l", lang, "--psm", "6", "tsv"],
+        input=png,
+        capture_output=True,
+        timeout=timeout,
+        check=True,
+        env={**os.environ, "OMP_THREAD_LIMIT": "1"},
+    )
+    words: List[Word] = []
+    for rec in csv.DictReader(io.StringIO(proc.stdout.decode("utf-8", "replace")), delimiter="\t", quoting=csv.QUOTE_NONE):
+        text = (rec.get("text") or "").strip()
+        if rec.get("level") != "5" or not text or float(rec.get("conf") or -1) < 0:
+            continue
+        x, y, w, h = (float(rec[k]) for k in ("left", "top", "width", "height"))
+        words.append((text, x, y, x + w, y + h))
+    return words
+
+
+def ocr_page_words(source: Union[Path, bytes, BinaryIO], pages: Iterable[int]) -> Dict[int, List[Word]]:
+    """
+    Mots OCR des pages demandées, par paquets de 2 pages par worker : rendu et empreinte
+    de chaque page, pages en cache relues (image aussitôt libérée), les autres réparties
+    entre OCR_WORKERS processus (réservés au premier paquet qui en a besoin).
+    """
+    S = get_settings()
+    cache = ResultCache.from_settings(S)
+    pages = list(pages)
+    cap = S.OCR_WORKERS or os.cpu_count() or 1
+    chunk = 2 * cap
+
+    words: Dict[int, List[Word]] = {}
+    budget = get_process_budget()
+    workers: Optional[int] = None
+    ex: Optional[ProcessPoolExecutor] = None
+    doc = pdfium.PdfDocument(str(source) if isinstance(source, Path) else source)
+    try:
+        for lo in range(0, len(pages), chunk):
+            todo: List[Tuple[int, str, bytes]] = []
+            for i in pages[lo:lo + chunk]:
+                image, key = _render_page(doc, i, S.OCR_DPI, S.OCR_LANG)
+                hit = cache.load_ocr(key) if cache is not None else None
+                if hit is not None:
+                    words[i] = [tuple(w) for w in hit]
+                else:
+                    todo.append((i, key, _png(image)))
+                del image
+            if not todo:
+                continue
+            if workers is None:
+                workers = budget.acquire(min(cap, len(pages) - lo))
+                if workers:
+                    ex = ProcessPoolExecutor(max_workers=workers, initializer=no_worker_processes)
+            if ex is None:
+                results = [_ocr_png(png, S.OCR_LANG, S.OCR_PAGE_TIMEOUT_S) for _, _, png in todo]
+            else:
+                results = list(ex.map(_ocr_png, [png for _, _, png in todo], [S.OCR_LANG] * len(todo), [S.OCR_PAGE_TIMEOUT_S] * len(todo)))
+            for (i, key, _), page_words in zip(todo, results):
+                words[i] = page_words
+                if cache is not None:
+                    cache.store_ocr(key, page_words)
+    finally:
+        doc.close()
+        if ex is not None:
+            ex.shutdown(cancel_futures=True)
+        if workers:
+            budget.release(workers)
+    return words
+
+
+# --- reconstruction du tableau ---
+def _lines(words: List[Word], height: float) -> List[List[Word]]:
+    lines: List[List[Word]] = []
+    centre = None
+    for w in sorted(words, key=lambda w: (w[2] + w[4]) / 2):
+        cy = (w[2] + w[4]) / 2
+        if lines and cy - centre <= _LINE_GAP * height:
+            lines[-1].append(w)
+        else:
+            lines.append([w])
+            centre = cy
+    return [sorted(line, key=lambda w: w[1]) for line in lines]
+
+
+def _header_line(lines: List[List[Word]], norm_header: Callable[[str], Optional[str]]) -> int:
+    """Index de la première ligne où au moins deux en-têtes sont reconnus (mots seuls ou paires), 0 sinon."""
+    for n, line in enumerate(lines):
+        texts = [w[0] for w in line]
+        found = {norm_header(t) for t in texts}
+        found |= {norm_header(f"{a} {b}") for a, b in zip(texts, texts[1:])}
+        found.discard(None)
+        if len(found) >= 2:
+            return n
+    return 0
+
+
+def words_to_table(words: List[Word], norm_header: Callable[[str], Optional[str]]) -> Table:
+    """
+    Cellules d'un tableau à partir des mots d'une page.
+    Les lignes au-dessus de l'en-tête (titres) sont écartées ; les colonnes sont les
+    plages x occupées par les mots des lignes restantes, séparées par un blanc
+    d'au moins _COLUMN_GAP hauteur de mot.
+    """
+    if not words:
+        return []
+    height = median(w[4] - w[2] for w in words) or 1.0
+    lines = _lines(words, height)
+    lines = lines[_header_line(lines, norm_header):]
+
+    spans: List[List[float]] = []
+    for w in sorted((w for line in lines for w in line), key=lambda w: w[1]):
+        if spans and w[1] - spans[-1][1] < _COLUMN_GAP * height:
+            spans[-1][1] = max(spans[-1][1], w[3])
+        else:
+            spans.append([w[1], w[3]])
+    starts = [s[0] for s in spans]
+
+    table: Table = []
+    for line in lines:
+        row = [""] * len(spans)
+        for w in line:
+            c = bisect_right(starts, w[1]) - 1
+            row[c] = f"{row[c]} {w[0]}".strip()
+        table.append(row)
+    return table
@@ -1,10 +1,30 @@
 # app/services/pdf_schedule_parser.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import re
+import os
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pdfplumber
-from datetime import datetime
+
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except Exception:
+    pdfium = None
+
+from ..core.config import get_settings
+from ..core.executor import get_process_budget, in_worker_process, no_worker_processes
+from .column_formats import ColumnParser, days_to_iso, minutes_to_hhmm
+from .pdf_ocr import Word, ocr_available, ocr_page_words, words_to_table
+from .result_cache import ResultCache, file_digest
+from .shift_table import ShiftTable
+
+# À incrémenter dès que l'extraction change de résultat (invalide le cache des PDF)
+PDF_PARSER_VERSION = 3
 
 # Entêtes possibles dans les PDF
 HEADER_ALIASES: Dict[str, str] = {
@@ -33,46 +53,26 @@ HEADER_ALIASES: Dict[str, str] = {
     "break": "break_minutes",
 }
 
-TIME_RE = re.compile(r"^\s*(\d{1,2})[:hH\.](\d{2})\s*$")
-DATE_PATTERNS = ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d")
 
-def _norm_header(cell: str) -> Optional[str]:
-    if cell is None:
-        return None
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "intersection_x_tolerance": 3,
+    "intersection_y_tolerance": 3,
+    "text_tolerance": 3,
+}
+
+def _header_key(cell) -> str:
     key = re.sub(r"\s+", " ", str(cell)).strip().lower()
-    key = key.replace("é", "e").replace("è", "e").replace("ê", "e").replace("à", "a").replace("’", "'")
-    return HEADER_ALIASES.get(key)
+    return key.replace("é", "e").replace("è", "e").replace("ê", "e").replace("à", "a").replace("’", "'")
 
-def _parse_time(s: str) -> Optional[str]:
-    if s is None:
-        return None
-    s = str(s).strip().lower().replace(" ", "")
-    s = s.replace(".", ":").replace("h", ":")
-    m = TIME_RE.match(s)
-    if not m:
-        return None
-    hh, mm = int(m.group(1)), int(m.group(2))
-    if 0 <= hh <= 47 and 0 <= mm <= 59:
-        return f"{hh:02d}:{mm:02d}"
-    return None
+# alias comparés sous la même forme que les cellules (sans accents)
+_HEADER_LOOKUP: Dict[str, str] = {_header_key(k): v for k, v in HEADER_ALIASES.items()}
 
-def _parse_date(s: str) -> Optional[str]:
-    if s is None:
+def _norm_header(cell: str) -> Optional[str]:
+    if cell is None:
         return None
-    s = str(s).strip()
-    for fmt in DATE_PATTERNS:
-        try:
-            return datetime.strptime(s, fmt).date().isoformat()
-        except Exception:
-            pass
-    # 01-08-2025
-    s2 = s.replace(".", "/").replace("-", "/")
-    for fmt in DATE_PATTERNS:
-        try:
-            return datetime.strptime(s2, fmt).date().isoformat()
-        except Exception:
-            pass
-    return None
+    return _HEADER_LOOKUP.get(_header_key(cell))
 
 def _parse_break_minutes(s: str) -> int:
     if s is None or str(s).strip() == "":
@@ -84,61 +84,552 @@ def _parse_break_minutes(s: str) -> int:
         return int(m.group(1))
     return 0
 
-def extract_rows_from_pdf(path: Path) -> List[dict]:
-    """Lit les tableaux d'un PDF et renvoie une liste de dict normalisés."""
-    rows: List[dict] = []
-    with pdfplumber.open(str(path)) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables({
-                "vertical_strategy": "lines",
-                "horizontal_strategy": "lines",
-                "intersection_x_tolerance": 3,
-                "intersection_y_tolerance": 3,
-                "text_tolerance": 3,
-            }) or []
-            for tbl in tables:
-                if not tbl or len(tbl) < 2:
-                    continue
-                header = tbl[0]
-                mapping: Dict[int, str] = {}
-                for idx, cell in enumerate(header):
-                    norm = _norm_header(cell)
-                    if norm:
-                        mapping[idx] = norm
-                if not mapping:
-                    continue  # table non reconnue
-
-                for r in tbl[1:]:
-                    rec: Dict[str, Optional[str]] = {}
-                    for i, v in enumerate(r):
-                        key = mapping.get(i)
-                        if not key:
+class _RowNormalizer:
+    """
+    Dates / heures converties par colonne (cf. column_formats), format déduit une fois par PDF.
+    `table` (optionnel) reçoit aussi les vacations en colonnes compactes (stockage du cache).
+    """
+
+    def __init__(self, table: Optional[ShiftTable] = None) -> None:
+        self.dates, self.starts, self.ends = ColumnParser("date"), ColumnParser("time"), ColumnParser("time")
+        self.table = table
+
+    @property
+    def slow(self) -> int:
+        return self.dates.slow + self.starts.slow + self.ends.slow
+
+    def normalize(self, records: List[Dict[str, Optional[str]]]) -> List[dict]:
+        """Lignes normalisées ; lignes incomplètes écartées."""
+        if not records:
+            return []
+        day, ok = self.dates.parse([r.get("date") for r in records])
+        st, ok_st = self.starts.parse([r.get("start_time") for r in records])
+        en, ok_en = self.ends.parse([r.get("end_time") for r in records])
+        ok &= ok_st & ok_en
+        keep = [i for i in range(len(records)) if ok[i] and (records[i].get("agent_id") or "").strip()]
+        iso = days_to_iso(day[keep]).tolist()
+        st_txt = minutes_to_hhmm(st[keep])
+        en_txt = minutes_to_hhmm(en[keep])
+        rows = [
+            {
+                "agent_id": records[i]["agent_id"].strip(),
+                "date": d,
+                "start_time": a,
+                "end_time": b,
+                "break_minutes": _parse_break_minutes(records[i].get("break_minutes")),
+            }
+            for i, d, a, b in zip(keep, iso, st_txt, en_txt)
+        ]
+        if self.table is not None:
+            for r, d, a, b in zip(rows, day[keep].tolist(), st[keep].tolist(), en[keep].tolist()):
+                self.table.append(r["agent_id"], d, a, b, r["break_minutes"])
+        return rows
+
+Table = List[List[Optional[str]]]
+# Gabarit verrouillé : bornes x des colonnes du tableau reconnu (de gauche à droite)
+Layout = List[float]
+
+LAYOUT_SCAN_PAGES = 5
+_SNAP = 3.0               # tolérance (pt) : regroupement des traits / espace entre mots
+_MIN_RULE_COVERAGE = 0.9  # part de la largeur du tableau couverte par un trait de ligne
+
+def _row_boundaries(page, layout: Layout) -> List[float]:
+    """Ordonnées des traits horizontaux qui traversent le tableau verrouillé."""
+    x0, x1 = layout[0], layout[-1]
+    covered: Dict[float, float] = {}
+    for e in page.horizontal_edges:
+        lo, hi = max(e["x0"], x0), min(e["x1"], x1)
+        if hi > lo:
+            y = round(e["top"] / _SNAP) * _SNAP
+            covered[y] = covered.get(y, 0.0) + (hi - lo)
+    width = x1 - x0
+    return sorted(y for y, w in covered.items() if w >= _MIN_RULE_COVERAGE * width)
+
+def _layout_matches(page, layout: Layout, top: float, bottom: float) -> bool:
+    """
+    Les traits verticaux du tableau de la page (entre `top` et `bottom`) tombent sur les
+    bornes verrouillées, à _SNAP près, et aucun trait n'ajoute de colonne entre elles.
+    """
+    x0, x1 = layout[0] - _SNAP, layout[-1] + _SNAP
+    xs = [e["x0"] for e in page.vertical_edges
+          if e["top"] < bottom and e["bottom"] > top and x0 <= e["x0"] <= x1]
+    if any(min(abs(x - b) for b in layout) > _SNAP for x in xs):
+        return False
+    return all(any(abs(x - b) <= _SNAP for x in xs) for b in layout)
+
+def _cell_text(chars: List[dict]) -> str:
+    """Texte d'une cellule : lignes par ordonnée, espace quand l'écart dépasse _SNAP."""
+    lines: List[List[dict]] = []
+    for ch in sorted(chars, key=lambda c: (round(c["top"] / _SNAP), c["x0"])):
+        if lines and abs(ch["top"] - lines[-1][0]["top"]) <= _SNAP:
+            lines[-1].append(ch)
+        else:
+            lines.append([ch])
+    out = []
+    for line in lines:
+        txt, prev = "", None
+        for ch in line:
+            if prev is not None and ch["x0"] - prev["x1"] > _SNAP:
+                txt += " "
+            txt += ch["text"]
+            prev = ch
+        out.append(txt)
+    return "\n".join(out)
+
+def _locked_page_table(page, layout: Layout) -> Optional[Table]:
+    """
+    Tableau d'une page au gabarit connu, sans détection de géométrie : colonnes =
+    bornes verrouillées, lignes = traits horizontaux traversant le tableau, chaque
+    caractère rangé dans sa cellule par dichotomie. None si la page ne s'y prête pas
+    (moins de deux traits de ligne, ou colonnes qui ne suivent pas le gabarit).
+    """
+    ys = _row_boundaries(page, layout)
+    if len(ys) < 2 or not _layout_matches(page, layout, ys[0], ys[-1]):
+        return None
+    n_cols = len(layout) - 1
+    cells: List[List[List[dict]]] = [[[] for _ in range(n_cols)] for _ in range(len(ys) - 1)]
+    for ch in page.chars:
+        cx = (ch["x0"] + ch["x1"]) / 2
+        cy = (ch["top"] + ch["bottom"]) / 2
+        if not (layout[0] <= cx <= layout[-1] and ys[0] <= cy <= ys[-1]) or not ch["text"].strip():
+            continue
+        r = min(bisect_right(ys, cy) - 1, len(ys) - 2)
+        c = min(bisect_right(layout, cx) - 1, n_cols - 1)
+        cells[r][c].append(ch)
+    return [[_cell_text(cell) for cell in row] for row in cells]
+
+def _page_tables(page, layout: Optional[Layout] = None) -> Optional[List[Table]]:
+    """
+    Tableaux d'une page ; gabarit verrouillé si fourni, sinon (ou à défaut) détection complète.
+    None pour une page scannée (images sans couche texte) : à passer à l'OCR.
+    """
+    if not page.chars and page.images:
+        return None
+    if layout is not None:
+        table = _locked_page_table(page, layout)
+        if table is not None:
+            return [table]
+    return page.extract_tables(TABLE_SETTINGS) or []
+
+def _detect_layout(pdf) -> Optional[Layout]:
+    """
+    Bornes x des colonnes du premier tableau dont l'en-tête est reconnu (premières pages).
+    Pages non libérées ici : leur lecture qui suit réutilise l'analyse.
+    """
+    for page in pdf.pages[:LAYOUT_SCAN_PAGES]:
+        for tbl in page.find_tables(TABLE_SETTINGS):
+            if not tbl.rows:
+                continue
+            cells = [c for c in tbl.rows[0].cells if c]
+            header = tbl.extract()[0]
+            if not any(_norm_header(c) for c in header):
+                continue
+            xs = sorted({round(c[0], 2) for c in cells} | {round(c[2], 2) for c in cells})
+            return xs if len(xs) == len(header) + 1 else None
+    return None
+
+class PdfTooLarge(ValueError):
+    """PDF au-delà de PDF_MAX_PAGES ou de PDF_MAX_RSS_MB (croissance mémoire d'un worker) : lecture abandonnée proprement."""
+
+def _rss_mb() -> Optional[float]:
+    """Mémoire résidente actuelle du processus (Linux), None si indisponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _check_rss(page_no: int, limit_mb: int, baseline_mb: Optional[float]) -> None:
+    """
+    Croissance de la mémoire résidente depuis l'ouverture du lecteur. Mesurée dans les
+    workers seulement (cf. _PageReader) : un worker ne lit que ce PDF, alors que le
+    processus serveur grossit aussi des autres requêtes (XLSX, OCR...) en cours.
+    """
+    if limit_mb <= 0 or baseline_mb is None:
+        return
+    rss = _rss_mb()
+    if rss is not None and rss - baseline_mb > limit_mb:
+        raise PdfTooLarge(
+            f"Lecture du PDF interrompue page {page_no + 1} : +{rss - baseline_mb:.0f} Mo de mémoire dans le worker > {limit_mb} Mo "
+            "(PDF_MAX_RSS_MB). Découpez le fichier ou exportez-le en CSV/XLSX."
+        )
+
+def _release(page) -> None:
+    """Libère les objets analysés de la page : pdfplumber les garde sinon jusqu'à la fermeture du PDF."""
+    page.close()
+
+# --- grille de texte pdfium ---
+# Grille attendue : (nb de colonnes, index des colonnes obligatoires), relevée sur l'en-tête
+Grid = Tuple[int, Tuple[int, ...]]
+_REQUIRED_FIELDS = ("agent_id", "date", "start_time", "end_time")
+
+def _pdfium_words(page) -> List[Word]:
+    """Segments de texte de la page avec leurs boîtes (origine en haut à gauche, comme l'OCR)."""
+    height = page.get_height()
+    textpage = page.get_textpage()
+    try:
+        words: List[Word] = []
+        for j in range(textpage.count_rects()):
+            x0, bottom, x1, top = textpage.get_rect(j)
+            text = textpage.get_text_bounded(x0, bottom, x1, top).strip()
+            if text:
+                words.append((text, x0, height - top, x1, height - bottom))
+        return words
+    finally:
+        textpage.close()
+
+def _text_grid_table(doc, i: int) -> Table:
+    """Tableau d'une page reconstruit à partir de la seule couche texte (lignes / colonnes par positions)."""
+    page = doc[i]
+    try:
+        return words_to_table(_pdfium_words(page), _norm_header)
+    finally:
+        page.close()
+
+def _detect_grid(doc) -> Optional[Grid]:
+    """Grille du premier tableau dont l'en-tête contient tous les champs obligatoires (premières pages)."""
+    for i in range(min(LAYOUT_SCAN_PAGES, len(doc))):
+        table = _text_grid_table(doc, i)
+        if not table:
+            continue
+        fields = {_norm_header(c): idx for idx, c in enumerate(table[0])}
+        if all(f in fields for f in _REQUIRED_FIELDS):
+            return len(table[0]), tuple(sorted(fields[f] for f in _REQUIRED_FIELDS))
+    return None
+
+def _grid_confidence(table: Table, grid: Grid) -> float:
+    """
+    Part des lignes du tableau dont toutes les colonnes obligatoires sont remplies ;
+    0 si le nombre de colonnes diffère de la grille (colonnes fusionnées ou décalées).
+    """
+    width, required = grid
+    if not table or len(table[0]) != width:
+        return 0.0
+    body = table[1:] if any(_norm_header(c) for c in table[0]) else table
+    if not body:
+        return 1.0
+    return sum(all(row[c] for c in required) for row in body) / len(body)
+
+class _PageReader:
+    """
+    Lecture page à page d'un PDF :
+    - grille de texte pdfium d'abord (positions du texte, sans géométrie du tableau) ;
+    - pdfplumber (traits du tableau, gabarit verrouillé si connu) quand la grille est
+      absente ou que sa confiance est sous PDF_TEXT_GRID_MIN_CONFIDENCE.
+    Le document pdfplumber n'est ouvert qu'au premier repli. `read` renvoie aussi le
+    moteur utilisé et sa durée.
+    """
+
+    def __init__(self, path: str, grid: Optional[Grid] = None, layout: Optional[Layout] = None) -> None:
+        S = get_settings()
+        self.path = path
+        self.grid = grid
+        self.layout = layout
+        self.min_confidence = S.PDF_TEXT_GRID_MIN_CONFIDENCE
+        self.max_rss_mb = S.PDF_MAX_RSS_MB
+        # garde-fou mémoire dans un worker seulement (cf. _check_rss)
+        self.baseline_mb = _rss_mb() if self.max_rss_mb > 0 and in_worker_process() else None
+        self.doc = pdfium.PdfDocument(path) if pdfium is not None and S.PDF_TEXT_GRID else None
+        self._plumber = None
+
+    @property
+    def plumber(self):
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.path)
+        return self._plumber
+
+    @property
+    def n_pages(self) -> int:
+        return len(self.doc) if self.doc is not None else len(self.plumber.pages)
+
+    def read(self, i: int) -> Tuple[Optional[List[Table]], str, float]:
+        # garde-fou mémoire après une lecture réussie : une erreur d'analyse remonte telle quelle
+        read = self._read(i)
+        _check_rss(i, self.max_rss_mb, self.baseline_mb)
+        return read
+
+    def _read(self, i: int) -> Tuple[Optional[List[Table]], str, float]:
+        t0 = time.perf_counter()
+        if self.doc is not None and self.grid is not None:
+            table = _text_grid_table(self.doc, i)
+            if table and _grid_confidence(table, self.grid) >= self.min_confidence:
+                return [table], "pdfium", time.perf_counter() - t0
+        page = self.plumber.pages[i]
+        try:
+            return _page_tables(page, self.layout), "pdfplumber", time.perf_counter() - t0
+        finally:
+            _release(page)
+
+    def close(self) -> None:
+        if self.doc is not None:
+            self.doc.close()
+        if self._plumber is not None:
+            self._plumber.close()
+
+    def __enter__(self) -> "_PageReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+PageRead = Tuple[Optional[List[Table]], str, float]
+
+def _extract_page_range(path: str, start: int, stop: int, grid: Optional[Grid] = None,
+                        layout: Optional[Layout] = None) -> List[PageRead]:
+    """Tâche d'un worker : ouvre le PDF lui-même et lit les pages [start, stop)."""
+    with _PageReader(path, grid, layout) as reader:
+        return [reader.read(i) for i in range(start, stop)]
+
+def _iter_page_tables(
+    path: Path,
+    workers: Optional[int],
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Optional[List[Table]]]:
+    """
+    Tableaux page par page, dans l'ordre des pages ; chaque page est libérée après lecture.
+    - PDF_TEXT_GRID : grille de texte pdfium (cf. _PageReader), repli pdfplumber page par page
+    - PDF_HEADER_LOCK : sans grille pdfium, gabarit des colonnes relevé une fois
+      (cf. _detect_layout) puis réutilisé sur chaque page
+    - au-delà de PDF_PAGES_PER_CHUNK pages, les pages sont réparties par plages
+      entre PDF_PAGE_WORKERS processus (réservés sur le budget WORK_PROCESSES, cf.
+      core.executor) ; au plus 2 plages d'avance par worker, rendues dans l'ordre
+    - PDF_MAX_PAGES / PDF_MAX_RSS_MB : PdfTooLarge plutôt qu'un OOM ; à la première
+      erreur d'une plage, les plages pas encore commencées sont annulées
+    - stats : pages et durée (ms) par moteur, "pdf_pages_<moteur>" / "pdf_ms_<moteur>"
+    """
+    S = get_settings()
+    chunk = max(1, S.PDF_PAGES_PER_CHUNK)
+    seconds: Dict[str, float] = {}
+
+    def tally(read: PageRead) -> Optional[List[Table]]:
+        tables, backend, elapsed = read
+        if tables is not None:  # page scannée : comptée par l'OCR
+            _add_stats(stats, {f"pdf_pages_{backend}": 1})
+            seconds[backend] = seconds.get(backend, 0.0) + elapsed
+        return tables
+
+    try:
+        with _PageReader(str(path)) as reader:
+            n_pages = reader.n_pages
+            if S.PDF_MAX_PAGES > 0 and n_pages > S.PDF_MAX_PAGES:
+                raise PdfTooLarge(f"PDF de {n_pages} pages > {S.PDF_MAX_PAGES} pages autorisées (PDF_MAX_PAGES).")
+            if reader.doc is not None:
+                reader.grid = _detect_grid(reader.doc)
+            if reader.grid is None and S.PDF_HEADER_LOCK and n_pages > 1:
+                reader.layout = _detect_layout(reader.plumber)
+            grid, layout = reader.grid, reader.layout
+            workers = workers if workers is not None else (S.PDF_PAGE_WORKERS or os.cpu_count() or 1)
+            budget = get_process_budget()
+            workers = budget.acquire(min(workers, -(-n_pages // chunk)))
+            if not workers:
+                for i in range(n_pages):
+                    yield tally(reader.read(i))
+                return
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=no_worker_processes) as ex:
+                pending: deque = deque()
+                try:
+                    for i in range(0, n_pages, chunk):
+                        pending.append(ex.submit(_extract_page_range, str(path), i, min(i + chunk, n_pages), grid, layout))
+                        if len(pending) < 2 * workers:
                             continue
-                        val = (v or "").strip() if isinstance(v, str) else v
-                        rec[key] = val
-
-                    agent = (rec.get("agent_id") or "").strip()
-                    date = _parse_date(rec.get("date"))
-                    st = _parse_time(rec.get("start_time"))
-                    en = _parse_time(rec.get("end_time"))
-                    br = _parse_break_minutes(rec.get("break_minutes"))
-
-                    if agent and date and st and en is not None:
-                        rows.append({
-                            "agent_id": agent,
-                            "date": date,
-                            "start_time": st,
-                            "end_time": en,
-                            "break_minutes": br,
-                        })
-    return rows
+                        for read in pending.popleft().result():
+                            yield tally(read)
+                    while pending:
+                        for read in pending.popleft().result():
+                            yield tally(read)
+                except BaseException:
+                    # PdfTooLarge, erreur d'analyse ou lecture abandonnée par l'appelant :
+                    # seules les plages déjà commencées sont attendues
+                    ex.shutdown(cancel_futures=True)
+                    raise
+        finally:
+            budget.release(workers)
+    finally:
+        _add_stats(stats, {f"pdf_ms_{b}": round(t * 1000) for b, t in seconds.items()})
 
-def parse_pdf_schedules(paths: Iterable[Path]) -> List[dict]:
-    out: List[dict] = []
+def _page_records(pages: Iterable[List[Table]]) -> Iterator[List[Dict[str, Optional[str]]]]:
+    """
+    Lignes brutes {champ: cellule} des tableaux reconnus, page par page.
+    Un tableau sans en-tête reconnu en tête de page, de même largeur que le dernier
+    tableau reconnu, est la suite de celui-ci (en-tête non répété) : même mapping.
+    """
+    carried: Optional[Dict[int, str]] = None
+    carried_width = 0
+    for tables in pages:
+        records: List[Dict[str, Optional[str]]] = []
+        for pos, tbl in enumerate(tables):
+            if not tbl:
+                continue
+            header = tbl[0]
+            mapping: Dict[int, str] = {}
+            for idx, cell in enumerate(header):
+                norm = _norm_header(cell)
+                if norm:
+                    mapping[idx] = norm
+            if mapping:
+                body = tbl[1:]
+                carried, carried_width = mapping, len(header)
+            elif pos == 0 and carried is not None and len(header) == carried_width:
+                mapping, body = carried, tbl
+            else:
+                carried = None
+                continue  # table non reconnue
+
+            for r in body:
+                rec: Dict[str, Optional[str]] = {}
+                for i, v in enumerate(r):
+                    key = mapping.get(i)
+                    if not key:
+                        continue
+                    val = (v or "").strip() if isinstance(v, str) else v
+                    rec[key] = val
+                records.append(rec)
+        yield records
+
+def _with_ocr(
+    source,
+    pages: Iterable[Optional[List[Table]]],
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[List[Table]]:
+    """
+    Pages dans l'ordre, les pages scannées (None) remplacées par les tableaux OCR.
+    Les pages scannées sont regroupées par lots (OCR en parallèle) ; seules les
+    pages en attente d'un lot restent en mémoire. stats : "pdf_pages_ocr" / "pdf_ms_ocr".
+    """
+    S = get_settings()
+    use_ocr = S.OCR_ENABLED and ocr_available()
+    batch = max(1, 2 * (S.OCR_WORKERS or os.cpu_count() or 1))
+    buffer: List[Tuple[int, Optional[List[Table]]]] = []
+    seen_text = False
+
+    def flush() -> Iterator[List[Table]]:
+        scanned = [i for i, t in buffer if t is None]
+        words = {}
+        if scanned and use_ocr:
+            t0 = time.perf_counter()
+            words = ocr_page_words(source, scanned)
+            _add_stats(stats, {"pdf_pages_ocr": len(scanned), "pdf_ms_ocr": round((time.perf_counter() - t0) * 1000)})
+        for i, tables in buffer:
+            if tables is None:
+                table = words_to_table(words.get(i) or [], _norm_header)
+                tables = [table] if table else []
+            yield tables
+        buffer.clear()
+
+    for i, tables in enumerate(pages):
+        seen_text = seen_text or tables is not None
+        if tables is None and not use_ocr:
+            tables = []
+        if tables is not None and not buffer:
+            yield tables
+            continue
+        buffer.append((i, tables))
+        if sum(t is None for _, t in buffer) >= batch:
+            yield from flush()
+    yield from flush()
+    if not seen_text and not use_ocr:
+        raise ValueError("PDF scanné sans couche texte : OCR indisponible (pypdfium2 / tesseract).")
+
+def iter_rows_from_pdf(
+    path: Path,
+    stats: Optional[Dict[str, int]] = None,
+    workers: Optional[int] = None,
+    cache: bool = True,
+) -> Iterator[dict]:
+    """
+    Lit les tableaux d'un PDF et produit les lignes normalisées page par page,
+    sans garder les pages déjà lues en mémoire.
+    - stats : reçoit "slow_path_cells" (cellules date/heure converties une à une) et,
+      par moteur (pdfium / pdfplumber / ocr), les pages lues et leur durée (cf. pdf_backends)
+    - workers : processus pour les pages (défaut Settings.PDF_PAGE_WORKERS, 1 = séquentiel)
+    Les pages scannées passent par l'OCR (cf. pdf_ocr). Une fois le PDF lu en entier,
+    les lignes sont mises en cache par sha256 du PDF + PDF_PARSER_VERSION (avec les
+    pages par moteur, sans les durées).
+    - cache=False : ni lecture ni écriture du cache pdf, l'appelant s'en charge
+      (cf. schedule_checker : lecture en worker, cache tenu par le processus parent)
+    """
+    path = Path(path)
+    store = ResultCache.from_settings() if cache else None
+    digest = file_digest(path) if store is not None else None
+    if digest is not None:
+        hit = store.load_pdf_rows(digest, PDF_PARSER_VERSION)
+        if hit is not None:
+            table, file_stats = hit
+            _add_stats(stats, file_stats)
+            yield from _rows_from_table(table)
+            return
+
+    file_stats: Dict[str, int] = {}
+    normalizer = _RowNormalizer(ShiftTable() if digest is not None else None)
+    try:
+        pages = _with_ocr(path, _iter_page_tables(path, workers, file_stats), file_stats)
+        for records in _page_records(pages):
+            yield from normalizer.normalize(records)
+    finally:
+        file_stats["slow_path_cells"] = normalizer.slow
+        _add_stats(stats, file_stats)
+    if digest is not None:
+        kept = {k: v for k, v in file_stats.items() if not k.startswith("pdf_ms_")}
+        store.store_pdf_rows(digest, PDF_PARSER_VERSION, normalizer.table, kept)
+
+def extract_rows_from_pdf(
+    path: Path,
+    stats: Optional[Dict[str, int]] = None,
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """Version liste de iter_rows_from_pdf."""
+    return list(iter_rows_from_pdf(path, stats, workers))
+
+def rows_from_tables(pages: Iterable[List[Table]]) -> Iterator[dict]:
+    """
+    Lignes normalisées de tableaux déjà extraits (page par page), avec les mêmes
+    règles d'en-tête et de conversion que iter_rows_from_pdf.
+    """
+    normalizer = _RowNormalizer()
+    for records in _page_records(pages):
+        yield from normalizer.normalize(records)
+
+def table_from_words(words: List[Word]) -> Table:
+    """Tableau d'une page à partir de ses mots OCR, en-tête reconnu par la table d'alias."""
+    return words_to_table(words, _norm_header)
+
+def _add_stats(stats: Optional[Dict[str, int]], file_stats: Dict[str, int]) -> None:
+    if stats is not None:
+        for k, v in file_stats.items():
+            stats[k] = stats.get(k, 0) + v
+
+def pdf_backends(stats: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    """{moteur: {"pages": n, "ms": durée}} à partir des compteurs de lecture ; vide sans PDF lu."""
+    out: Dict[str, Dict[str, int]] = {}
+    for backend in ("pdfium", "pdfplumber", "ocr"):
+        pages = stats.get(f"pdf_pages_{backend}", 0)
+        if pages:
+            out[backend] = {"pages": pages, "ms": stats.get(f"pdf_ms_{backend}", 0)}
+    return out
+
+def _rows_from_table(table: ShiftTable) -> List[dict]:
+    agents = table.agents
+    return [
+        {"agent_id": agents[a], "date": d, "start_time": st, "end_time": en, "break_minutes": b}
+        for a, d, st, en, b in zip(
+            table.agent.tolist(),
+            days_to_iso(table.day).tolist(),
+            minutes_to_hhmm(table.start),
+            minutes_to_hhmm(table.end),
+            table.break_min.tolist(),
+        )
+    ]
+
+def iter_pdf_schedules(paths: Iterable[Path]) -> Iterator[dict]:
+    """Version flux de parse_pdf_schedules : un PDF à la fois."""
     for p in paths:
         try:
-            out.extend(extract_rows_from_pdf(Path(p)))
+            yield from iter_rows_from_pdf(Path(p))
         except Exception:
             # On ignore les PDF illisibles; ils seront comptés ailleurs
             continue
-    return out
+
+def parse_pdf_schedules(paths: Iterable[Path]) -> List[dict]:
+    return list(iter_pdf_schedules(paths))
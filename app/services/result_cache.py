@@ -0,0 +1,315 @@
+# app/services/result_cache.py
+"""
+Cache sur disque des contrôles de plannings, par contenu (sha256) et non par nom.
+
+Quatre niveaux, stockés séparément sous SCHEDULE_CACHE_DIR :
+- rows/<sha256 du fichier>-n<version de normalisation>.npz : vacations
+  normalisées d'un fichier CSV/XLSX (colonnes ShiftTable) + compteurs de lecture ;
+  indépendant des seuils, donc réutilisé quand un seuil change.
+- pdf/<sha256>-v<version du parseur>-n<version de normalisation>.npz : lignes
+  extraites d'un PDF, même format colonnes ; une nouvelle version du parseur ou de
+  la normalisation invalide les anciennes.
+- ocr/<empreinte de page>.json : mots OCR d'une page scannée (cf. pdf_ocr).
+- results/<clé>.json : SchedulesCheckResult final ; la clé combine les sha256
+  des fichiers (dans l'ordre), le moteur, les seuils actifs de Settings et les
+  versions du parseur PDF et de la normalisation (une montée de version donne
+  un nouveau résultat, pas l'ancien en cache).
+
+Éviction LRU sur la taille totale (SCHEDULE_CACHE_MAX_BYTES, 0 = cache désactivé) :
+chaque lecture rafraîchit la date de modification du fichier, les plus anciens
+sont supprimés en premier. Le total est tenu à jour à chaque écriture (un seul
+parcours du répertoire par processus) ; le parcours complet n'a lieu que lorsque
+le total dépasse la limite. Succès / échecs par niveau comptés pour le processus
+(cf. cache_stats) ; les workers de lecture renvoient leurs écarts de compteurs
+(cf. counters_since / add_counters) et héritent du total relevé avant le fork.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..models.schemas import SchedulesCheckResult
+from .column_formats import NORMALIZER_VERSION
+from .schedule_engine import thresholds
+from .shift_table import ShiftTable
+
+CACHE_VERSION = 1
+_HASH_BLOCK = 1 << 20
+_COLUMNS = ("agent", "day", "start", "end", "break_min")
+LEVELS = ("rows", "pdf", "ocr", "results")
+_COUNTERS: Dict[str, Dict[str, int]] = {lvl: {"hits": 0, "misses": 0} for lvl in LEVELS}
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+_DIGESTS_MAX = 4096
+# octets en cache par répertoire racine, tenus à jour par les écritures du processus
+_TOTALS: Dict[str, int] = {}
+_TOTALS_LOCK = threading.Lock()
+
+
+def file_digest(path: Path) -> str:
+    """sha256 du contenu ; mémorisé par (chemin, taille, mtime) pour ne hacher qu'une fois par requête."""
+    st = os.stat(path)
+    memo = (str(path), st.st_size, st.st_mtime_ns)
+    digest = _DIGESTS.get(memo)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        if len(_DIGESTS) >= _DIGESTS_MAX:
+            _DIGESTS.clear()
+        _DIGESTS[memo] = digest
+    return digest
+
+
+class ResultCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._rows = self.root / "rows"
+        self._pdf = self.root / "pdf"
+        self._ocr = self.root / "ocr"
+        self._results = self.root / "results"
+
+    @classmethod
+    def from_settings(cls, S=None) -> Optional["ResultCache"]:
+        """None si le cache est désactivé (SCHEDULE_CACHE_MAX_BYTES <= 0)."""
+        S = S or get_settings()
+        if S.SCHEDULE_CACHE_MAX_BYTES <= 0:
+            return None
+        return cls(Path(S.SCHEDULE_CACHE_DIR), S.SCHEDULE_CACHE_MAX_BYTES)
+
+    # --- clés ---
+    @staticmethod
+    def result_key(digests: Iterable[str], engine: str, S) -> str:
+        from .pdf_schedule_parser import PDF_PARSER_VERSION  # import ici : le parseur importe ce module
+
+        payload = json.dumps(
+            {
+                "v": CACHE_VERSION, "files": list(digests), "engine": engine, "thresholds": thresholds(S),
+                "pdf_parser": PDF_PARSER_VERSION, "normalizer": NORMALIZER_VERSION,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # --- vacations par fichier ---
+    def _load_table(self, level: str, path: Path) -> Optional[Tuple[ShiftTable, Dict[str, int]]]:
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                table = ShiftTable.from_arrays(z["agents"].tolist(), **{c: z[c] for c in _COLUMNS})
+                stats = json.loads(str(z["stats"]))
+        except (OSError, KeyError, ValueError):
+            _count(level, hit=False)
+            return None
+        _count(level, hit=True)
+        self._touch(path)
+        return table, stats
+
+    def _store_table(self, path: Path, table: ShiftTable, stats: Dict[str, int]) -> None:
+        arrays = {c: table.column(c) for c in _COLUMNS}
+        self._write(
+            path,
+            lambda f: np.savez(f, agents=np.array(table.agents, dtype=str), stats=json.dumps(stats), **arrays),
+        )
+
+    def _rows_path(self, digest: str) -> Path:
+        return self._rows / f"{digest}-n{NORMALIZER_VERSION}.npz"
+
+    def _pdf_path(self, digest: str, version: int) -> Path:
+        return self._pdf / f"{digest}-v{version}-n{NORMALIZER_VERSION}.npz"
+
+    def load_rows(self, digest: str) -> Optional[Tuple[ShiftTable, Dict[str, int]]]:
+        return self._load_table("rows", self._rows_path(digest))
+
+    def store_rows(self, digest: str, table: ShiftTable, stats: Dict[str, int]) -> None:
+        self._store_table(self._rows_path(digest), table, stats)
+
+    def load_pdf_rows(self, digest: str, version: int) -> Optional[Tuple[ShiftTable, Dict[str, int]]]:
+        return self._load_table("pdf", self._pdf_path(digest, version))
+
+    def store_pdf_rows(self, digest: str, version: int, table: ShiftTable, stats: Dict[str, int]) -> None:
+        self._store_table(self._pdf_path(digest, version), table, stats)
+
+    # --- OCR par page ---
+    def load_ocr(self, page_key: str) -> Optional[list]:
+        path = self._ocr / f"{page_key}.json"
+        try:
+            words = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            _count("ocr", hit=False)
+            return None
+        _count("ocr", hit=True)
+        self._touch(path)
+        return words
+
+    def store_ocr(self, page_key: str, words: list) -> None:
+        data = json.dumps(words).encode("utf-8")
+        self._write(self._ocr / f"{page_key}.json", lambda f: f.write(data))
+
+    # --- résultats ---
+    def load_result(self, key: str) -> Optional[SchedulesCheckResult]:
+        path = self._results / f"{key}.json"
+        try:
+            res = SchedulesCheckResult.model_validate_json(path.read_bytes())
+        except (OSError, ValueError):
+            _count("results", hit=False)
+            return None
+        _count("results", hit=True)
+        self._touch(path)
+        return res
+
+    def store_result(self, key: str, result: SchedulesCheckResult) -> None:
+        data = result.model_dump_json().encode("utf-8")
+        self._write(self._results / f"{key}.json", lambda f: f.write(data))
+
+    # --- disque ---
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path: Path, dump: Callable) -> None:
+        """
+        Écriture atomique ; un cache inutilisable n'interrompt pas le contrôle.
+        Éviction seulement si le total tenu à jour dépasse max_bytes.
+        """
+        self._total()  # 1er accès du processus : total relevé avant l'écriture
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    dump(f)
+                size = os.path.getsize(tmp)
+                try:
+                    replaced = path.stat().st_size
+                except OSError:
+                    replaced = 0
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        except OSError:
+            return
+        if self._total(size - replaced) > self.max_bytes:
+            self.evict()
+
+    def total_bytes(self) -> int:
+        """Octets en cache tenus à jour pour ce processus (relevés une fois au premier appel)."""
+        return self._total()
+
+    def _total(self, delta: int = 0) -> int:
+        key = str(self.root)
+        with _TOTALS_LOCK:
+            if key not in _TOTALS:
+                _TOTALS[key] = sum(size for _, size, _ in self._entries())
+            _TOTALS[key] += delta
+            return _TOTALS[key]
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        out = []
+        for d in (self._rows, self._pdf, self._ocr, self._results):
+            if not d.exists():
+                continue
+            for p in d.iterdir():
+                if p.suffix == ".tmp":
+                    continue
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def evict(self) -> int:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes ; renvoie les octets libérés."""
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            freed += size
+        with _TOTALS_LOCK:
+            _TOTALS[str(self.root)] = total  # recalé sur le disque (autres processus compris)
+        return freed
+
+    def stats(self) -> Dict[str, object]:
+        """Occupation disque (totale et par niveau) et succès / échecs du processus."""
+        entries = self._entries()
+        levels = {}
+        for lvl in LEVELS:
+            sizes = [size for _, size, p in entries if p.parent.name == lvl]
+            levels[lvl] = {**_COUNTERS[lvl], "entries": len(sizes), "bytes": sum(sizes)}
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "levels": levels,
+        }
+
+
+def _count(level: str, hit: bool) -> None:
+    _COUNTERS[level]["hits" if hit else "misses"] += 1
+
+
+def counters() -> Dict[str, Dict[str, int]]:
+    """Copie des compteurs succès / échecs du processus, par niveau."""
+    return {lvl: dict(c) for lvl, c in _COUNTERS.items()}
+
+
+def counters_since(before: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Écart des compteurs depuis `before` (relevé dans un worker, renvoyé au parent)."""
+    return {lvl: {k: v - before[lvl][k] for k, v in c.items()} for lvl, c in _COUNTERS.items()}
+
+
+def add_counters(delta: Dict[str, Dict[str, int]]) -> None:
+    for lvl, c in delta.items():
+        for k, v in c.items():
+            _COUNTERS[lvl][k] += v
+
+
+def cache_stats() -> Dict[str, object]:
+    """Statistiques du cache configuré ({"enabled": False} s'il est désactivé)."""
+    cache = ResultCache.from_settings()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def cached_check(
+    paths: Iterable[Path],
+    compute: Callable[[], SchedulesCheckResult],
+    engine: Optional[str] = None,
+) -> SchedulesCheckResult:
+    """
+    Résultat en cache pour ces fichiers (même contenu, mêmes seuils) ou `compute()`,
+    mémorisé ensuite. extras["cache"] : "hit" | "miss".
+    """
+    S = get_settings()
+    cache = ResultCache.from_settings(S)
+    if cache is None:
+        return compute()
+    key = cache.result_key((file_digest(Path(p)) for p in paths), (engine or S.SCHEDULE_ENGINE).lower(), S)
+    res = cache.load_result(key)
+    if res is not None:
+        res.extras["cache"] = "hit"
+        return res
+    res = compute()
+    if not res.extras.get("file_errors"):
+        # fichier en erreur (délai dépassé, worker tombé...) : peut-être passager, on ne fige pas
+        cache.store_result(key, res)
+    res.extras["cache"] = "miss"
+    return res
@@ -1,9 +1,18 @@
 # app/services/schedule_checker.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, List, Dict, Tuple
-from datetime import datetime, timedelta, date
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, date, time as dt_time
 import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import accumulate, chain, groupby, islice
+from operator import attrgetter, itemgetter
+
+import numpy as np
+import pandas as pd
 
 try:
     import openpyxl  # type: ignore
@@ -11,10 +20,18 @@ except Exception:
     openpyxl = None
 
 from ..core.config import get_settings
+from ..core.executor import get_process_budget, no_worker_processes
 from ..models.schemas import SchedulesCheckResult, ScheduleViolation, ScheduleStat
-from .pdf_schedule_parser import parse_pdf_schedules
+from .column_formats import ColumnParser
+from .external_sort import external_sort
+from .pdf_schedule_parser import PDF_PARSER_VERSION, iter_rows_from_pdf, pdf_backends
+from .result_cache import ResultCache, add_counters, counters, counters_since, file_digest
+from .schedule_engine import EPOCH_ORDINAL, evaluate as evaluate_numpy
+from .shift_table import Shift, ShiftTable
 
-TIME_FMT = "%H:%M"
+_SORT_KEY = itemgetter(0, 1, 2)  # (agent_id, day, start)
+XLSX_HEADER_SCAN_ROWS = 20
+NORMALIZE_CHUNK_ROWS = 8192
 
 ALIASES = {
     "agent_id": {"agent_id", "agent", "matricule", "id"},
@@ -24,6 +41,8 @@ ALIASES = {
     "break_minutes": {"break_minutes", "break", "pause", "pause_min", "pause (min)"},
 }
 
+REQUIRED_HEADERS = {"agent_id", "date", "start_time", "end_time"}
+
 def _norm_header(name: str) -> str:
     n = name.strip().lower().replace("é","e").replace("è","e").replace("ê","e").replace("’","'")
     for canon, al in ALIASES.items():
@@ -31,116 +50,327 @@ def _norm_header(name: str) -> str:
             return canon
     return name
 
-def _parse_time(s: str) -> datetime:
-    s = s.strip().lower().replace(" ", "").replace("h", ":").replace(".", ":")
-    hh, mm = s.split(":")
-    return datetime.strptime(f"{int(hh):02d}:{int(mm):02d}", TIME_FMT)
-
-def _parse_date(s: str) -> date:
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"):
-        try:
-            return datetime.strptime(s.strip(), fmt).date()
-        except Exception:
-            pass
-    s2 = s.replace(".", "/").replace("-", "/")
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"):
-        try:
-            return datetime.strptime(s2.strip(), fmt).date()
-        except Exception:
-            pass
-    raise ValueError(f"Date invalide: {s}")
-
 def _dur_minutes(start: datetime, end: datetime) -> int:
     # gestion nuit: fin < début => +24h
     if end <= start:
         end = end + timedelta(days=1)
     return int((end - start).total_seconds() // 60)
 
-def _read_csv(p: Path) -> List[Dict]:
-    rows: List[Dict] = []
+def _iter_csv(p: Path) -> Iterator[Dict]:
     with open(p, "r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         header = {k: _norm_header(k) for k in reader.fieldnames or []}
         for r in reader:
-            rec = {header.get(k, k): (r[k] if r.get(k) is not None else "") for k in r}
-            rows.append(rec)
-    return rows
+            yield {header.get(k, k): (r[k] if r.get(k) is not None else "") for k in r}
+
+def _cell_str(v) -> str:
+    """Valeur de cellule Excel -> texte attendu par le normaliseur."""
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.date().isoformat() if v.time() == dt_time(0) else v.strftime("%Y-%m-%d %H:%M")
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, dt_time):
+        return f"{v.hour:02d}:{v.minute:02d}"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def _find_header(rows: Iterator[tuple]) -> Optional[Dict[int, str]]:
+    """
+    Cherche la ligne d'en-têtes dans les premières lignes (titres, logos, dates d'édition...).
+    Renvoie {index colonne: nom canonique} ou None ; l'itérateur est positionné juste après.
+    """
+    for _, row in zip(range(XLSX_HEADER_SCAN_ROWS), rows):
+        header_map = {j: _norm_header(str(v)) for j, v in enumerate(row) if v is not None and str(v).strip()}
+        if REQUIRED_HEADERS <= set(header_map.values()):
+            return header_map
+    return None
 
-def _read_xlsx(p: Path) -> List[Dict]:
+def _iter_xlsx(p: Path) -> Iterator[Dict]:
+    """
+    Lecture en flux (read_only + iter_rows(values_only=True)), toutes les feuilles.
+    Chaque feuille a sa propre ligne d'en-têtes (souvent une feuille par mois) ;
+    les feuilles sans en-têtes reconnues (notes, légende) sont ignorées.
+    """
     if openpyxl is None:
-        return []
-    wb = openpyxl.load_workbook(p)
-    ws = wb.active
-    header_map: Dict[int, str] = {}
-    rows: List[Dict] = []
-    for j, cell in enumerate(ws[1], 1):
-        if cell.value:
-            header_map[j] = _norm_header(str(cell.value))
-    for i in range(2, ws.max_row + 1):
-        rec: Dict[str, str] = {}
-        for j in range(1, ws.max_column + 1):
-            key = header_map.get(j)
-            if not key:
+        return
+    wb = openpyxl.load_workbook(p, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header_map = _find_header(rows)
+            if header_map is None:
                 continue
-            val = ws.cell(row=i, column=j).value
-            rec[key] = str(val) if val is not None else ""
-        rows.append(rec)
-    return rows
-
-def _normalize_rows(raw: List[Dict]) -> List[Dict]:
-    out: List[Dict] = []
-    for r in raw:
-        try:
-            agent = (r.get("agent_id") or "").strip()
-            if not agent:
+            cols = [(j, k) for j, k in header_map.items() if k in ALIASES]
+            for row in rows:
+                if not any(v is not None for v in row):
+                    continue
+                n = len(row)
+                yield {k: (_cell_str(row[j]) if j < n else "") for j, k in cols}
+    finally:
+        wb.close()
+
+def _iter_file(p: Path, stats: Optional[Dict[str, int]] = None, pdf_workers: Optional[int] = None,
+               pdf_cache: bool = True) -> Iterator[Dict]:
+    """Lignes brutes d'un fichier ; les erreurs de lecture sont propagées."""
+    suf = p.suffix.lower()
+    if suf == ".pdf":
+        yield from iter_rows_from_pdf(p, stats, pdf_workers, cache=pdf_cache)
+    elif suf == ".csv":
+        yield from _iter_csv(p)
+    elif suf in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx(p)
+
+def _parse_file(path: str, pdf_cache: bool = False) -> Tuple[ShiftTable, Dict[str, int], Dict[str, Dict[str, int]]]:
+    """
+    Tâche d'un worker : lit et normalise un fichier complet (table compacte à renvoyer).
+    Les fichiers sont déjà répartis entre processus : pages PDF lues séquentiellement.
+    Cache pdf tenu par le parent (pdf_cache=False) ; les écarts des compteurs du cache
+    (OCR) sont renvoyés avec la table.
+    """
+    stats: Dict[str, int] = {}
+    before = counters()
+    table = ShiftTable.from_shifts(_iter_normalized(_iter_file(Path(path), stats, pdf_workers=1, pdf_cache=pdf_cache), stats))
+    return table, stats, counters_since(before)
+
+def _load_cached(cache: ResultCache, p: Path, digest: str) -> Optional[Tuple[ShiftTable, Dict[str, int]]]:
+    if p.suffix.lower() == ".pdf":
+        return cache.load_pdf_rows(digest, PDF_PARSER_VERSION)
+    return cache.load_rows(digest)
+
+def _store_cached(cache: ResultCache, p: Path, digest: str, table: ShiftTable, file_stats: Dict[str, int]) -> None:
+    if p.suffix.lower() == ".pdf":
+        # même contenu que iter_rows_from_pdf : pages par moteur, sans les durées
+        kept = {k: v for k, v in file_stats.items() if not k.startswith("pdf_ms_")}
+        cache.store_pdf_rows(digest, PDF_PARSER_VERSION, table, kept)
+    else:
+        cache.store_rows(digest, table, file_stats)
+
+def _file_error(p: Path, e: BaseException) -> Dict[str, str]:
+    return {"file": p.name, "error": f"{type(e).__name__}: {e}" if str(e) else type(e).__name__}
+
+def _add_stats(stats: Optional[Dict[str, int]], file_stats: Dict[str, int]) -> None:
+    if stats is not None:
+        for k, v in file_stats.items():
+            stats[k] = stats.get(k, 0) + v
+
+def _iter_ingested(paths: List[Path], S, errors: List[Dict[str, str]], stats: Optional[Dict[str, int]] = None) -> Iterator[Shift]:
+    """
+    Vacations normalisées de tous les fichiers, dans l'ordre des fichiers.
+    - fichier déjà lu (même sha256, cf. result_cache) : vacations relues du cache
+    - SCHEDULE_INGEST_WORKERS > 1 : autres fichiers lus en parallèle (multiprocessing.Pool,
+      workers réservés sur le budget WORK_PROCESSES, cf. core.executor),
+      au plus un fichier soumis par worker ; délai SCHEDULE_FILE_TIMEOUT_S par fichier compté
+      depuis sa soumission (= début de sa lecture) ; en cas de dépassement, pool arrêté
+      (Pool.terminate) et relancé pour les fichiers restants
+    - sinon lecture séquentielle en flux (les lignes lues avant une erreur sont gardées)
+    Un fichier illisible ou hors délai est signalé dans `errors`, pas ignoré ;
+    les compteurs de lecture (chemin lent...) sont cumulés dans `stats`.
+    """
+    cache = ResultCache.from_settings(S)
+    digests: Dict[Path, str] = {}
+    if cache is not None:
+        for p in paths:
+            try:
+                digests[p] = file_digest(p)
+            except OSError:
+                pass  # l'erreur sera signalée à la lecture
+    # cache lu et écrit ici, jamais dans les workers : compteurs et total du processus à jour
+    # (PDF : niveau pdf, versionné par le parseur ; autres fichiers : niveau rows)
+    cached: Dict[Path, Tuple[ShiftTable, Dict[str, int]]] = {}
+    for p, digest in digests.items():
+        hit = _load_cached(cache, p, digest)
+        if hit is not None:
+            cached[p] = hit
+    todo = [p for p in paths if p not in cached]
+
+    budget = get_process_budget()
+    workers = budget.acquire(min(S.SCHEDULE_INGEST_WORKERS or os.cpu_count() or 1, len(todo)))
+    if not workers:
+        for p in paths:
+            if p in cached:
+                table, file_stats = cached[p]
+                _add_stats(stats, file_stats)
+                yield from table
                 continue
-            d = _parse_date(r.get("date",""))
-            st = _parse_time(str(r.get("start_time","")))
-            en = _parse_time(str(r.get("end_time","")))
-            br = int(r.get("break_minutes") or 0)
-            out.append({
-                "agent_id": agent,
-                "date": d,
-                "start": st,
-                "end": en,
-                "break_min": br
-            })
-        except Exception:
-            continue
-    return out
-
-def _group_by_agent(rows: List[Dict]) -> Dict[str, List[Dict]]:
-    g: Dict[str, List[Dict]] = {}
-    for r in rows:
-        g.setdefault(r["agent_id"], []).append(r)
-    for a in g:
-        g[a].sort(key=lambda x: (x["date"], x["start"].time()))
-    return g
-
-def check_schedules(paths: Iterable[Path]) -> SchedulesCheckResult:
-    paths = [Path(p) for p in paths]
-    raw: List[Dict] = []
+            file_stats = {}
+            table = ShiftTable() if p in digests else None
+            try:
+                for sh in _iter_normalized(_iter_file(p, file_stats, pdf_cache=p not in digests), file_stats):
+                    if table is not None:
+                        table.append(*sh)
+                    yield sh
+            except Exception as e:
+                errors.append(_file_error(p, e))
+                table = None
+            _add_stats(stats, file_stats)
+            if table is not None:
+                _store_cached(cache, p, digests[p], table, file_stats)
+        return
 
-    # PDF
-    pdf_rows = parse_pdf_schedules([p for p in paths if p.suffix.lower() == ".pdf"])
-    raw.extend(pdf_rows)
+    if cache is not None:
+        cache.total_bytes()  # relevé avant le fork : les workers (OCR) en héritent
+    ctx = multiprocessing.get_context()
+    try:
+        pool = ctx.Pool(processes=workers, initializer=no_worker_processes)
+    except BaseException:
+        budget.release(workers)
+        raise
+    queue = iter(todo)
+    # au plus `workers` fichiers dans le pool : un fichier soumis est pris tout de suite
+    # par un worker, son délai ne compte pas l'attente derrière les autres
+    pending: deque = deque()  # (chemin, résultat, échéance) dans l'ordre de `todo`
 
-    # CSV / XLSX
-    for p in paths:
-        suf = p.suffix.lower()
-        if suf == ".csv":
-            raw.extend(_read_csv(p))
-        elif suf in (".xlsx", ".xlsm"):
-            raw.extend(_read_xlsx(p))
+    def submit(p: Path):
+        return p, pool.apply_async(_parse_file, (str(p), p not in digests)), time.monotonic() + S.SCHEDULE_FILE_TIMEOUT_S
 
-    rows = _normalize_rows(raw)
-    groups = _group_by_agent(rows)
+    def refill() -> None:
+        while len(pending) < workers:
+            p = next(queue, None)
+            if p is None:
+                return
+            pending.append(submit(p))
 
-    S = get_settings()
+    try:
+        refill()
+        for p in paths:
+            if p in cached:
+                table, file_stats = cached[p]
+                _add_stats(stats, file_stats)
+                yield from table
+                continue
+            _, res, deadline = pending.popleft()
+            try:
+                table, file_stats, counts = res.get(timeout=max(0.0, deadline - time.monotonic()))
+            except multiprocessing.TimeoutError:
+                errors.append({"file": p.name, "error": f"Délai dépassé ({S.SCHEDULE_FILE_TIMEOUT_S:g} s)"})
+                # le worker bloqué garderait sa place : pool relancé, fichiers inachevés resoumis
+                pool.terminate()
+                pool.join()
+                pool = ctx.Pool(processes=workers, initializer=no_worker_processes)
+                for k, (q, r, _) in enumerate(pending):
+                    if not r.ready():
+                        pending[k] = submit(q)
+                continue
+            except Exception as e:
+                errors.append(_file_error(p, e))
+                continue
+            finally:
+                refill()
+            add_counters(counts)
+            _add_stats(stats, file_stats)
+            if p in digests:
+                _store_cached(cache, p, digests[p], table, file_stats)
+            yield from table
+    finally:
+        if pending:
+            pool.terminate()  # flux abandonné : les workers ne survivent pas à l'analyse
+        else:
+            pool.close()
+        pool.join()
+        budget.release(workers)
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _iter_normalized(raw: Iterable[Dict], stats: Optional[Dict[str, int]] = None) -> Iterator[Shift]:
+    """
+    Normalise en flux, par paquets de NORMALIZE_CHUNK_ROWS lignes : dates et heures
+    converties par colonne (format déduit une fois par fichier, cf. column_formats).
+    Les lignes inexploitables sont ignorées ; les cellules passées par le chemin lent
+    sont ajoutées à stats["slow_path_cells"].
+    """
+    dates, starts, ends = ColumnParser("date"), ColumnParser("time"), ColumnParser("time")
+    try:
+        for chunk in _chunks(raw, NORMALIZE_CHUNK_ROWS):
+            agents = [str(r.get("agent_id") or "").strip() for r in chunk]
+            day, ok = dates.parse([r.get("date") for r in chunk])
+            st, ok_st = starts.parse([r.get("start_time") for r in chunk])
+            en, ok_en = ends.parse([r.get("end_time") for r in chunk])
+            brk = pd.to_numeric(pd.Series([r.get("break_minutes") or 0 for r in chunk], dtype=object), errors="coerce").to_numpy(dtype="float64")
+            ok &= ok_st & ok_en & (np.floor(brk) == brk) & (np.array(agents, dtype=object) != "")
+            idx = np.flatnonzero(ok)
+            for i, d, s_, e, b in zip(idx.tolist(), day[idx].tolist(), st[idx].tolist(), en[idx].tolist(), brk[idx].astype(np.int64).tolist()):
+                yield Shift(agents[i], d, s_, e, b)
+    finally:
+        if stats is not None:
+            stats["slow_path_cells"] = stats.get("slow_path_cells", 0) + dates.slow + starts.slow + ends.slow
+
+def _iter_sorted(shifts: Iterable[Shift], S) -> Iterator[Shift]:
+    """Tri (agent, date, début) ; déborde sur disque au-delà de SCHEDULE_SORT_SPILL_ROWS."""
+    return external_sort(shifts, key=_SORT_KEY, max_in_memory=S.SCHEDULE_SORT_SPILL_ROWS)
+
+def iter_sorted_shifts(paths: List[Path], S, errors: List[Dict[str, str]], stats: Optional[Dict[str, int]] = None) -> Iterator[Shift]:
+    """Vacations de tous les fichiers triées par (agent, date, début) ; erreurs par fichier dans `errors`."""
+    return _iter_sorted(_iter_ingested(paths, S, errors, stats), S)
+
+def _evaluate_bounded(shifts: Iterable[Shift], S) -> Tuple[List[str], List[ScheduleStat], List[ScheduleViolation]]:
+    """
+    Moteur numpy à mémoire bornée par SCHEDULE_SORT_SPILL_ROWS (N) :
+    - au plus N vacations : une seule ShiftTable, triée en place ;
+    - au-delà : flux trié par le tri externe (débord sur disque), évalué par paquets
+      d'agents entiers d'au moins N vacations. Les règles portent sur un agent et les
+      sorties sont triées par agent : la concaténation des paquets donne le même résultat.
+    En mémoire : N vacations + celles de l'agent le plus volumineux.
+    """
+    limit = max(1, S.SCHEDULE_SORT_SPILL_ROWS)
+    it = iter(shifts)
+    head = list(islice(it, limit))
+    if len(head) < limit:
+        return evaluate_numpy(ShiftTable.from_shifts(head), S)
+
+    agents: List[str] = []
+    stats: List[ScheduleStat] = []
+    violations: List[ScheduleViolation] = []
+
+    def flush(batch: List[Shift]) -> None:
+        a, st, v = evaluate_numpy(ShiftTable.from_shifts(batch), S)
+        agents.extend(a)
+        stats.extend(st)
+        violations.extend(v)
+
+    batch: List[Shift] = []
+    for _, grp in groupby(_iter_sorted(chain(head, it), S), key=attrgetter("agent_id")):
+        batch.extend(grp)
+        if len(batch) >= limit:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return agents, stats, violations
+
+def _as_dict(sh: Shift) -> Dict:
+    # heures ancrées sur la date du poste (repos calculés entre jours réels)
+    d = date.fromordinal(sh.day + EPOCH_ORDINAL)
+    midnight = datetime.combine(d, datetime.min.time())
+    return {
+        "agent_id": sh.agent_id,
+        "date": d,
+        "start": midnight + timedelta(minutes=sh.start),
+        "end": midnight + timedelta(minutes=sh.end),
+        "break_min": sh.break_min,
+    }
+
+def _group_by_agent(shifts: Iterable[Shift]) -> Iterator[Tuple[str, List[Dict]]]:
+    """Regroupe un flux trié : un seul agent en mémoire à la fois."""
+    for agent, grp in groupby(shifts, key=attrgetter("agent_id")):
+        yield agent, [_as_dict(sh) for sh in grp]
+
+def _evaluate_legacy(groups: Iterable[Tuple[str, List[Dict]]], S) -> Tuple[List[str], List[ScheduleStat], List[ScheduleViolation]]:
+    """Moteur historique : boucle Python par agent puis par vacation."""
     violations: List[ScheduleViolation] = []
     stats: List[ScheduleStat] = []
+    agents: List[str] = []
 
-    for agent, shifts in groups.items():
+    for agent, shifts in groups:
+        agents.append(agent)
         # calculs par jour & semaine
         daily_minutes: Dict[date, int] = {}
         weeks: Dict[Tuple[int,int], int] = {}  # (year, iso_week) -> minutes
@@ -211,19 +441,25 @@ def check_schedules(paths: Iterable[Path]) -> SchedulesCheckResult:
                     details=f"{mins/60:.2f} h > {S.MAX_HOURS_PER_WEEK} h / semaine"
                 ))
 
-        # moyenne glissante sur 12 semaines
-        if len(weeks_sorted) >= 12:
-            for i in range(0, len(weeks_sorted) - 11):
-                window = weeks_sorted[i:i+12]
-                total = sum(m for _, m in window)
+        # moyenne glissante sur 12 semaines calendaires (semaines sans heures = 0)
+        # sommes préfixées sur un axe dense de lundis : O(semaines) par agent
+        if weeks_sorted:
+            first = date.fromisocalendar(*weeks_sorted[0][0], 1)
+            n_weeks = (date.fromisocalendar(*weeks_sorted[-1][0], 1) - first).days // 7 + 1
+            dense = [0] * n_weeks
+            for (y, w), mins in weeks_sorted:
+                dense[(date.fromisocalendar(y, w, 1) - first).days // 7] = mins
+            prefix = [0, *accumulate(dense)]
+            for i in range(0, n_weeks - 11):
+                total = prefix[i + 12] - prefix[i]
                 avg_h = (total/12) / 60.0
                 if avg_h > S.AVG_HOURS_PER_12W:
-                    startw = f"{window[0][0][0]}-W{window[0][0][1]:02d}"
-                    endw   = f"{window[-1][0][0]}-W{window[-1][0][1]:02d}"
+                    y0, w0, _ = (first + timedelta(weeks=i)).isocalendar()
+                    y1, w1, _ = (first + timedelta(weeks=i + 11)).isocalendar()
                     violations.append(ScheduleViolation(
                         agent_id=agent,
                         type="AVG_12W",
-                        week=f"{startw}→{endw}",
+                        week=f"{y0}-W{w0:02d}→{y1}-W{w1:02d}",
                         details=f"moyenne {avg_h:.2f} h > {S.AVG_HOURS_PER_12W} h / 12 sem."
                     ))
 
@@ -236,9 +472,39 @@ def check_schedules(paths: Iterable[Path]) -> SchedulesCheckResult:
             weeks_count=len(weeks)
         ))
 
+    return sorted(set(agents)), stats, violations
+
+def check_schedules(paths: Iterable[Path], engine: Optional[str] = None) -> SchedulesCheckResult:
+    """
+    Contrôle des plannings (CSV/XLSX/PDF).
+    - engine : "numpy" (vectorisé) ou "legacy" ; par défaut Settings.SCHEDULE_ENGINE
+    """
+    paths = [Path(p) for p in paths]
+    S = get_settings()
+    engine = (engine or S.SCHEDULE_ENGINE).lower()
+    if engine not in ("numpy", "legacy"):
+        raise ValueError(f"Moteur inconnu: {engine} (attendu: numpy | legacy)")
+
+    # lecture (parallèle par fichier) -> normalisation -> règles
+    errors: List[Dict[str, str]] = []
+    parsing: Dict[str, int] = {}
+    if engine == "numpy":
+        agents, stats, violations = _evaluate_bounded(_iter_ingested(paths, S, errors, parsing), S)
+    else:
+        shifts = iter_sorted_shifts(paths, S, errors, parsing)
+        agents, stats, violations = _evaluate_legacy(_group_by_agent(shifts), S)
+
+    extras: Dict[str, object] = {}
+    if errors:
+        extras["file_errors"] = errors
+    if parsing.get("slow_path_cells"):
+        extras["slow_path_cells"] = parsing["slow_path_cells"]
+    backends = pdf_backends(parsing)
+    if backends:
+        extras["pdf_backends"] = backends
     return SchedulesCheckResult(
-        agents=sorted(set(groups.keys())),
+        agents=agents,
         stats=stats,
         violations=violations,
-        extras={}
+        extras=extras,
     )
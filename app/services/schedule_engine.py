@@ -0,0 +1,599 @@
+# app/services/schedule_engine.py
+"""
+Moteur vectorisé (NumPy) pour check_schedules.
+
+Au lieu de parcourir chaque agent en Python, on construit une seule table triée
+(agent, début/fin en minutes depuis l'epoch, pause) puis on calcule totaux
+journaliers, totaux ISO-semaine, repos entre vacations et jours consécutifs
+par opérations de groupe. Le résultat est identique au moteur "legacy".
+
+Les règles sont compilées en plan (compile_plan) : une seule passe (Sweep) porte
+les accumulateurs partagés, chaque règle active n'y ajoute qu'un filtre.
+
+Sweep est le noyau de conformité commun aux trois moteurs : check_schedules
+(build_table), l'audit des plannings (detect_alerts) et analyze_schedule
+(table_from_bounds) n'en sont que des adaptateurs vers leur format de sortie.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..models.schemas import ScheduleViolation, ScheduleStat
+from .shift_table import Shift, ShiftTable
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MINUTES_PER_DAY = 1440
+SECONDS_PER_DAY = 86400
+
+# seuils de Settings dont dépend le résultat (état incrémental, cache des résultats)
+THRESHOLD_KEYS = (
+    "MAX_HOURS_PER_DAY", "MAX_HOURS_PER_WEEK", "AVG_HOURS_PER_12W",
+    "MIN_DAILY_REST_HOURS", "MAX_CONSECUTIVE_DAYS",
+)
+
+
+def thresholds(S) -> Dict[str, object]:
+    return {k: getattr(S, k) for k in THRESHOLD_KEYS}
+
+
+# ordre des sections dans la sortie (identique au moteur legacy)
+_SEC_SHIFT, _SEC_DAILY, _SEC_WEEKLY, _SEC_AVG = 0, 1, 2, 3
+
+
+def _days_iso(day: np.ndarray) -> List[str]:
+    """Jours depuis l'epoch -> dates ISO 'YYYY-MM-DD'."""
+    return np.datetime_as_string(np.asarray(day, dtype=np.int64).astype("datetime64[D]")).tolist()
+
+
+def iso_year_week(day: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Année et semaine ISO pour des jours comptés depuis le 1970-01-01 (un jeudi)."""
+    day = np.asarray(day, dtype=np.int64)
+    weekday = (day + 3) % 7          # lundi = 0
+    thursday = day - weekday + 3     # l'année ISO est celle du jeudi de la semaine
+    year = thursday.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64)
+    jan1 = year.astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+    week = (thursday - jan1) // 7 + 1
+    return year + 1970, week
+
+
+def week_number(day: np.ndarray) -> np.ndarray:
+    """
+    N° de semaine continu (lundi -> dimanche) pour des jours depuis l'epoch.
+    Deux semaines ISO successives ont des numéros successifs ; le lundi vaut n * 7 - 3.
+    """
+    return (np.asarray(day, dtype=np.int64) + 3) // 7
+
+
+def iso_week_number(iso_year: np.ndarray, iso_week: np.ndarray) -> np.ndarray:
+    """(année ISO, semaine ISO) -> n° de semaine continu (cf. week_number)."""
+    year = np.asarray(iso_year, dtype=np.int64)
+    jan4 = (year - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64) + 3
+    return week_number(jan4) + np.asarray(iso_week, dtype=np.int64) - 1
+
+
+def dense_week_rolling(group: np.ndarray, week: np.ndarray, values: np.ndarray, window: int = 12):
+    """
+    Sommes glissantes sur `window` semaines calendaires, en O(n) par sommes préfixées.
+
+    Entrées triées par (group, week), une ligne par couple. Chaque groupe est étalé
+    sur un axe dense de sa première à sa dernière semaine, les semaines absentes
+    valant 0. Renvoie, pour chaque semaine de l'axe dense :
+    (group, week, somme de la fenêtre finissant à cette semaine,
+     nb de semaines couvertes (<= window), positions des lignes d'entrée dans l'axe).
+    """
+    group = np.asarray(group, dtype=np.int64)
+    week = np.asarray(week, dtype=np.int64)
+    values = np.asarray(values)
+    if len(group) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, values[:0], empty, empty
+
+    g_idx = _group_starts(group)
+    g_first = week[g_idx]
+    g_last = week[np.append(g_idx[1:], len(week)) - 1]
+    g_len = g_last - g_first + 1
+    g_off = np.concatenate(([0], np.cumsum(g_len)[:-1]))
+
+    row_group = np.repeat(np.arange(len(g_idx)), np.diff(np.append(g_idx, len(week))))
+    row_pos = g_off[row_group] + week - g_first[row_group]
+
+    dense = np.zeros(int(g_len.sum()), dtype=values.dtype)
+    dense[row_pos] = values
+    prefix = np.concatenate(([0], np.cumsum(dense)))
+
+    dense_group = np.repeat(np.arange(len(g_idx)), g_len)
+    local = np.arange(len(dense)) - g_off[dense_group]
+    first = np.maximum(local - window + 1, 0)
+    sums = prefix[np.arange(1, len(dense) + 1)] - prefix[g_off[dense_group] + first]
+    return group[g_idx][dense_group], g_first[dense_group] + local, sums, local - first + 1, row_pos
+
+
+def clock_end(start_s: np.ndarray, end_s: np.ndarray) -> np.ndarray:
+    """Fin en secondes depuis minuit du jour de début : lendemain si fin <= début (horaires d'horloge)."""
+    start_s, end_s = np.asarray(start_s, dtype=float), np.asarray(end_s, dtype=float)
+    return np.where(end_s <= start_s, end_s + SECONDS_PER_DAY, end_s)
+
+
+def effective_hours(start_s: np.ndarray, end_s: np.ndarray, pause_min: np.ndarray) -> np.ndarray:
+    """Heures travaillées (durée - pause, bornée à 0) de vacations données en heures d'horloge."""
+    duration = (clock_end(start_s, end_s) - start_s) / 3600.0
+    return np.maximum(duration - np.asarray(pause_min, dtype=float) / 60.0, 0.0)
+
+
+# --- plages de temps (nuit, nuit des mineurs, dimanches, jours fériés) ---
+# Une plage est décrite par sa mesure cumulée : band(t) = minutes de la plage dans
+# [origine, t) pour des instants t en minutes depuis l'epoch (origine commune à un
+# même appel). Le recouvrement d'une vacation [début, fin) vaut band(fin) - band(début),
+# quelle que soit sa longueur (> 24 h, début après minuit, plusieurs jours).
+Band = Callable[[np.ndarray], np.ndarray]
+
+
+def clock_band(start_min: int, end_min: int) -> Band:
+    """
+    Plage horaire quotidienne [start_min, end_min) en minutes depuis minuit ;
+    à cheval sur minuit si start_min >= end_min (nuit 21h–6h : clock_band(1260, 360)).
+    """
+    a, b = start_min % MINUTES_PER_DAY, end_min % MINUTES_PER_DAY
+
+    def cumulative(t: np.ndarray) -> np.ndarray:
+        t = np.asarray(t, dtype=float)
+        day = np.floor(t / MINUTES_PER_DAY)
+        r = t - day * MINUTES_PER_DAY
+        if a < b:
+            return day * (b - a) + np.clip(r - a, 0, b - a)
+        return day * (b + MINUTES_PER_DAY - a) + np.minimum(r, b) + np.maximum(r - a, 0)
+
+    return cumulative
+
+
+def day_band(is_band_day: Callable[[np.ndarray], np.ndarray]) -> Band:
+    """Jours entiers retenus par `is_band_day` (jours depuis l'epoch -> booléens)."""
+
+    def cumulative(t: np.ndarray) -> np.ndarray:
+        t = np.asarray(t, dtype=float)
+        if t.size == 0:
+            return t.copy()
+        day = np.floor(t / MINUTES_PER_DAY).astype(np.int64)
+        lo = int(day.min())
+        mask = np.asarray(is_band_day(np.arange(lo, int(day.max()) + 1)), dtype=bool)
+        before = np.concatenate(([0], np.cumsum(mask)))[day - lo]  # jours de la plage dans [lo, jour)
+        return before * float(MINUTES_PER_DAY) + np.where(mask[day - lo], t - day * MINUTES_PER_DAY, 0.0)
+
+    return cumulative
+
+
+def sunday_band() -> Band:
+    return day_band(lambda day: (day + 3) % 7 == 6)  # le 1970-01-01 est un jeudi
+
+
+def holiday_band(holidays: Iterable[date]) -> Band:
+    days = np.array(sorted(d.toordinal() - EPOCH_ORDINAL for d in holidays), dtype=np.int64)
+    return day_band(lambda day: np.isin(day, days))
+
+
+def band_minutes(start: np.ndarray, end: np.ndarray, bands: Dict[str, Band]) -> Dict[str, np.ndarray]:
+    """
+    Minutes de chaque vacation [start, end) (minutes depuis l'epoch) tombant dans
+    chaque plage, toutes les vacations d'un coup : {nom de plage: minutes}.
+    """
+    start = np.asarray(start, dtype=float)
+    bounds = np.concatenate((start, np.asarray(end, dtype=float)))
+    out = {}
+    for name, band in bands.items():
+        cum = band(bounds)
+        out[name] = cum[len(start):] - cum[:len(start)]
+    return out
+
+
+def build_table(shifts: Union[ShiftTable, Iterable[Shift]]) -> Dict[str, np.ndarray]:
+    """
+    Colonnes int64 triées par (agent, début) à partir d'une ShiftTable (ou d'un flux).
+    - agent : code de l'agent (ordre alphabétique des identifiants, cf. ShiftTable.sort)
+    - start/end : minutes depuis l'epoch (fin +24h si fin <= début)
+    - day : jour de la vacation (jours depuis l'epoch)
+    """
+    table = shifts if isinstance(shifts, ShiftTable) else ShiftTable.from_shifts(shifts)
+    table.sort()
+    day = table.day.astype(np.int64)
+    start = day * MINUTES_PER_DAY + table.start
+    end = day * MINUTES_PER_DAY + table.end
+    end = np.where(end <= start, end + MINUTES_PER_DAY, end)
+    return {
+        "agents": np.array(table.agents, dtype=object),
+        "agent": table.agent.astype(np.int64),
+        "day": day,
+        "start": start,
+        "end": end,
+        "break_min": table.break_min.astype(np.int64),
+    }
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """Indices de début de chaque groupe contigu (clés déjà triées)."""
+    n = len(keys[0])
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for k in keys:
+        change[1:] |= k[1:] != k[:-1]
+    return np.flatnonzero(change)
+
+
+def table_from_bounds(agent_ids: Iterable[str], start: np.ndarray, end: np.ndarray, **columns: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Table normalisée (même forme que build_table) depuis des colonnes quelconques,
+    pour les moteurs qui lisent leurs propres DataFrames (audit, analyze_schedule).
+    - start / end : minutes depuis l'epoch, fin déjà reportée par l'appelant
+    - agents codés dans l'ordre alphabétique, lignes triées (tri stable) par (agent, début)
+    - row : position d'origine de chaque ligne ; `columns` sont réordonnées de même
+    """
+    agents, agent = np.unique(np.asarray(list(agent_ids), dtype=object), return_inverse=True)
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    order = np.lexsort((start, agent))
+    t = {
+        "agents": agents,
+        "agent": agent.astype(np.int64)[order],
+        "day": np.floor(start / MINUTES_PER_DAY).astype(np.int64)[order],
+        "start": start[order],
+        "end": end[order],
+        "row": order,
+    }
+    for name, values in columns.items():
+        t[name] = np.asarray(values)[order]
+    return t
+
+
+def group_sum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Sommes par groupe contigu. Entiers : np.add.reduceat. Flottants : sommation
+    compensée (Kahan) en ignorant les NaN, comme groupby().sum() de pandas, pour
+    retrouver exactement les mêmes flottants ; une itération par rang dans le groupe,
+    sur les seuls groupes assez longs (O(n) au total).
+    """
+    values = np.asarray(values)
+    if len(starts) == 0:
+        return values[:0]
+    if values.dtype.kind in "biu":
+        return np.add.reduceat(values, starts)
+    sizes = np.diff(np.append(starts, len(values)))
+    by_size = np.argsort(-sizes, kind="stable")
+    longer = len(sizes) - np.searchsorted(np.sort(sizes), np.arange(sizes.max()), side="right")
+    total = np.zeros(len(starts))
+    comp = np.zeros(len(starts))
+    for k, n in enumerate(longer.tolist()):
+        g = by_size[:n]
+        v = values[starts[g] + k].astype(float)
+        ok = ~np.isnan(v)
+        g, v = g[ok], v[ok]
+        y = v - comp[g]
+        t = total[g] + y
+        c = t - total[g] - y
+        comp[g] = np.where(np.isnan(c), 0.0, c)
+        total[g] = t
+    return total
+
+
+# --- plan de règles compilé ---
+# Une passe (Sweep) sur la table triée (agent, début) porte tous les accumulateurs :
+# minutes par vacation, totaux journaliers, séries de jours, totaux hebdomadaires,
+# moyenne glissante, écarts de repos. Chacun est calculé au plus une fois, seulement
+# si une règle active le demande ; une règle ne fait que filtrer ses accumulateurs.
+# Ajouter une règle = un @rule (+ un accumulateur s'il en faut un nouveau).
+class Sweep:
+    """Accumulateurs d'une passe sur la table de build_table."""
+
+    def __init__(self, table: Dict[str, np.ndarray]) -> None:
+        self.t = table
+        self.names: List[str] = table["agents"].tolist()
+
+    @cached_property
+    def shift_minutes(self) -> np.ndarray:
+        t = self.t
+        if "minutes" in t:  # durée travaillée fournie par l'appelant (table_from_bounds)
+            return t["minutes"]
+        return np.maximum(t["end"] - t["start"] - t["break_min"], 0)
+
+    @cached_property
+    def daily(self) -> Dict[str, np.ndarray]:
+        """Par (agent, jour) : agent, day, minutes ; idx = 1re vacation du jour, group = jour de chaque vacation."""
+        agent, day = self.t["agent"], self.t["day"]
+        idx = _group_starts(agent, day)
+        first = np.zeros(len(agent), dtype=bool)
+        first[idx] = True
+        minutes = self.shift_minutes
+        return {
+            "idx": idx,
+            "agent": agent[idx],
+            "day": day[idx],
+            "minutes": group_sum(minutes, idx),
+            "group": np.cumsum(first) - 1,
+        }
+
+    @cached_property
+    def streak(self) -> np.ndarray:
+        """Rang de chaque jour dans sa série de jours consécutifs (rompue par un trou ou un changement d'agent)."""
+        d_agent, d_day = self.daily["agent"], self.daily["day"]
+        brk = np.ones(len(d_day), dtype=bool)
+        brk[1:] = (d_agent[1:] != d_agent[:-1]) | (d_day[1:] - d_day[:-1] != 1)
+        run_start = np.maximum.accumulate(np.where(brk, np.arange(len(d_day)), 0))
+        return np.arange(len(d_day)) - run_start + 1
+
+    @cached_property
+    def weekly(self) -> Dict[str, np.ndarray]:
+        """Par (agent, semaine ISO) : agent, wk (n° continu), year, week, minutes ; idx = 1er jour de la semaine."""
+        d = self.daily
+        d_wk = week_number(d["day"])
+        idx = _group_starts(d["agent"], d_wk)
+        year, week = iso_year_week(d_wk[idx] * 7 - 3)
+        return {
+            "idx": idx,
+            "agent": d["agent"][idx],
+            "wk": d_wk[idx],
+            "year": year,
+            "week": week,
+            "minutes": group_sum(d["minutes"], idx),
+        }
+
+    @cached_property
+    def rolling12(self) -> Dict[str, np.ndarray]:
+        """
+        Sommes sur 12 semaines calendaires (semaines vides = 0), cf. dense_week_rolling.
+        table["since_wk"] (optionnel, par code agent) : 1re semaine de l'historique quand
+        la table n'en porte que la fin (contrôle incrémental) ; compte les semaines couvertes.
+        """
+        w = self.weekly
+        agent, wk, total, count, pos = dense_week_rolling(w["agent"], w["wk"], w["minutes"], window=12)
+        if "since_wk" in self.t:
+            count = np.minimum(wk - self.t["since_wk"][agent] + 1, 12)
+        return {"agent": agent, "wk": wk, "minutes": total, "count": count, "pos": pos}
+
+    @cached_property
+    def rest_hours(self) -> np.ndarray:
+        """Repos avant chaque vacation (h) depuis la fin de la précédente du même agent ; inf sinon."""
+        agent, start, end = self.t["agent"], self.t["start"], self.t["end"]
+        rest = np.full(len(agent), np.inf)
+        same_agent = agent[1:] == agent[:-1]
+        rest[1:][same_agent] = (start[1:] - end[:-1])[same_agent] / 60.0
+        return rest
+
+    @cached_property
+    def runs(self) -> Dict[str, np.ndarray]:
+        """Séries de jours consécutifs (jours travaillés d'un même agent sans trou) : agent, first_day, length."""
+        d_agent, d_day = self.daily["agent"], self.daily["day"]
+        brk = np.ones(len(d_day), dtype=bool)
+        brk[1:] = (d_agent[1:] != d_agent[:-1]) | (d_day[1:] - d_day[:-1] != 1)
+        return {"agent": d_agent[brk], "first_day": d_day[brk], "length": np.diff(np.append(np.flatnonzero(brk), len(d_day)))}
+
+    @cached_property
+    def week_rows(self) -> Dict[str, np.ndarray]:
+        """Vacations groupées par (agent, semaine ISO du début) : idx, agent, wk, year, week."""
+        agent = self.t["agent"]
+        wk = week_number(self.t["day"])
+        idx = _group_starts(agent, wk)
+        year, week = iso_year_week(wk[idx] * 7 - 3)
+        return {"idx": idx, "agent": agent[idx], "wk": wk[idx], "year": year, "week": week}
+
+    # --- agrégats de colonnes fournies par l'appelant (table_from_bounds) ---
+    def per_day(self, name: str, how: str = "sum") -> np.ndarray:
+        """Colonne `name` agrégée par (agent, jour) : sum | max | first | last (ordre des débuts)."""
+        values, idx = self.t[name], self.daily["idx"]
+        if how == "sum":
+            return group_sum(values, idx)
+        if how == "max":
+            return np.maximum.reduceat(values, idx) if len(idx) else values[:0]
+        if how == "first":
+            return values[idx]
+        if how == "last":
+            return values[np.append(idx[1:], len(values)) - 1] if len(idx) else values[:0]
+        raise ValueError(f"Agrégat inconnu: {how} (attendu: sum | max | first | last)")
+
+    def per_week(self, name: str) -> np.ndarray:
+        """Somme de la colonne `name` par (agent, semaine ISO), cf. week_rows."""
+        return group_sum(self.t[name], self.week_rows["idx"])
+
+    def week_has_rest(self, min_hours: float) -> np.ndarray:
+        """Par semaine de week_rows : au moins un écart fin -> début suivant >= min_hours dans la semaine."""
+        idx = self.week_rows["idx"]
+        start, end = self.t["start"], self.t["end"]
+        ok = np.zeros(len(start), dtype=bool)
+        ok[1:] = (start[1:] - end[:-1]) / 60.0 >= min_hours
+        ok[idx] = False  # 1re vacation de la semaine : pas d'écart compté
+        return np.logical_or.reduceat(ok, idx) if len(idx) else ok[:0]
+
+    def band_minutes(self, bands: Dict[str, Band]) -> Dict[str, np.ndarray]:
+        """Minutes de chaque vacation dans chaque plage (cf. band_minutes)."""
+        return band_minutes(self.t["start"], self.t["end"], bands)
+
+    def in_row_order(self, values: np.ndarray) -> np.ndarray:
+        """Valeurs par vacation remises dans l'ordre des lignes d'origine (table_from_bounds)."""
+        out = np.empty_like(values)
+        out[self.t["row"]] = values
+        return out
+
+
+# émetteur : (sweep, Settings) -> (codes agent, positions dans la section, violations)
+Emit = Callable[[Sweep, object], Tuple[np.ndarray, np.ndarray, List[ScheduleViolation]]]
+
+
+@dataclass(frozen=True)
+class Rule:
+    type: str                 # ScheduleViolation.type
+    section: int              # ordre de sortie : section, position, sous-ordre (cf. moteur legacy)
+    sub: int
+    needs: Tuple[str, ...]    # accumulateurs de Sweep
+    emit: Emit
+
+
+RULES: Dict[str, Rule] = {}
+
+
+def rule(type: str, section: int, needs: Tuple[str, ...], sub: int = 0) -> Callable[[Emit], Emit]:
+    def register(emit: Emit) -> Emit:
+        RULES[type] = Rule(type, section, sub, needs, emit)
+        return emit
+    return register
+
+
+@rule("DAILY_REST", _SEC_SHIFT, needs=("rest_hours",))
+def _daily_rest(sw: Sweep, S):
+    t, rest_h = sw.t, sw.rest_hours
+    idx = np.flatnonzero(rest_h < S.MIN_DAILY_REST_HOURS)
+    return t["agent"][idx], idx, [
+        ScheduleViolation(
+            agent_id=sw.names[a],
+            type="DAILY_REST",
+            date=d,
+            details=f"Repos quotidien {r:.1f}h < {S.MIN_DAILY_REST_HOURS}h"
+        )
+        for a, d, r in zip(t["agent"][idx].tolist(), _days_iso(t["day"][idx]), rest_h[idx].tolist())
+    ]
+
+
+@rule("CONSEC_DAYS", _SEC_SHIFT, needs=("daily", "streak"), sub=1)
+def _consecutive_days(sw: Sweep, S):
+    # signalé sur chaque vacation du jour
+    t = sw.t
+    s_streak = sw.streak[sw.daily["group"]]
+    idx = np.flatnonzero(s_streak > S.MAX_CONSECUTIVE_DAYS)
+    return t["agent"][idx], idx, [
+        ScheduleViolation(
+            agent_id=sw.names[a],
+            type="CONSEC_DAYS",
+            date=d,
+            details=f"{n} jours consécutifs > {S.MAX_CONSECUTIVE_DAYS}"
+        )
+        for a, d, n in zip(t["agent"][idx].tolist(), _days_iso(t["day"][idx]), s_streak[idx].tolist())
+    ]
+
+
+@rule("DAILY_MAX", _SEC_DAILY, needs=("daily",))
+def _daily_max(sw: Sweep, S):
+    d = sw.daily
+    idx = np.flatnonzero(d["minutes"] > int(S.MAX_HOURS_PER_DAY * 60))
+    return d["agent"][idx], idx, [
+        ScheduleViolation(
+            agent_id=sw.names[a],
+            type="DAILY_MAX",
+            date=day,
+            details=f"{m/60:.2f} h > {S.MAX_HOURS_PER_DAY} h / jour"
+        )
+        for a, day, m in zip(d["agent"][idx].tolist(), _days_iso(d["day"][idx]), d["minutes"][idx].tolist())
+    ]
+
+
+@rule("WEEKLY_MAX", _SEC_WEEKLY, needs=("weekly",))
+def _weekly_max(sw: Sweep, S):
+    w = sw.weekly
+    idx = np.flatnonzero(w["minutes"] > int(S.MAX_HOURS_PER_WEEK * 60))
+    return w["agent"][idx], idx, [
+        ScheduleViolation(
+            agent_id=sw.names[a],
+            type="WEEKLY_MAX",
+            week=f"{y}-W{wn:02d}",
+            details=f"{m/60:.2f} h > {S.MAX_HOURS_PER_WEEK} h / semaine"
+        )
+        for a, y, wn, m in zip(
+            w["agent"][idx].tolist(), w["year"][idx].tolist(), w["week"][idx].tolist(), w["minutes"][idx].tolist(),
+        )
+    ]
+
+
+@rule("AVG_12W", _SEC_AVG, needs=("rolling12",))
+def _avg_12w(sw: Sweep, S):
+    r = sw.rolling12
+    avg_h = (r["minutes"] / 12) / 60.0
+    idx = np.flatnonzero((r["count"] == 12) & (avg_h > S.AVG_HOURS_PER_12W))
+    y0, w0 = iso_year_week((r["wk"][idx] - 11) * 7 - 3)
+    y1, w1 = iso_year_week(r["wk"][idx] * 7 - 3)
+    return r["agent"][idx], idx, [
+        ScheduleViolation(
+            agent_id=sw.names[a],
+            type="AVG_12W",
+            week=f"{ya}-W{wa:02d}→{yb}-W{wb:02d}",
+            details=f"moyenne {h:.2f} h > {S.AVG_HOURS_PER_12W} h / 12 sem."
+        )
+        for a, ya, wa, yb, wb, h in zip(
+            r["agent"][idx].tolist(), y0.tolist(), w0.tolist(),
+            y1.tolist(), w1.tolist(), avg_h[idx].tolist(),
+        )
+    ]
+
+
+@dataclass(frozen=True)
+class RulePlan:
+    rules: Tuple[Rule, ...]
+    needs: Tuple[str, ...]    # accumulateurs à calculer, une fois chacun
+    S: object
+
+    def sweep(self, table: Dict[str, np.ndarray]) -> Sweep:
+        """Passe sur `table` (cf. build_table) avec les accumulateurs du plan calculés."""
+        sw = Sweep(table)
+        for name in self.needs:
+            getattr(sw, name)
+        return sw
+
+    def violations(self, sw: Sweep, keep: Optional[Dict[int, np.ndarray]] = None) -> Tuple[np.ndarray, List[ScheduleViolation]]:
+        """
+        Violations des règles du plan triées par (agent, section, position, sous-ordre),
+        avec le code agent de chacune. keep : par section, masque des positions à garder
+        (vacations, jours, semaines ou fenêtres recalculés par le contrôle incrémental).
+        """
+        keys: List[np.ndarray] = []
+        out: List[ScheduleViolation] = []
+        for r in self.rules:
+            codes, pos, objs = r.emit(sw, self.S)
+            if keep is not None and len(objs):
+                sel = np.flatnonzero(keep[r.section][pos])
+                codes, pos, objs = codes[sel], pos[sel], [objs[i] for i in sel.tolist()]
+            n = len(objs)
+            keys.append(
+                np.stack([codes, np.full(n, r.section), pos, np.full(n, r.sub)]) if n else np.zeros((4, 0), dtype=np.int64)
+            )
+            out.extend(objs)
+        if not out:
+            return np.zeros(0, dtype=np.int64), []
+        k = np.concatenate(keys, axis=1)
+        order = np.lexsort((k[3], k[2], k[1], k[0]))
+        return k[0][order], [out[i] for i in order.tolist()]
+
+    def run(self, shifts: Union[ShiftTable, Iterable[Shift]]) -> Tuple[List[str], List[ScheduleStat], List[ScheduleViolation]]:
+        sw = self.sweep(build_table(shifts))
+        _, violations = self.violations(sw)
+
+        # --- stats par agent ---
+        d, w = sw.daily, sw.weekly
+        n_agents = len(sw.names)
+        total_min = np.bincount(d["agent"], weights=d["minutes"], minlength=n_agents)
+        days_worked = np.bincount(d["agent"], minlength=n_agents)
+        weeks_count = np.bincount(w["agent"], minlength=n_agents)
+        stats = [
+            ScheduleStat(agent_id=name, total_hours=round(int(tm) / 60.0, 2), days_worked=dw, weeks_count=wc)
+            for name, tm, dw, wc in zip(sw.names, total_min.tolist(), days_worked.tolist(), weeks_count.tolist())
+        ]
+        return sorted(set(sw.names)), stats, violations
+
+
+def compile_plan(S, enabled: Optional[Iterable[str]] = None) -> RulePlan:
+    """
+    Plan pour les règles `enabled` (types de violation ; toutes par défaut) avec les
+    seuils de S : règles dans l'ordre de sortie, union de leurs accumulateurs
+    (+ jours et semaines, toujours nécessaires aux stats).
+    """
+    names = list(RULES) if enabled is None else list(enabled)
+    unknown = [n for n in names if n not in RULES]
+    if unknown:
+        raise ValueError(f"Règles inconnues: {', '.join(unknown)} (attendu: {' | '.join(RULES)})")
+    rules = tuple(sorted((RULES[n] for n in names), key=lambda r: (r.section, r.sub)))
+    needs = list(dict.fromkeys(["daily", "weekly", *(a for r in rules for a in r.needs)]))
+    return RulePlan(rules, tuple(needs), S)
+
+
+def evaluate(shifts: Union[ShiftTable, Iterable[Shift]], S) -> Tuple[List[str], List[ScheduleStat], List[ScheduleViolation]]:
+    """Applique les règles à toutes les vacations ; renvoie (agents, stats, violations)."""
+    return compile_plan(S).run(shifts)
@@ -0,0 +1,295 @@
+# app/services/schedule_state.py
+"""
+Contrôle incrémental des plannings d'un dossier entreprise.
+
+Chaque mois un nouveau fichier de planning s'ajoute au dossier. Plutôt que de
+recalculer tout l'historique, on persiste par dossier l'état de chaque agent (fin
+d'historique utile aux règles, cumuls des stats, violations) ainsi que le dernier
+résultat. Les nouvelles vacations sont évaluées par le moteur de schedule_engine
+(mêmes règles que check_schedules) sur cette fin d'historique : seules les
+vacations, journées, semaines et fenêtres de 12 semaines touchées sont recalculées.
+
+Recalcul complet si : premier passage, `full=True`, seuils modifiés, fichier
+déjà traité modifié/supprimé, ou vacations nouvelles antérieures à l'historique.
+
+Seuls les fichiers lus sans erreur sont mémorisés : un fichier illisible ou hors
+délai est relu au contrôle suivant, et les erreurs sont celles de l'appel en cours.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..models.schemas import SchedulesCheckResult, ScheduleStat, ScheduleViolation
+from .pdf_schedule_parser import pdf_backends
+from .schedule_checker import iter_sorted_shifts
+from .schedule_engine import EPOCH_ORDINAL, MINUTES_PER_DAY, RULES, build_table, compile_plan, thresholds, week_number
+from .shift_table import Shift, ShiftTable
+
+STATE_VERSION = 3  # 2 : fichiers en erreur ni mémorisés ni figés ; 3 : fin d'historique (tail) évaluée par le moteur
+
+
+class FullRecompute(Exception):
+    """L'état ne permet pas un calcul incrémental."""
+
+
+@dataclass
+class AgentState:
+    first_week: int             # n° de semaine continu de la 1re vacation (cf. schedule_engine.week_number)
+    last_day: int               # jours depuis l'epoch
+    last_start: int             # minutes depuis minuit de la dernière vacation
+    # colonnes [jours, débuts, fins, pauses] des vacations depuis le début de la série de jours
+    # consécutifs en cours et des 11 semaines précédant la dernière : tout ce que les règles relisent
+    tail: List[List[int]] = field(default_factory=list)
+    total_min: int = 0
+    days_worked: int = 0
+    weeks_count: int = 0
+    violations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _iso_week_label(week_no: int) -> str:
+    y, w, _ = date.fromordinal(week_no * 7 - 3 + EPOCH_ORDINAL).isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def _day_iso(day: int) -> str:
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def _kept(st: AgentState, first_day: int, from_week: int) -> List[Dict[str, Any]]:
+    """Violations de l'état (dicts) hors des journées / semaines / fenêtres recalculées."""
+    day_iso, week_iso, from_iso = _day_iso(first_day), _iso_week_label(week_number(first_day)), _iso_week_label(from_week)
+    kept = []
+    for v in st.violations:
+        if v["type"] == "DAILY_MAX" and v["date"] >= day_iso:
+            continue
+        if v["type"] == "WEEKLY_MAX" and v["week"] >= week_iso:
+            continue
+        if v["type"] == "AVG_12W" and v["week"].split("→")[1] >= from_iso:
+            continue
+        kept.append(v)
+    return kept
+
+
+def _advance(agents: Dict[str, AgentState], shifts: List[Shift], plan) -> None:
+    """
+    Applique le plan de règles aux nouvelles vacations (triées) d'un paquet d'agents
+    entiers et met leur état à jour. La table évaluée est la fin d'historique de chaque
+    agent suivie de ses nouvelles vacations : les accumulateurs du moteur y sont exacts
+    pour tout ce que touchent les nouvelles vacations, dont on garde seules les violations.
+    """
+    rows = [
+        Shift(a, *sh)
+        for a in dict.fromkeys(sh.agent_id for sh in shifts) if a in agents
+        for sh in zip(*agents[a].tail)
+    ]
+    table = ShiftTable.from_shifts(rows)
+    table.extend(shifts)
+    t = build_table(table)  # trie aussi `table`
+    names: List[str] = t["agents"].tolist()
+    states = [agents.get(a) for a in names]
+    n = len(names)
+    off = np.searchsorted(t["agent"], np.arange(n + 1))
+
+    # vacations nouvelles : après la dernière connue de l'agent, donc en fin de ses lignes
+    last = np.array([st.last_day * MINUTES_PER_DAY + st.last_start if st else -1 for st in states], dtype=np.int64)
+    is_new = t["start"] > last[t["agent"]]
+    first_new = off[1:] - np.bincount(t["agent"][is_new], minlength=n)
+    first_day = t["day"][first_new]
+    since = np.array([st.first_week if st else w for st, w in zip(states, week_number(t["day"][off[:-1]]).tolist())], dtype=np.int64)
+    # fenêtres de 12 semaines à recalculer : celles qui se terminent après la dernière
+    # semaine connue (semaines sans vacation comprises) ou sur une semaine touchée
+    from_week = week_number(first_day)
+    for i, st in enumerate(states):
+        if st is not None:
+            from_week[i] = min(from_week[i], week_number(st.last_day) + 1)
+
+    sw = plan.sweep({**t, "since_wk": since})
+    d, w, r = sw.daily, sw.weekly, sw.rolling12
+    d_new = is_new[d["idx"]]          # journée commencée par une nouvelle vacation
+    w_new = d_new[w["idx"]]
+    keep = {  # par section de sortie (vacations, journées, semaines, fenêtres)
+        RULES["DAILY_REST"].section: is_new,
+        RULES["DAILY_MAX"].section: d["day"] >= first_day[d["agent"]],
+        RULES["WEEKLY_MAX"].section: w["wk"] >= week_number(first_day)[w["agent"]],
+        RULES["AVG_12W"].section: r["wk"] >= from_week[r["agent"]],
+    }
+    codes, violations = plan.violations(sw, keep)
+    v_off = np.searchsorted(codes, np.arange(n + 1)).tolist()
+
+    added_min = np.bincount(t["agent"][is_new], weights=sw.shift_minutes[is_new], minlength=n).astype(np.int64).tolist()
+    added_days = np.bincount(d["agent"][d_new], minlength=n).tolist()
+    added_weeks = np.bincount(w["agent"][w_new], minlength=n).tolist()
+
+    # fin d'historique conservée : début de la série en cours et 11 semaines avant la dernière
+    d_last = np.append(d["agent"][1:] != d["agent"][:-1], True)
+    streak_last = sw.streak[d_last]
+    last_day = d["day"][d_last]
+    tail_from = np.minimum(last_day - streak_last + 1, (week_number(last_day) - 11) * 7 - 3)
+    in_tail = t["day"] >= tail_from[t["agent"]]
+    tail_lo = (off[1:] - np.bincount(t["agent"][in_tail], minlength=n)).tolist()
+    cols = [c.tolist() for c in (table.day, table.start, table.end, table.break_min)]
+    for i, a in enumerate(names):
+        st = states[i]
+        new = [v.model_dump() for v in violations[v_off[i]:v_off[i + 1]]]
+        if st is not None:
+            merged = _kept(st, int(first_day[i]), int(from_week[i])) + new
+            new = sorted(merged, key=lambda v: RULES[v["type"]].section)  # tri stable : anciennes d'abord
+        hi = int(off[i + 1])
+        agents[a] = AgentState(
+            first_week=int(since[i]),
+            last_day=cols[0][hi - 1],
+            last_start=cols[1][hi - 1],
+            tail=[c[tail_lo[i]:hi] for c in cols],
+            total_min=(st.total_min if st else 0) + added_min[i],
+            days_worked=(st.days_worked if st else 0) + added_days[i],
+            weeks_count=(st.weeks_count if st else 0) + added_weeks[i],
+            violations=new,
+        )
+
+
+def _state_path(company_folder: str, S) -> Path:
+    safe = re.sub(r"[^\w.-]+", "_", company_folder).strip("_")[:80] or "dossier"
+    digest = hashlib.sha1(company_folder.encode("utf-8")).hexdigest()[:10]
+    return Path(S.SCHEDULE_STATE_DIR) / f"{safe}-{digest}.json"
+
+
+def _fingerprint(p: Path) -> str:
+    st = p.stat()
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def _load(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == STATE_VERSION else None
+
+
+def _save(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # fichier temporaire propre à l'écriture : deux requêtes du même dossier ne se marchent pas dessus
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False))  # encodeur C (json.dump passe par l'encodeur Python)
+        os.replace(tmp, path)  # écriture atomique
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _apply(agents: Dict[str, AgentState], paths: List[Path], S, errors: List[Dict[str, str]], parsing: Dict[str, int]) -> None:
+    """
+    Nouvelles vacations par paquets d'agents entiers d'au moins SCHEDULE_SORT_SPILL_ROWS
+    vacations (cf. schedule_checker._evaluate_bounded) ; FullRecompute si l'une d'elles
+    n'est pas postérieure à l'historique de son agent.
+    """
+    plan = compile_plan(S)
+    limit = max(1, S.SCHEDULE_SORT_SPILL_ROWS)
+    batch: List[Shift] = []
+    for agent, grp in groupby(iter_sorted_shifts(paths, S, errors, parsing), key=attrgetter("agent_id")):
+        grp = list(grp)
+        st = agents.get(agent)
+        if st is not None and (grp[0].day, grp[0].start) <= (st.last_day, st.last_start):
+            raise FullRecompute(f"vacations antérieures à l'historique pour {agent}")
+        batch.extend(grp)
+        if len(batch) >= limit:
+            _advance(agents, batch, plan)
+            batch = []
+    if batch:
+        _advance(agents, batch, plan)
+
+
+def _result(agents: Dict[str, AgentState], errors: List[Dict[str, str]], mode: str, new_files: int,
+            parsing: Dict[str, int]) -> SchedulesCheckResult:
+    names = sorted(agents)
+    return SchedulesCheckResult(
+        agents=names,
+        stats=[
+            ScheduleStat(
+                agent_id=a,
+                total_hours=round(agents[a].total_min/60.0, 2),
+                days_worked=agents[a].days_worked,
+                weeks_count=agents[a].weeks_count,
+            )
+            for a in names
+        ],
+        violations=[ScheduleViolation(**v) for a in names for v in agents[a].violations],
+        extras={
+            **({"file_errors": errors} if errors else {}),
+            **({"slow_path_cells": parsing["slow_path_cells"]} if parsing.get("slow_path_cells") else {}),
+            **({"pdf_backends": pdf_backends(parsing)} if pdf_backends(parsing) else {}),
+            "incremental": {"mode": mode, "new_files": new_files},
+        },
+    )
+
+
+def check_schedules_incremental(company_folder: str, paths: Iterable[Path], full: bool = False) -> SchedulesCheckResult:
+    """
+    Contrôle des plannings d'un dossier entreprise avec réutilisation de l'état persistant.
+    - full=True : ignore l'état et recalcule tout l'historique
+    extras["incremental"]["mode"] : "full" | "incremental" | "cached" (aucun nouveau fichier)
+    """
+    S = get_settings()
+    paths = sorted(Path(p) for p in paths)
+    files = {str(p): _fingerprint(p) for p in paths}
+    state_file = _state_path(company_folder, S)
+
+    data = None if full else _load(state_file)
+    if data is not None:
+        known = data["files"]
+        unchanged = all(files.get(f) == fp for f, fp in known.items())
+        if data["thresholds"] != thresholds(S) or not unchanged:
+            data = None
+
+    agents: Dict[str, AgentState] = {}
+    errors: List[Dict[str, str]] = []
+    parsing: Dict[str, int] = {}  # fichiers lus pendant cet appel seulement
+    mode = "full"
+    new_paths = paths
+    if data is not None:
+        new_paths = [p for p in paths if str(p) not in data["files"]]
+        agents = {a: AgentState(**st) for a, st in data["agents"].items()}
+        mode = "incremental" if new_paths else "cached"
+        if new_paths:
+            try:
+                _apply(agents, new_paths, S, errors, parsing)
+            except FullRecompute:
+                agents, errors, mode, new_paths = {}, [], "full", paths
+                parsing = {}
+
+    if mode == "full":
+        _apply(agents, paths, S, errors, parsing)
+
+    if mode != "cached":
+        failed = {e["file"] for e in errors}
+        _save(state_file, {
+            "version": STATE_VERSION,
+            "thresholds": thresholds(S),
+            "files": {f: fp for f, fp in files.items() if Path(f).name not in failed},
+            "agents": {a: vars(st) for a, st in agents.items()},  # champs déjà sérialisables : pas de copie
+        })
+    return _result(agents, errors, mode, len(new_paths) if mode != "cached" else 0, parsing)
+
+
+def reset_state(company_folder: str) -> bool:
+    """Supprime l'état persistant d'un dossier (le prochain contrôle sera complet)."""
+    path = _state_path(company_folder, get_settings())
+    if path.exists():
+        path.unlink()
+        return True
+    return False
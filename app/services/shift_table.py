@@ -0,0 +1,183 @@
+# app/services/shift_table.py
+"""
+Table compacte de vacations, en colonnes typées parallèles.
+
+Un dict Python par vacation (date, datetime, chaînes) coûte 600+ octets ; ici une
+vacation occupe 14 octets :
+- agent     : int32, index dans `agents` (identifiants internés)
+- day       : int32, jours depuis le 1970-01-01
+- start/end : int16, minutes depuis minuit (fin <= début => vacation de nuit)
+- break_min : int16, minutes de pause
+
+Les ajouts passent par des buffers `array` (rapides) vidés dans les colonnes NumPy
+à la lecture ; tri et découpage par agent se font sans objet Python par ligne.
+"""
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+INT16_MAX = 32767
+
+_COLUMNS: Tuple[Tuple[str, str, type], ...] = (
+    ("agent", "i", np.int32),
+    ("day", "i", np.int32),
+    ("start", "h", np.int16),
+    ("end", "h", np.int16),
+    ("break_min", "h", np.int16),
+)
+
+
+class Shift(NamedTuple):
+    """Vacation normalisée (compacte, picklable pour le tri externe)."""
+    agent_id: str
+    day: int        # jours depuis le 1970-01-01
+    start: int      # minutes depuis minuit
+    end: int        # minutes depuis minuit (fin < début => vacation de nuit)
+    break_min: int
+
+
+class ShiftTable:
+    """Colonnes typées de vacations ; voir le docstring du module."""
+
+    def __init__(self) -> None:
+        self.agents: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._cols: Dict[str, np.ndarray] = {name: np.zeros(0, dtype=dt) for name, _, dt in _COLUMNS}
+        self._pending: Dict[str, array] = {name: array(code) for name, code, _ in _COLUMNS}
+        self._sorted = True
+
+    @classmethod
+    def from_shifts(cls, shifts: Iterable[Shift]) -> "ShiftTable":
+        t = cls()
+        t.extend(shifts)
+        return t
+
+    @classmethod
+    def from_arrays(cls, agents: List[str], **columns: np.ndarray) -> "ShiftTable":
+        """Table depuis ses colonnes (agent = index dans `agents`), ex. relue d'un cache."""
+        t = cls()
+        t.agents = list(agents)
+        t._codes = {a: i for i, a in enumerate(t.agents)}
+        for name, _, dt in _COLUMNS:
+            t._cols[name] = np.asarray(columns[name], dtype=dt)
+        t._sorted = False
+        return t
+
+    # --- construction ---
+    def intern(self, agent_id: str) -> int:
+        code = self._codes.get(agent_id)
+        if code is None:
+            code = self._codes[agent_id] = len(self.agents)
+            self.agents.append(agent_id)
+        return code
+
+    def append(self, agent_id: str, day: int, start: int, end: int, break_min: int = 0) -> None:
+        p = self._pending
+        p["agent"].append(self.intern(agent_id))
+        p["day"].append(day)
+        p["start"].append(start)
+        p["end"].append(end)
+        p["break_min"].append(max(-INT16_MAX, min(int(break_min), INT16_MAX)))
+        self._sorted = False
+
+    def extend(self, shifts: Iterable[Shift]) -> None:
+        p = self._pending
+        agent, day, start, end, brk = p["agent"], p["day"], p["start"], p["end"], p["break_min"]
+        intern = self.intern
+        for sh in shifts:
+            agent.append(intern(sh.agent_id))
+            day.append(sh.day)
+            start.append(sh.start)
+            end.append(sh.end)
+            brk.append(max(-INT16_MAX, min(sh.break_min, INT16_MAX)))
+        self._sorted = False
+        self._flush()
+
+    def _flush(self) -> None:
+        if not len(self._pending["agent"]):
+            return
+        for name, code, dt in _COLUMNS:
+            buf = self._pending[name]
+            self._cols[name] = np.concatenate((self._cols[name], np.frombuffer(buf, dtype=dt)))
+            self._pending[name] = array(code)
+
+    # --- colonnes ---
+    def column(self, name: str) -> np.ndarray:
+        self._flush()
+        return self._cols[name]
+
+    agent = property(lambda self: self.column("agent"))
+    day = property(lambda self: self.column("day"))
+    start = property(lambda self: self.column("start"))
+    end = property(lambda self: self.column("end"))
+    break_min = property(lambda self: self.column("break_min"))
+
+    def __len__(self) -> int:
+        return len(self._cols["agent"]) + len(self._pending["agent"])
+
+    @property
+    def nbytes(self) -> int:
+        self._flush()
+        return sum(c.nbytes for c in self._cols.values())
+
+    # --- tri & découpage ---
+    def sort(self) -> None:
+        """
+        Tri stable par (agent, jour, début). Les codes agents sont renumérotés dans
+        l'ordre alphabétique des identifiants : `agents` est trié ensuite.
+        """
+        self._flush()
+        if self.agents != sorted(self.agents):
+            rank = np.empty(len(self.agents), dtype=np.int32)
+            rank[np.argsort(np.array(self.agents, dtype=object), kind="stable")] = np.arange(len(self.agents), dtype=np.int32)
+            self._cols["agent"] = rank[self._cols["agent"]]
+            self.agents = sorted(self.agents)
+            self._codes = {a: i for i, a in enumerate(self.agents)}
+        c = self._cols
+        order = np.lexsort((c["start"], c["day"], c["agent"]))
+        for name in c:
+            c[name] = c[name][order]
+        self._sorted = True
+
+    def agent_offsets(self) -> np.ndarray:
+        """Bornes par agent (table triée) : vacations de l'agent i dans [off[i], off[i+1])."""
+        if not self._sorted:
+            self.sort()
+        return np.searchsorted(self.agent, np.arange(len(self.agents) + 1), side="left")
+
+    def agent_slice(self, agent_id: str) -> slice:
+        off = self.agent_offsets()
+        code = self._codes[agent_id]
+        return slice(int(off[code]), int(off[code + 1]))
+
+    def iter_agents(self) -> Iterator[Tuple[str, slice]]:
+        off = self.agent_offsets().tolist()
+        for code, agent_id in enumerate(self.agents):
+            if off[code + 1] > off[code]:
+                yield agent_id, slice(off[code], off[code + 1])
+
+    def __iter__(self) -> Iterator[Shift]:
+        """Vacations sous forme de Shift (crée des objets : réservé aux consommateurs ligne à ligne)."""
+        names = self.agents
+        for a, d, s, e, b in zip(*(self.column(n).tolist() for n, _, _ in _COLUMNS)):
+            yield Shift(names[a], d, s, e, b)
+
+    # --- échanges ---
+    def to_frame(self):
+        """
+        DataFrame typé : agent_id (category), day (datetime64[D]), start/end/break_min (minutes).
+        """
+        import pandas as pd
+
+        self._flush()
+        c = self._cols
+        return pd.DataFrame({
+            "agent_id": pd.Categorical.from_codes(c["agent"], categories=pd.Index(self.agents, dtype=object))
+            if self.agents else pd.Categorical([]),
+            "day": c["day"].astype("datetime64[D]"),
+            "start_min": c["start"],
+            "end_min": c["end"],
+            "break_min": c["break_min"],
+        })
@@ -3,6 +3,8 @@ from pathlib import Path
 from typing import List, Optional
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from ..core.config import get_settings
+from ..core.executor import run_heavy
+from ..core.uploads import store_upload
 from ..models.schemas import SchedulesCheckResult
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
@@ -11,10 +13,19 @@ router = APIRouter(prefix="/schedules", tags=["schedules"])
 async def check(
     files: List[UploadFile] = File([]),
     company_folder: Optional[str] = Form(None),
+    full_recompute: bool = Form(False),
 ):
+    """
+    Contrôle des plannings envoyés ou d'un dossier d'upload.
+    Pour un dossier seul, l'état par dossier est réutilisé (seuls les nouveaux
+    fichiers sont évalués) ; full_recompute=true force le recalcul complet.
+    Des fichiers au contenu déjà contrôlé (mêmes seuils) renvoient le résultat en cache.
+    """
     # Import à l'intérieur pour éviter un crash au démarrage si le service n'est pas encore présent
     try:
         from ..services.schedule_checker import check_schedules
+        from ..services.schedule_state import check_schedules_incremental
+        from ..services.result_cache import cached_check
     except Exception as e:
         raise HTTPException(500, f"Module schedule_checker manquant: {e}")
 
@@ -26,8 +37,7 @@ async def check(
         tmp.mkdir(parents=True, exist_ok=True)
         for f in files:
             p = tmp / (f.filename or "planning.csv")
-            p.write_bytes(await f.read())
-            paths.append(p)
+            paths.append(await store_upload(f, p))
 
     # Ou lecture d’un dossier d’upload existant
     if company_folder:
@@ -45,4 +55,15 @@ async def check(
     if not paths:
         raise HTTPException(400, "Aucun planning fourni (fichiers ou company_folder).")
 
-    return check_schedules(paths)
+    if company_folder and not files:
+        if full_recompute:
+            return await run_heavy(check_schedules_incremental, company_folder, paths, full=True)
+        return await run_heavy(cached_check, paths, lambda: check_schedules_incremental(company_folder, paths))
+    return await run_heavy(cached_check, paths, lambda: check_schedules(paths))
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Cache des plannings : succès / échecs par niveau (vacations, PDF, résultats) et octets occupés."""
+    from ..services.result_cache import cache_stats as _cache_stats
+    return _cache_stats()
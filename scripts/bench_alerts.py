@@ -0,0 +1,103 @@
+# scripts/bench_alerts.py
+"""
+Benchmark de non-régression de detect_alerts (audit des plannings) : la passe
+d'alertes doit rester à peu près linéaire en nombre de vacations.
+
+    python scripts/bench_alerts.py [nb_lignes]
+
+Mesure build_daily + detect_alerts sur n/4, n/2 et n lignes et échoue si le
+temps par ligne à n dépasse MAX_PER_ROW_GROWTH fois celui à n/4. L'ancienne
+règle F (BREAK_20M : filtre de tout `daily` par agent-jour, O(jours × lignes))
+est mesurée à titre de comparaison sur au plus LEGACY_MAX_ROWS lignes.
+
+app/plannings/audit n'est pas un module importable : ses sections RuleSettings
+et règles sont chargées telles quelles depuis le fichier.
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+LEGACY_MAX_ROWS = 20_000
+MAX_PER_ROW_GROWTH = 2.0
+
+
+def load_audit_rules() -> types.ModuleType:
+    lines = (ROOT / "app" / "plannings" / "audit").read_text(encoding="utf-8").splitlines()
+    find = lambda prefix, after=0: next(i for i, l in enumerate(lines) if i >= after and l.startswith(prefix))
+    cfg = types.ModuleType("audit_config")
+    exec("\n".join(lines[find("from pydantic import BaseModel, Field"):find("SETTINGS = Settings()") + 1]), cfg.__dict__)
+    sys.modules["audit_config"] = cfg
+    start = find("from __future__ import annotations", find("SETTINGS = Settings()"))
+    end = find("from typing import List, Optional", start)
+    src = "\n".join(lines[start + 1:end])
+    src = src.replace("from .config import", "from audit_config import").replace("from ..services", "from app.services")
+    rules = types.ModuleType("audit_rules")
+    exec(src, rules.__dict__)
+    return rules
+
+
+def make_planning(n_rows: int, seed: int = 1) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    agents = max(n_rows // 200, 1)  # ~200 vacations par agent, comme un export annuel
+    starts = [f"{h:02d}:{m:02d}" for h in (6, 7, 8, 14, 20, 21, 22) for m in (0, 30)]
+    return pd.DataFrame({
+        "agent_id": [f"A{rnd.randrange(agents):04d}" for _ in range(n_rows)],
+        "date": [f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" for _ in range(n_rows)],
+        "start": [rnd.choice(starts) for _ in range(n_rows)],
+        "end": [rnd.choice(starts) for _ in range(n_rows)],
+        "pause_min": [rnd.choice([0, 10, 20, 30]) for _ in range(n_rows)],
+        "has_derogation_daily_12h": [rnd.random() < 0.2 for _ in range(n_rows)],
+        "is_minor": [rnd.random() < 0.05 for _ in range(n_rows)],
+        "is_night_worker": False,
+    })
+
+
+def legacy_break_rule(daily: pd.DataFrame, min_break: float) -> int:
+    """Ancienne règle F : un filtre complet de `daily` par agent-jour."""
+    dsum = daily.groupby(["agent_id", "work_day"], as_index=False).agg(hours=("hours_effective", "sum"))
+    n = 0
+    for _, r in dsum.iterrows():
+        if r["hours"] >= 6.0:
+            pauses = daily[(daily["agent_id"] == r["agent_id"]) & (daily["work_day"] == r["work_day"])]["pause_min"]
+            n += float(pauses.sum()) < min_break - 1e-6
+    return n
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rules = load_audit_rules()
+    per_row = {}
+    for n in (n_rows // 4, n_rows // 2, n_rows):
+        df = make_planning(n)
+        t_daily, daily = _timed(rules.build_daily, df)
+        t_alerts, alerts = _timed(rules.detect_alerts, daily)
+        per_row[n] = (t_daily + t_alerts) / n
+        print(f"{n:>9} lignes : build_daily {t_daily:6.2f} s  detect_alerts {t_alerts:6.2f} s  ({len(alerts)} alertes)")
+
+    small = rules.build_daily(make_planning(min(n_rows, LEGACY_MAX_ROWS)))
+    t_legacy, n_legacy = _timed(legacy_break_rule, small, rules.SETTINGS.rules.min_break_minutes_after_6h)
+    t_new, alerts = _timed(rules.detect_alerts, small)
+    assert n_legacy == sum(a["rule_id"] == "BREAK_20M" for a in alerts), "règle F : résultats différents"
+    print(f"ancienne règle F seule   : {t_legacy:.2f} s  contre toutes les règles : {t_new:.2f} s  ({len(small)} lignes)")
+
+    growth = per_row[n_rows] / per_row[n_rows // 4]
+    print(f"temps par ligne n / (n/4) : x{growth:.2f}  (limite x{MAX_PER_ROW_GROWTH})")
+    assert growth < MAX_PER_ROW_GROWTH, "detect_alerts n'est plus linéaire"
+
+
+if __name__ == "__main__":
+    main()
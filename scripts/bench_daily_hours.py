@@ -0,0 +1,112 @@
+# scripts/bench_daily_hours.py
+"""
+Benchmark des heures effectives / de nuit de l'audit des plannings (build_daily) :
+apply() ligne à ligne (deux parsings dateutil par horaire) contre la version en
+bloc (time_of_day_seconds + effective_hours, band_minutes pour la nuit).
+
+    python scripts/bench_daily_hours.py [nb_lignes]
+
+La version ligne à ligne est mesurée sur au plus ROW_WISE_MAX_ROWS lignes puis
+extrapolée ; les heures effectives sont comparées sur ces lignes. Les heures
+de nuit ne le sont pas : l'ancien calcul (fenêtres [21h, 23:59:59] du jour et
+[0h, 6h] du lendemain) ignorait une seconde par nuit et les vacations commencées
+après minuit, band_minutes mesure le recouvrement exact.
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from datetime import time as clock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from dateutil.parser import parse as dt_parse  # noqa: E402
+
+from app.services.column_formats import time_of_day_seconds  # noqa: E402
+from app.services.schedule_engine import (  # noqa: E402
+    band_minutes, clock_band, clock_end, effective_hours,
+)
+
+ROW_WISE_MAX_ROWS = 20_000
+NIGHT_START, NIGHT_END = 21, 6
+
+
+def make_planning(n_rows: int, seed: int = 1) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    starts = [f"{h:02d}:{m:02d}" for h in (6, 7, 8, 14, 20, 21, 22) for m in (0, 30)]
+    return pd.DataFrame({
+        "agent_id": [f"A{i % 2000:04d}" for i in range(n_rows)],
+        "date": [f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}" for i in range(n_rows)],
+        "start": [rnd.choice(starts) for _ in range(n_rows)],
+        "end": [rnd.choice(starts) for _ in range(n_rows)],
+        "pause_min": [rnd.choice([0, 20, 30, 45]) for _ in range(n_rows)],
+    })
+
+
+# ancienne version de l'audit : compute_effective_hours / compute_night_hours via apply()
+def _to_dt(date_str: str, t_str: str) -> datetime:
+    return datetime.combine(dt_parse(date_str).date(), dt_parse(t_str).time())
+
+
+def _row_effective(row) -> float:
+    start_dt, end_dt = _to_dt(row["date"], row["start"]), _to_dt(row["date"], row["end"])
+    if end_dt <= start_dt:
+        end_dt += timedelta(days=1)
+    return max((end_dt - start_dt).total_seconds() / 3600.0 - float(row.get("pause_min", 0) or 0) / 60.0, 0.0)
+
+
+def _row_night(row) -> float:
+    start_dt, end_dt = _to_dt(row["date"], row["start"]), _to_dt(row["date"], row["end"])
+    if end_dt <= start_dt:
+        end_dt += timedelta(days=1)
+    day, next_day = start_dt.date(), start_dt.date() + timedelta(days=1)
+    windows = [
+        (datetime.combine(day, clock(NIGHT_START)), datetime.combine(day, clock(23, 59, 59))),
+        (datetime.combine(next_day, clock(0)), datetime.combine(next_day, clock(NIGHT_END))),
+    ]
+    return sum(max((min(end_dt, b) - max(start_dt, a)).total_seconds(), 0) for a, b in windows) / 3600.0
+
+
+def row_wise(df: pd.DataFrame) -> np.ndarray:
+    return np.column_stack([df.apply(_row_effective, axis=1), df.apply(_row_night, axis=1)])
+
+
+def vectorized(df: pd.DataFrame) -> np.ndarray:
+    start_s, end_s = time_of_day_seconds(df["start"]), time_of_day_seconds(df["end"])
+    base = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]").astype(np.int64) * 1440.0
+    night = band_minutes(
+        base + start_s / 60.0, base + clock_end(start_s, end_s) / 60.0,
+        {"night": clock_band(NIGHT_START * 60, NIGHT_END * 60)},
+    )["night"]
+    return np.column_stack([effective_hours(start_s, end_s, df["pause_min"].to_numpy()), night / 60.0])
+
+
+def _timed(fn, df: pd.DataFrame):
+    t0 = time.perf_counter()
+    out = fn(df)
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_planning(n_rows)
+    t_new, _ = _timed(vectorized, df)
+    small = df.head(ROW_WISE_MAX_ROWS)
+    t_old, expected = _timed(row_wise, small)
+    _, got = _timed(vectorized, small)
+    assert np.array_equal(got[:, 0], expected[:, 0]), "heures effectives différentes"
+    drift = np.abs(got[:, 1] - expected[:, 1]).max()
+    t_old_full = t_old * n_rows / len(small)
+
+    print(f"en bloc                  : {t_new:.3f} s  ({n_rows} lignes, {n_rows / t_new:,.0f} lignes/s)")
+    print(f"apply() ligne à ligne    : {t_old:.2f} s  ({len(small)} lignes) -> ~{t_old_full:.1f} s pour {n_rows}")
+    print(f"accélération             : x{t_old_full / t_new:.0f}  (heures effectives identiques)")
+    print(f"écart max heures de nuit : {drift:.4f} h  (recouvrement exact contre anciennes fenêtres)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# scripts/bench_xlsx_reader.py
+"""
+Benchmark lecture XLSX des plannings : mode complet + ws.cell() (ancien lecteur)
+contre read_only + iter_rows(values_only=True) (_iter_xlsx).
+
+    python scripts/bench_xlsx_reader.py [nb_lignes]
+
+L'ancien lecteur recalcule ws.max_column à chaque ligne (coût quadratique) :
+il est mesuré sur au plus LEGACY_MAX_ROWS lignes, sinon il ne termine pas
+en temps raisonnable sur 100k lignes.
+"""
+from __future__ import annotations
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import openpyxl  # noqa: E402
+
+from app.services.schedule_checker import _iter_xlsx, _norm_header  # noqa: E402
+
+LEGACY_MAX_ROWS = 10_000
+
+
+def make_workbook(path: Path, n_rows: int, n_sheets: int = 1, title_rows: bool = False) -> None:
+    wb = openpyxl.Workbook(write_only=True)
+    per_sheet = n_rows // n_sheets
+    d0 = date(2025, 1, 1)
+    for s in range(n_sheets):
+        ws = wb.create_sheet(f"Mois {s + 1}")
+        if title_rows:
+            ws.append(["Planning agents — export"])
+            ws.append([])
+        ws.append(["Matricule", "Date", "Début", "Fin", "Pause (min)"])
+        for i in range(per_sheet):
+            d = d0 + timedelta(days=s * 30 + i % 30)
+            ws.append([f"A{i % 2000:04d}", d.strftime("%d/%m/%Y"), "08:00", "18:30", 30])
+    wb.save(path)
+
+
+def legacy_read(path: Path) -> int:
+    """Ancien lecteur : load_workbook complet, feuille active, ws.cell() par cellule."""
+    wb = openpyxl.load_workbook(path)
+    ws = wb.active
+    header_map = {j: _norm_header(str(c.value)) for j, c in enumerate(ws[1], 1) if c.value}
+    n = 0
+    for i in range(2, ws.max_row + 1):
+        rec = {}
+        for j in range(1, ws.max_column + 1):
+            key = header_map.get(j)
+            if key:
+                val = ws.cell(row=i, column=j).value
+                rec[key] = str(val) if val is not None else ""
+        n += 1
+    return n
+
+
+def _timed(fn, path: Path):
+    t0 = time.perf_counter()
+    n = fn(path)
+    return time.perf_counter() - t0, n
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1) une feuille, en-têtes en ligne 1 (format lu par l'ancien lecteur)
+        path = Path(tmp) / "planning.xlsx"
+        make_workbook(path, n_rows)
+        t_new, n_new = _timed(lambda p: sum(1 for _ in _iter_xlsx(p)), path)
+        small = Path(tmp) / "planning_small.xlsx"
+        make_workbook(small, min(n_rows, LEGACY_MAX_ROWS))
+        t_old, n_old = _timed(legacy_read, small)
+        t_new_small, _ = _timed(lambda p: sum(1 for _ in _iter_xlsx(p)), small)
+
+        # 2) classeur réaliste : 6 feuilles mensuelles avec lignes de titre
+        multi = Path(tmp) / "planning_6mois.xlsx"
+        make_workbook(multi, n_rows, n_sheets=6, title_rows=True)
+        t_multi, n_multi = _timed(lambda p: sum(1 for _ in _iter_xlsx(p)), multi)
+
+    print(f"read_only + iter_rows          : {t_new:.2f} s  ({n_new} lignes, {n_new / t_new:,.0f} lignes/s)")
+    print(f"ancien lecteur (mode complet)  : {t_old:.2f} s  ({n_old} lignes, {n_old / t_old:,.0f} lignes/s)")
+    print(f"accélération à {n_old} lignes   : x{t_old / t_new_small:.1f}")
+    print(f"6 feuilles + titres (read_only): {t_multi:.2f} s  ({n_multi} lignes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_schedule_cache(tmp_path, monkeypatch):
+    # cache des plannings désactivé par défaut : chaque test relit ses fichiers
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_DIR", str(tmp_path / "schedule_cache"))
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_MAX_BYTES", "0")
@@ -0,0 +1,46 @@
+from app.services.column_formats import ColumnParser, infer_date_format, infer_time_format, parse_dates, parse_times
+from app.services.schedule_checker import check_schedules
+
+
+def test_formats_inferred_per_column():
+    assert infer_date_format(["01/08/2025", "02/08/2025", ""]) == "%d/%m/%Y"
+    assert infer_date_format(["01.08.25", "02-08-25"]) == "%d/%m/%y"
+    assert infer_date_format(["2025-08-01"]) == "%Y-%m-%d"
+    assert infer_date_format(["45870", "45871"]) == "excel"
+    assert infer_time_format(["8h30", "17h00"]) == "h"
+    assert infer_time_format(["08.30"]) == "."
+    assert infer_time_format([0.25, 0.5]) == "excel"
+
+
+def test_outliers_take_the_slow_path_and_are_counted():
+    days, valid, slow = parse_dates(["01/08/2025", "2025-08-02", "", "n/a", "03/08/2025"])
+    assert valid.tolist() == [True, True, False, False, True]
+    assert days[valid].tolist() == [20301, 20302, 20303]
+    assert slow == 2  # "2025-08-02" (rattrapée) et "n/a" ; la cellule vide ne compte pas
+
+    minutes, valid, slow = parse_times(["08:30", "8h30", "24:00", 0.75])
+    assert minutes[valid].tolist() == [510, 510, 1080]
+    assert slow == 3
+
+
+def test_column_parser_keeps_format_across_chunks():
+    p = ColumnParser("time")
+    p.parse(["22h00", "06h00"])
+    assert p.fmt == "h"
+    p.parse(["07h15", "07:15"])
+    assert p.slow == 1
+
+
+def test_check_schedules_reports_slow_path_cells(tmp_path):
+    f = tmp_path / "p.csv"
+    f.write_text(
+        "agent_id,date,start_time,end_time,break_minutes\n"
+        "A1,01/08/2025,8h00,12h00,0\n"
+        "A1,2025-08-02,8h00,12h00,0\n"
+        "A1,03/08/2025,08:00,12h00,0\n",
+        encoding="utf-8",
+    )
+    for engine in ("numpy", "legacy"):
+        res = check_schedules([f], engine=engine)
+        assert res.stats[0].days_worked == 3
+        assert res.extras["slow_path_cells"] == 2
@@ -0,0 +1,85 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse as dt_parse
+
+from app.services.column_formats import time_of_day_seconds
+from app.services.schedule_engine import (
+    EPOCH_ORDINAL, band_minutes, clock_band, effective_hours, holiday_band, sunday_band,
+)
+
+
+# version ligne à ligne de l'audit des plannings (compute_effective_hours)
+def _to_dt(date_str, t_str):
+    return datetime.combine(dt_parse(date_str).date(), dt_parse(t_str).time())
+
+
+def _row_effective(row):
+    start_dt = _to_dt(row["date"], row["start"])
+    end_dt = _to_dt(row["date"], row["end"])
+    if end_dt <= start_dt:
+        end_dt += timedelta(days=1)
+    return max((end_dt - start_dt).total_seconds() / 3600.0 - float(row["pause_min"] or 0) / 60.0, 0.0)
+
+
+def _random_planning(n, seed=3):
+    rnd = random.Random(seed)
+    clock = lambda: rnd.choice(["{:02d}:{:02d}", "{}:{:02d}", "{}h{:02d}", "{:02d}:{:02d}:30"]).format(
+        rnd.randrange(24), rnd.choice([0, 15, 30, 45, 59]))
+    return pd.DataFrame({
+        "agent_id": [f"A{rnd.randrange(20)}" for _ in range(n)],
+        "date": [f"2025-07-{rnd.randint(1, 28):02d}" for _ in range(n)],
+        "start": [clock() for _ in range(n)],
+        "end": [clock() for _ in range(n)],
+        "pause_min": [rnd.choice([0, 20, 30, 45, 600]) for _ in range(n)],
+    })
+
+
+def test_vectorized_effective_hours_match_row_wise_audit():
+    df = _random_planning(3000)
+    df.loc[0, ["start", "end", "pause_min"]] = ["08:00", "08:00", 0]  # fin = début : 24 h
+    expected = np.array([_row_effective(r) for _, r in df.iterrows()])
+
+    start_s, end_s = time_of_day_seconds(df["start"]), time_of_day_seconds(df["end"])
+    np.testing.assert_array_equal(effective_hours(start_s, end_s, df["pause_min"].to_numpy()), expected)
+    assert expected[0] == 24.0
+
+
+def _at(day: date, hour: float) -> float:
+    return (day.toordinal() - EPOCH_ORDINAL) * 1440.0 + hour * 60
+
+
+def test_band_minutes_exact_overlap():
+    sat, sun = date(2025, 7, 5), date(2025, 7, 6)
+    start = np.array([_at(sat, 1), _at(sat, 20), _at(sat, 22), _at(sat, 8), _at(sat, 23.5)])
+    end = np.array([_at(sat, 5), _at(sat, 31), _at(sat, 30), _at(sat, 38), _at(sat, 23.75)])
+    got = band_minutes(start, end, {
+        "night": clock_band(21 * 60, 6 * 60),
+        "minor_night": clock_band(22 * 60, 6 * 60),
+        "day": clock_band(6 * 60, 21 * 60),
+        "sunday": sunday_band(),
+        "holiday": holiday_band([sun]),
+    })
+    np.testing.assert_array_equal(got["night"] / 60, [4, 9, 8, 9, 0.25])  # 01h–05h compté en entier
+    np.testing.assert_array_equal(got["minor_night"] / 60, [4, 8, 8, 8, 0.25])
+    np.testing.assert_array_equal(got["day"] / 60, [0, 2, 0, 21, 0])  # 30 h : deux journées
+    np.testing.assert_array_equal(got["sunday"] / 60, [0, 7, 6, 14, 0])
+    np.testing.assert_array_equal(got["holiday"], got["sunday"])
+
+
+def test_band_minutes_match_minute_by_minute_count():
+    rnd = random.Random(5)
+    origin = date(2025, 12, 20).toordinal() - EPOCH_ORDINAL
+    start = np.array([origin * 1440 + rnd.randrange(20 * 1440) for _ in range(200)], dtype=float)
+    end = start + np.array([rnd.randrange(3000) for _ in range(200)])
+    holidays = [date(2025, 12, 25), date(2026, 1, 1)]
+    got = band_minutes(start, end, {"night": clock_band(21 * 60, 6 * 60), "off": holiday_band(holidays)})
+
+    hol = {d.toordinal() - EPOCH_ORDINAL for d in holidays}
+    for i, (a, b) in enumerate(zip(start.astype(int), end.astype(int))):
+        minutes = np.arange(a, b)
+        clock = minutes % 1440
+        assert got["night"][i] == np.count_nonzero((clock >= 21 * 60) | (clock < 6 * 60))
+        assert got["off"][i] == np.count_nonzero(np.isin(minutes // 1440, list(hol)))
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import executor as executor_mod
+from app.core.executor import BoundedExecutor, PoolSaturated, get_process_budget, run_heavy
+
+
+def test_bounded_executor_rejects_when_queue_full(monkeypatch):
+    release = threading.Event()
+    pool = BoundedExecutor(workers=1, queue_depth=1)
+    monkeypatch.setattr(executor_mod, "_executor", pool)
+    monkeypatch.setenv("CSI_WORK_POOL_RETRY_AFTER_S", "7")
+
+    async def scenario():
+        running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        with pytest.raises(PoolSaturated):
+            await pool.run(lambda: None)
+        with pytest.raises(HTTPException) as exc:
+            await run_heavy(lambda: None)
+        assert exc.value.status_code == 503
+        assert exc.value.headers == {"Retry-After": "7"}
+
+        # la boucle n'est pas bloquée pendant ce temps
+        assert await asyncio.wait_for(asyncio.sleep(0, result="ok"), 1) == "ok"
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        assert await run_heavy(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_nested_pools_share_one_process_budget(monkeypatch):
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "4")
+    budget = get_process_budget()
+    assert budget.acquire(3) == 3
+    assert budget.acquire(8) == 0  # 1 seul restant : séquentiel, rien de réservé
+    assert get_process_budget() is budget and budget.free == 1
+    budget.release(3)
+    assert budget.acquire(8) == 4
+    budget.release(4)
+
+    monkeypatch.setattr(executor_mod, "_in_worker", True)  # dans un worker : pas de pool imbriqué
+    assert get_process_budget().acquire(2) == 0
+
+
+def test_cancelled_request_keeps_its_slot_until_the_thread_ends():
+    release = threading.Event()
+    pool = BoundedExecutor(workers=1, queue_depth=0)
+
+    async def scenario():
+        task = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert pool.pending == 1  # le thread tourne encore
+        with pytest.raises(PoolSaturated):
+            await pool.run(lambda: None)
+        release.set()
+        for _ in range(100):
+            if not pool.pending:
+                break
+            await asyncio.sleep(0.01)
+        assert await pool.run(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
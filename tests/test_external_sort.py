@@ -0,0 +1,18 @@
+import random
+from operator import itemgetter
+
+from app.services.external_sort import external_sort
+
+
+def test_external_sort_spills_and_stays_stable(tmp_path):
+    rnd = random.Random(3)
+    items = [(rnd.randrange(20), i) for i in range(5000)]
+    out = list(external_sort(items, key=itemgetter(0), max_in_memory=300, tmp_dir=str(tmp_path)))
+    assert out == sorted(items, key=itemgetter(0))
+    assert list(tmp_path.iterdir()) == []  # runs supprimés après la fusion
+
+
+def test_external_sort_in_memory_below_threshold(tmp_path):
+    out = list(external_sort([3, 1, 2], max_in_memory=10, tmp_dir=str(tmp_path)))
+    assert out == [1, 2, 3]
+    assert list(tmp_path.iterdir()) == []
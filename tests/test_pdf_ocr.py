@@ -0,0 +1,88 @@
+import pytest
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from app.services import pdf_ocr, pdf_schedule_parser
+from app.services.pdf_schedule_parser import extract_rows_from_pdf, table_from_words
+
+# mots tels que rendus par tesseract : (texte, x0, top, x1, bottom)
+WORDS = [
+    ("Planning", 100, 20, 180, 40), ("août", 190, 20, 230, 40), ("2025", 240, 20, 290, 40),
+    ("Matricule", 100, 100, 190, 120), ("Date", 260, 100, 300, 120),
+    ("Heure", 400, 100, 450, 120), ("début", 455, 100, 500, 120), ("Fin", 560, 100, 590, 120),
+    ("A1", 100, 140, 125, 160), ("01/08/2025", 260, 141, 360, 161), ("8h00", 400, 139, 440, 159), ("17h30", 560, 140, 610, 160),
+    ("A2", 100, 180, 125, 200), ("02/08/2025", 260, 180, 360, 200), ("22h00", 400, 180, 450, 200), ("06h00", 560, 181, 610, 201),
+]
+
+
+def test_words_to_table_rebuilds_cells():
+    table = table_from_words(WORDS)
+    assert table == [
+        ["Matricule", "Date", "Heure début", "Fin"],
+        ["A1", "01/08/2025", "8h00", "17h30"],
+        ["A2", "02/08/2025", "22h00", "06h00"],
+    ]
+
+
+def _scanned_pdf(path):
+    c = canvas.Canvas(str(path), pagesize=A4)
+    c.drawImage(ImageReader(Image.new("L", (200, 100), 255)), 50, 500)
+    c.showPage()
+    c.save()
+    return path
+
+
+def test_scanned_pages_go_through_ocr_with_page_cache(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(pdf_ocr, "ocr_available", lambda: True)
+    monkeypatch.setattr(pdf_schedule_parser, "ocr_available", lambda: True)
+    monkeypatch.setattr(pdf_ocr, "_ocr_png", lambda png, lang, timeout: calls.append(png) or list(WORDS))
+    monkeypatch.setenv("CSI_OCR_WORKERS", "1")
+    monkeypatch.setenv("CSI_OCR_DPI", "50")
+    path = _scanned_pdf(tmp_path / "scan.pdf")
+
+    rows = extract_rows_from_pdf(path, workers=1)
+    assert [(r["agent_id"], r["date"], r["start_time"], r["end_time"]) for r in rows] == [
+        ("A1", "2025-08-01", "08:00", "17:30"),
+        ("A2", "2025-08-02", "22:00", "06:00"),
+    ]
+
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_MAX_BYTES", "10000000")
+    pdf_ocr.ocr_page_words(path, [0])
+    pdf_ocr.ocr_page_words(path, [0])
+    assert len(calls) == 2  # 1er appel sans cache, puis une seule OCR pour deux lectures
+
+
+def test_pages_rendered_in_chunks_and_cached_pages_not_encoded(tmp_path, monkeypatch):
+    events = []
+    render, png = pdf_ocr._render_page, pdf_ocr._png
+    monkeypatch.setattr(pdf_ocr, "_render_page", lambda doc, i, *a: events.append(("render", i)) or render(doc, i, *a))
+    monkeypatch.setattr(pdf_ocr, "_png", lambda image: events.append("png") or png(image))
+    monkeypatch.setattr(pdf_ocr, "_ocr_png", lambda png, lang, timeout: events.append("ocr") or list(WORDS))
+    monkeypatch.setenv("CSI_OCR_WORKERS", "1")  # paquets de 2 pages
+    monkeypatch.setenv("CSI_OCR_DPI", "30")
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_MAX_BYTES", "10000000")
+    c = canvas.Canvas(str(tmp_path / "scan.pdf"), pagesize=A4)
+    for k in range(5):  # pages toutes différentes : empreintes distinctes
+        c.drawImage(ImageReader(Image.new("L", (200, 100), 40 * k)), 50, 500)
+        c.showPage()
+    c.save()
+
+    pdf_ocr.ocr_page_words(tmp_path / "scan.pdf", [0, 1])
+    events.clear()
+    words = pdf_ocr.ocr_page_words(tmp_path / "scan.pdf", range(5))
+    assert sorted(words) == [0, 1, 2, 3, 4]
+    assert events == [
+        ("render", 0), ("render", 1),                       # en cache : ni PNG ni OCR
+        ("render", 2), "png", ("render", 3), "png", "ocr", "ocr",
+        ("render", 4), "png", "ocr",
+    ]
+
+
+def test_scanned_pdf_without_ocr_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_schedule_parser, "ocr_available", lambda: False)
+    path = _scanned_pdf(tmp_path / "scan.pdf")
+    with pytest.raises(ValueError, match="PDF scanné sans couche texte : OCR indisponible"):
+        extract_rows_from_pdf(path, workers=1)
@@ -0,0 +1,158 @@
+import pytest
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+from app.services.pdf_schedule_parser import (
+    PdfTooLarge, extract_rows_from_pdf, iter_rows_from_pdf, pdf_backends,
+)
+
+
+def _write_pdf(path, n_rows=150):
+    data = [["Matricule", "Date", "Début", "Fin", "Pause"]]
+    data += [[f"A{i % 4}", f"{1 + i % 28:02d}/08/2025", "8h00", "17h30", "30"] for i in range(n_rows)]
+    table = Table(data)  # pas de repeatRows : l'en-tête n'est que sur la 1re page
+    table.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black)]))
+    SimpleDocTemplate(str(path), pagesize=A4).build([table])
+    return path
+
+
+def test_table_continued_without_header_keeps_mapping(tmp_path):
+    rows = extract_rows_from_pdf(_write_pdf(tmp_path / "p.pdf"), workers=1)
+    assert len(rows) == 150
+    assert rows[-1] == {
+        "agent_id": "A1", "date": "2025-08-10",
+        "start_time": "08:00", "end_time": "17:30", "break_minutes": 30,
+    }
+
+
+def test_page_ranges_in_parallel_keep_page_order(tmp_path, monkeypatch):
+    path = _write_pdf(tmp_path / "p.pdf")
+    monkeypatch.setenv("CSI_PDF_PAGES_PER_CHUNK", "1")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "3")
+    assert extract_rows_from_pdf(path, workers=3) == extract_rows_from_pdf(path, workers=1)
+
+
+def test_header_locked_pages_match_full_detection(tmp_path, monkeypatch):
+    path = _write_pdf(tmp_path / "p.pdf", n_rows=120)
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID", "0")
+    monkeypatch.setenv("CSI_PDF_HEADER_LOCK", "0")
+    expected = extract_rows_from_pdf(path, workers=1)
+    monkeypatch.setenv("CSI_PDF_HEADER_LOCK", "1")
+    assert extract_rows_from_pdf(path, workers=1) == expected
+
+
+def test_page_with_other_columns_falls_back_to_full_detection(tmp_path, monkeypatch):
+    path = tmp_path / "p.pdf"
+    grid = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black)])
+    first = [["Matricule", "Date", "Début", "Fin", "Pause"]]
+    first += [[f"A{i % 4}", f"{1 + i % 28:02d}/08/2025", "8h00", "17h30", "30"] for i in range(90)]
+    # 2e tableau : une colonne de plus, bornes décalées
+    second = [["Matricule", "Nom", "Date", "Début", "Fin", "Pause"]]
+    second += [[f"B{i % 3}", "Durand", f"{1 + i % 28:02d}/09/2025", "21h00", "6h00", "20"] for i in range(30)]
+    SimpleDocTemplate(str(path), pagesize=A4).build(
+        [Table(first, style=grid), PageBreak(), Table(second, style=grid)]
+    )
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID", "0")
+    monkeypatch.setenv("CSI_PDF_HEADER_LOCK", "0")
+    expected = extract_rows_from_pdf(path, workers=1)
+    assert sum(r["agent_id"].startswith("B") for r in expected) == 30
+    monkeypatch.setenv("CSI_PDF_HEADER_LOCK", "1")
+    assert extract_rows_from_pdf(path, workers=1) == expected
+
+
+def test_text_grid_matches_table_detection_and_reports_backend(tmp_path, monkeypatch):
+    path = _write_pdf(tmp_path / "p.pdf")
+    stats = {}
+    rows = extract_rows_from_pdf(path, stats, workers=1)
+    assert stats["pdf_pages_pdfium"] > 1 and "pdf_pages_pdfplumber" not in stats
+    assert pdf_backends(stats)["pdfium"] == {"pages": stats["pdf_pages_pdfium"], "ms": stats["pdf_ms_pdfium"]}
+
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID", "0")
+    assert extract_rows_from_pdf(path, workers=1) == rows
+
+    # grille jugée peu fiable : repli pdfplumber page par page, même résultat
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID", "1")
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID_MIN_CONFIDENCE", "1.1")
+    stats = {}
+    assert extract_rows_from_pdf(path, stats, workers=1) == rows
+    assert "pdf_pages_pdfium" not in stats and stats["pdf_pages_pdfplumber"] > 1
+
+
+def test_extracted_rows_cached_by_digest_and_parser_version(tmp_path, monkeypatch):
+    from app.services import pdf_schedule_parser
+    from app.services.result_cache import cache_stats
+
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_MAX_BYTES", "10000000")
+    path = _write_pdf(tmp_path / "p.pdf", n_rows=60)
+    before = cache_stats()["levels"]["pdf"]
+    rows = extract_rows_from_pdf(path, workers=1)
+
+    monkeypatch.setattr(pdf_schedule_parser, "_iter_page_tables", lambda *a: (_ for _ in ()).throw(AssertionError("relu")))
+    assert extract_rows_from_pdf(path, workers=1) == rows
+    after = cache_stats()["levels"]["pdf"]
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 1)
+    assert after["entries"] == 1 and after["bytes"] > 0
+
+    monkeypatch.setattr(pdf_schedule_parser, "PDF_PARSER_VERSION", pdf_schedule_parser.PDF_PARSER_VERSION + 1)
+    with pytest.raises(AssertionError, match="relu"):
+        extract_rows_from_pdf(path, workers=1)
+
+
+def test_rows_streamed_page_by_page_and_pages_released(tmp_path, monkeypatch):
+    from app.services import pdf_schedule_parser
+
+    released = []
+    monkeypatch.setenv("CSI_PDF_TEXT_GRID", "0")
+    monkeypatch.setattr(pdf_schedule_parser, "_release", lambda page: (released.append(page.page_number), page.close()))
+    rows = iter_rows_from_pdf(_write_pdf(tmp_path / "p.pdf"), workers=1)
+    first = next(rows)
+    assert first["agent_id"] == "A0" and released == [1]
+    assert 1 + sum(1 for _ in rows) == 150
+    assert released == list(range(1, len(released) + 1)) and len(released) > 1
+
+
+def test_page_and_memory_guards_abort_cleanly(tmp_path, monkeypatch):
+    from app.services import pdf_schedule_parser
+
+    path = _write_pdf(tmp_path / "p.pdf")
+    monkeypatch.setenv("CSI_PDF_MAX_PAGES", "1")
+    with pytest.raises(PdfTooLarge, match="PDF_MAX_PAGES"):
+        extract_rows_from_pdf(path, workers=1)
+
+    monkeypatch.setenv("CSI_PDF_MAX_PAGES", "0")
+    monkeypatch.setenv("CSI_PDF_MAX_RSS_MB", "100")
+    monkeypatch.setattr(pdf_schedule_parser, "_rss_mb", lambda: 250.0)
+    extract_rows_from_pdf(path, workers=1)  # mémoire déjà occupée à l'ouverture : pas imputée à ce PDF
+
+    # processus serveur : sa croissance peut venir d'autres requêtes, pas de garde-fou
+    rss = iter([50.0, 250.0])
+    monkeypatch.setattr(pdf_schedule_parser, "_rss_mb", lambda: next(rss, 250.0))
+    assert len(extract_rows_from_pdf(path, workers=1)) == 150
+
+    # worker (lecture dans le thread d'un worker d'ingestion) : mémoire propre à ce PDF
+    monkeypatch.setattr(pdf_schedule_parser, "in_worker_process", lambda: True)
+    rss = iter([50.0, 250.0])
+    with pytest.raises(PdfTooLarge, match=r"page 1 : \+200 Mo .*worker.*PDF_MAX_RSS_MB"):
+        extract_rows_from_pdf(path, workers=1)
+
+    # une erreur d'analyse n'est pas masquée par le garde-fou
+    rss = iter([50.0, 250.0])
+    monkeypatch.setattr(pdf_schedule_parser._PageReader, "_read", lambda self, i: 1 / 0)
+    with pdf_schedule_parser._PageReader(str(path)) as reader, pytest.raises(ZeroDivisionError):
+        reader.read(0)
+
+
+def test_memory_guard_in_page_workers_stops_the_pool(tmp_path, monkeypatch):
+    from app.services import pdf_schedule_parser
+
+    path = _write_pdf(tmp_path / "p.pdf", n_rows=300)
+    monkeypatch.setenv("CSI_PDF_PAGES_PER_CHUNK", "1")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "2")
+    monkeypatch.setenv("CSI_PDF_MAX_RSS_MB", "100")
+    # chaque worker hérite du compteur : +200 Mo dès sa 1re page
+    rss = iter([50.0, 250.0])
+    monkeypatch.setattr(pdf_schedule_parser, "_rss_mb", lambda: next(rss, 250.0))
+    with pytest.raises(PdfTooLarge, match="worker"):
+        extract_rows_from_pdf(path, workers=2)
+    assert pdf_schedule_parser.get_process_budget().free == 2
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from io import BytesIO
+
+from fastapi import UploadFile
+
+from app.plannings import ingest
+from app.plannings.ingest import PLANNING_FLAGS, load_schedule, sniff_csv
+
+
+def _load(data: bytes, name: str = "planning.csv"):
+    return asyncio.run(load_schedule(UploadFile(BytesIO(data), filename=name)))
+
+
+def test_sniff_french_excel_export():
+    data = "agent_id;date;start;end;pause_min\r\nA1;01/07/2025;08:00;18:30;30,5\r\n".encode("cp1252")
+    assert sniff_csv(data) == ("utf-8", ";", ",")
+    assert sniff_csv("agent_id;nom\r\nA1;Hélène\r\n".encode("cp1252"))[0] == "cp1252"
+    assert sniff_csv(b"\xef\xbb\xbfagent_id,date\nA1,2025-07-01\n") == ("utf-8-sig", ",", ".")
+    assert sniff_csv(b"agent_id\tdate\nA1\t2025-07-01\n")[1] == "\t"
+
+
+def test_csv_loaded_with_explicit_dtypes():
+    data = (
+        "agent_id;nom;date;start;end;pause_min;is_minor\r\n"
+        "0012;Hélène;01/07/2025;08:00;18:30;30,5;vrai\r\n"
+        "0013;Zoé;02/07/2025;20:00;06:00;;false\r\n"
+    ).encode("cp1252")
+    df = _load(data)
+    assert df["agent_id"].tolist() == ["0012", "0013"]  # zéros de tête conservés
+    assert df["nom"].tolist() == ["Hélène", "Zoé"]
+    assert df["pause_min"].iloc[0] == 30.5 and df["pause_min"].isna().iloc[1]
+    assert df["is_minor"].tolist() == [True, False]
+
+
+def test_unexpected_value_keeps_text_columns_typed():
+    df = _load(b"\xef\xbb\xbfagent_id,date,start,end,pause_min\n007,2025-07-01,08:00,18:00,30 min\n")
+    assert list(df.columns) == ["agent_id", "date", "start", "end", "pause_min"]
+    assert df.loc[0, "agent_id"] == "007" and df.loc[0, "pause_min"] == "30 min"
+
+
+def test_pdf_planning_typed_with_repeated_headers_dropped(tmp_path):
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    data = [["Matricule", "Date", "Heure début", "Heure fin", "Pause (min)"]]
+    data += [[f"A{i % 3}", f"{1 + i % 28:02d}/08/2025", "21h00", "6h30", "45"] for i in range(120)]
+    table = Table(data, repeatRows=1)  # en-tête répété sur chaque page
+    table.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black)]))
+    path = tmp_path / "planning.pdf"
+    SimpleDocTemplate(str(path)).build([Paragraph("Planning août", getSampleStyleSheet()["Title"]), table])
+
+    df = _load(path.read_bytes(), "planning.pdf")
+    assert list(df.columns) == ["agent_id", "date", "start", "end", "pause_min", *PLANNING_FLAGS]
+    assert len(df) == 120 and set(df["agent_id"]) == {"A0", "A1", "A2"}
+    assert df.iloc[-1][["date", "start", "end", "pause_min"]].tolist() == ["2025-08-08", "21:00", "06:30", 45]
+    assert df["pause_min"].dtype == "int64" and not df["is_minor"].any()
+
+
+def test_parsing_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    read = ingest.read_planning_csv
+    monkeypatch.setattr(ingest, "read_planning_csv", lambda src: threads.append(threading.current_thread().name) or read(src))
+    assert len(_load(b"agent_id,date\nA1,2025-07-01\n")) == 1
+    assert threads and threads[0].startswith("csi-heavy")
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+import app.plannings.rules as rules
+
+RULES = SimpleNamespace(
+    max_daily_hours=10, max_weekly_hours=48, min_daily_rest_hours=11,
+    min_weekly_rest_hours=35, max_consecutive_days=6, min_break_after_6h_min=0.5,
+)
+
+
+def _shift(emp, name, day, start, end):
+    base = pd.Timestamp("1900-01-01")
+    d = pd.Timestamp(day)
+    s, e = pd.Timedelta(start + ":00"), pd.Timedelta(end + ":00")
+    return {
+        "employee_id": emp, "employee_name": name, "date": d, "start": base + s, "end": base + e,
+        "day": d.date(), "hours": round(((e - s) % pd.Timedelta(days=1)).total_seconds() / 3600, 2),
+    }
+
+
+def test_weekly_rest_and_consecutive_days(monkeypatch):
+    monkeypatch.setattr(rules, "SETTINGS", SimpleNamespace(RULES=RULES))
+    # E1 : 8 jours d'affilée (lun. 2025-07-07 -> lun. 14), 12 h de repos entre deux vacations
+    shifts = [_shift("E1", None if k == 0 else "Alice", f"2025-07-{7 + k:02d}", "08:00", "20:00") for k in range(8)]
+    # E2 : lun.-mar. puis ven. : repos >= 35 h la 1re semaine ; 3 jours consécutifs au plus
+    shifts += [_shift("E2", "Bob", f"2025-07-{d:02d}", "09:00", "17:00") for d in (7, 8, 11, 14, 15, 16)]
+    out = rules.analyze_schedule(pd.DataFrame(shifts))
+
+    weekly_rest = [(v["employee_id"], v["employee_name"], v["date"]) for v in out["violations"] if v["code"] == "WEEKLY_REST"]
+    assert weekly_rest == [("E1", "Alice", "S28-2025"), ("E1", "Alice", "S29-2025"), ("E2", "Bob", "S29-2025")]
+    consec = [v for v in out["violations"] if v["code"] == "CONSEC_DAYS"]
+    # la vacation sans nom compte dans la série ; le nom vient des autres lignes
+    assert [(v["employee_id"], v["employee_name"], v["details"]) for v in consec] == [("E1", "Alice", {"consecutive_days": 8})]
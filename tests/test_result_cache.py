@@ -0,0 +1,108 @@
+from app.services import schedule_checker
+from app.services.result_cache import ResultCache, cached_check
+from app.services.schedule_checker import check_schedules
+
+from test_schedule_engine import _write_planning
+
+
+def _enable(monkeypatch, tmp_path, max_bytes=10_000_000):
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CSI_SCHEDULE_CACHE_MAX_BYTES", str(max_bytes))
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "1")
+
+
+def test_result_hit_then_threshold_change_reuses_rows(tmp_path, monkeypatch):
+    _enable(monkeypatch, tmp_path)
+    p = _write_planning(tmp_path / "planning.csv", n_agents=4, n_days=60)
+    first = cached_check([p], lambda: check_schedules([p]))
+    assert first.extras["cache"] == "miss"
+
+    # copie au même contenu, autre nom : même clé
+    copy = tmp_path / "copie.csv"
+    copy.write_bytes(p.read_bytes())
+    again = cached_check([copy], lambda: check_schedules([copy]))
+    assert again.extras["cache"] == "hit"
+    assert again.violations == first.violations
+
+    # seuil modifié : nouveau résultat, vacations relues du cache sans reparser le fichier
+    monkeypatch.setenv("CSI_MAX_HOURS_PER_DAY", "8")
+    monkeypatch.setattr(schedule_checker, "_iter_file", lambda *a: (_ for _ in ()).throw(AssertionError("relu")))
+    changed = cached_check([p], lambda: check_schedules([p]))
+    assert changed.extras["cache"] == "miss"
+    assert len(changed.violations) > len(first.violations)
+    assert changed.stats == first.stats
+
+
+def test_lru_eviction_by_total_bytes(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=2500)
+    res = check_schedules([_write_planning(tmp_path / "p.csv", n_agents=2, n_days=10)])
+    size = len(res.model_dump_json())
+    for key in ("a", "b", "c", "d"):
+        cache.store_result(key, res)
+        if key == "b":
+            cache.load_result("a")  # "a" redevient le plus récent
+    assert cache.stats()["bytes"] <= 2500
+    kept = {k for k in "abcd" if cache.load_result(k) is not None}
+    assert "d" in kept and "b" not in kept
+    assert len(kept) == 2500 // size
+
+
+def test_writes_under_budget_do_not_rescan(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "cache", max_bytes=2500)
+    res = check_schedules([_write_planning(tmp_path / "p.csv", n_agents=2, n_days=10)])
+    scans = []
+    entries = ResultCache._entries
+    monkeypatch.setattr(ResultCache, "_entries", lambda self: scans.append(1) or entries(self))
+    cache.store_result("a", res)
+    cache.store_result("a", res)  # réécriture : le total ne compte pas deux fois l'entrée
+    assert len(scans) == 1  # relevé initial seulement
+    for key in "bcd":
+        cache.store_result(key, res)
+    assert len(scans) > 1 and cache.stats()["bytes"] <= 2500
+
+
+def test_parser_or_normalizer_upgrade_misses_results(tmp_path, monkeypatch):
+    from app.services import pdf_schedule_parser, result_cache
+
+    _enable(monkeypatch, tmp_path)
+    p = _write_planning(tmp_path / "planning.csv", n_agents=2, n_days=20)
+    assert cached_check([p], lambda: check_schedules([p])).extras["cache"] == "miss"
+    assert cached_check([p], lambda: check_schedules([p])).extras["cache"] == "hit"
+
+    monkeypatch.setattr(pdf_schedule_parser, "PDF_PARSER_VERSION", pdf_schedule_parser.PDF_PARSER_VERSION + 1)
+    assert cached_check([p], lambda: check_schedules([p])).extras["cache"] == "miss"
+    monkeypatch.setattr(result_cache, "NORMALIZER_VERSION", result_cache.NORMALIZER_VERSION + 1)
+    assert cached_check([p], lambda: check_schedules([p])).extras["cache"] == "miss"
+
+
+def test_result_with_file_errors_not_stored(tmp_path, monkeypatch):
+    _enable(monkeypatch, tmp_path)
+    p = _write_planning(tmp_path / "planning.csv", n_agents=2, n_days=20)
+    broken = tmp_path / "casse.xlsx"
+    broken.write_bytes(b"pas un classeur")
+    for _ in range(2):
+        res = cached_check([p, broken], lambda: check_schedules([p, broken]))
+        assert res.extras["file_errors"] and res.extras["cache"] == "miss"
+    assert any((tmp_path / "cache" / "rows").glob("*-n*.npz"))  # vacations du fichier lisible versionnées
+
+
+def test_parallel_pdf_ingestion_counts_cache_in_parent(tmp_path, monkeypatch):
+    from test_pdf_parser import _write_pdf
+
+    from app.services.result_cache import cache_stats
+
+    _enable(monkeypatch, tmp_path)
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "2")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "2")
+    paths = [_write_pdf(tmp_path / "a.pdf"), _write_pdf(tmp_path / "b.pdf", n_rows=90)]
+
+    def pdf_counts():
+        lvl = cache_stats()["levels"]["pdf"]
+        return lvl["hits"], lvl["misses"], lvl["entries"]
+
+    hits, misses, _ = pdf_counts()
+    first = check_schedules(paths)
+    assert pdf_counts() == (hits, misses + 2, 2)  # lectures en worker, cache tenu par le parent
+    again = check_schedules(paths)
+    assert pdf_counts() == (hits + 2, misses + 2, 2)
+    assert again.model_dump(exclude={"extras"}) == first.model_dump(exclude={"extras"})  # pas de durées de lecture sur un succès du cache
@@ -0,0 +1,202 @@
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import get_settings
+from app.services import schedule_checker
+from app.services.schedule_checker import _iter_ingested, _parse_file, check_schedules
+from app.services.schedule_engine import Sweep, clock_band, compile_plan, group_sum, table_from_bounds
+from app.services.shift_table import ShiftTable
+
+
+def _write_planning(path, n_agents=12, n_days=120, seed=7):
+    rnd = random.Random(seed)
+    lines = ["agent_id,date,start_time,end_time,break_minutes"]
+    d0 = date(2024, 12, 20)
+    for a in range(n_agents):
+        for k in range(n_days):
+            if rnd.random() < 0.25:
+                continue
+            d = d0 + timedelta(days=k)
+            sh = rnd.choice([6, 7, 8, 14, 19, 21, 22])
+            dur = rnd.choice([7, 8, 10, 11, 12])
+            eh = (sh + dur) % 24
+            lines.append(f"A{a},{d.strftime('%d/%m/%Y')},{sh:02d}:00,{eh:02d}h30,{rnd.choice([0, 20, 45])}")
+            if rnd.random() < 0.1:
+                lines.append(f"A{a},{d.isoformat()},{(sh + 1) % 24:02d}:00,{(sh + 3) % 24:02d}:00,0")
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+def test_numpy_engine_matches_legacy(tmp_path):
+    p = _write_planning(tmp_path / "planning.csv")
+    legacy = check_schedules([p], engine="legacy")
+    fast = check_schedules([p], engine="numpy")
+    assert legacy.violations
+    assert fast.model_dump() == legacy.model_dump()
+
+
+def test_rest_is_measured_across_days(tmp_path):
+    p = tmp_path / "p.csv"
+    p.write_text(
+        "agent_id,date,start_time,end_time,break_minutes\n"
+        "T1,2025-07-01,08:00,18:00,0\n"
+        "T1,2025-07-02,08:00,18:00,0\n"
+        "T1,2025-07-02,22:00,23:00,0\n",
+        encoding="utf-8",
+    )
+    for engine in ("legacy", "numpy"):
+        res = check_schedules([p], engine=engine)
+        rests = [v for v in res.violations if v.type == "DAILY_REST"]
+        assert [v.date for v in rests] == ["2025-07-02"]
+
+
+def test_avg_12w_counts_empty_calendar_weeks(tmp_path):
+    # 12 semaines à 46 h réparties sur 13 semaines calendaires (une semaine vide)
+    lines = ["agent_id,date,start_time,end_time,break_minutes"]
+    monday = date(2025, 1, 6)
+    for wk in range(13):
+        if wk == 6:
+            continue
+        for k in range(5):
+            d = monday + timedelta(weeks=wk, days=k)
+            lines.append(f"T1,{d.isoformat()},08:00,17:12,0")
+    p = tmp_path / "p.csv"
+    p.write_text("\n".join(lines), encoding="utf-8")
+    for engine in ("legacy", "numpy"):
+        res = check_schedules([p], engine=engine)
+        assert not [v for v in res.violations if v.type == "AVG_12W"]
+
+    # sans la semaine vide : 13 semaines à 46 h -> 2 fenêtres en dépassement
+    lines.extend(f"T1,{(monday + timedelta(weeks=6, days=k)).isoformat()},08:00,17:12,0" for k in range(5))
+    p.write_text("\n".join(lines), encoding="utf-8")
+    for engine in ("legacy", "numpy"):
+        res = check_schedules([p], engine=engine)
+        weeks = [v.week for v in res.violations if v.type == "AVG_12W"]
+        assert weeks == ["2025-W02→2025-W13", "2025-W03→2025-W14"]
+
+
+def test_spilled_sort_gives_same_result(tmp_path, monkeypatch):
+    p = _write_planning(tmp_path / "planning.csv", n_agents=5, n_days=60)
+    expected = check_schedules([p], engine="numpy").model_dump()
+    monkeypatch.setenv("CSI_SCHEDULE_SORT_SPILL_ROWS", "37")
+    for engine in ("legacy", "numpy"):
+        assert check_schedules([p], engine=engine).model_dump() == expected
+
+    # moteur numpy au-delà du seuil : paquets d'agents entiers, jamais toute la table
+    sizes = []
+    evaluate = schedule_checker.evaluate_numpy
+    monkeypatch.setattr(schedule_checker, "evaluate_numpy", lambda t, S: sizes.append(len(t)) or evaluate(t, S))
+    check_schedules([p], engine="numpy")
+    per_agent = max(r["days_worked"] for r in expected["stats"]) * 2  # <= 2 vacations par jour
+    assert len(sizes) > 1 and max(sizes) < 37 + per_agent
+
+
+def _parse_or_hang(path, pdf_cache=False):
+    if "lent" in path:
+        time.sleep(60)
+    return _parse_file(path, pdf_cache)
+
+
+def test_file_timeout_counts_from_submission_and_stops_worker(tmp_path, monkeypatch):
+    paths = [_write_planning(tmp_path / name, n_agents=3, n_days=20) for name in ("lent.csv", "a.csv", "b.csv")]
+    monkeypatch.setattr(schedule_checker, "_parse_file", _parse_or_hang)
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "2")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "2")
+    monkeypatch.setenv("CSI_SCHEDULE_FILE_TIMEOUT_S", "1")
+    t0 = time.perf_counter()
+    res = check_schedules(paths)
+    assert time.perf_counter() - t0 < 10  # worker bloqué arrêté, pas attendu
+    assert res.extras["file_errors"] == [{"file": "lent.csv", "error": "Délai dépassé (1 s)"}]
+    assert res.model_dump()["stats"] == check_schedules(paths[1:]).model_dump()["stats"]
+
+
+def _parse_slowly(path, pdf_cache=False):
+    time.sleep(1)
+    return _parse_file(path, pdf_cache)
+
+
+def test_queued_files_do_not_time_out_while_waiting(tmp_path, monkeypatch):
+    # 4 fichiers de 1 s pour 2 workers : les 2 derniers attendent 1 s avant d'être lus
+    paths = [_write_planning(tmp_path / f"f{k}.csv", n_agents=2, n_days=10, seed=k) for k in range(4)]
+    monkeypatch.setattr(schedule_checker, "_parse_file", _parse_slowly)
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "2")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "2")
+    monkeypatch.setenv("CSI_SCHEDULE_FILE_TIMEOUT_S", "1.8")
+    res = check_schedules(paths)
+    assert "file_errors" not in res.extras
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "1")
+    assert res.model_dump() == check_schedules(paths).model_dump()
+
+
+def test_parallel_ingestion_reports_corrupt_files(tmp_path, monkeypatch):
+    paths = [
+        _write_planning(tmp_path / f"planning_{m}.csv", n_agents=3, n_days=40, seed=m)
+        for m in range(3)
+    ]
+    (tmp_path / "casse.xlsx").write_bytes(b"pas un classeur")
+    (tmp_path / "scan.pdf").write_bytes(b"%PDF-1.4 tronque")
+    paths += [tmp_path / "casse.xlsx", tmp_path / "scan.pdf"]
+
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "1")
+    sequential = check_schedules(paths)
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "3")
+    monkeypatch.setenv("CSI_WORK_PROCESSES", "3")
+    parallel = check_schedules(paths)
+
+    assert parallel.model_dump() == sequential.model_dump()
+    assert [e["file"] for e in parallel.extras["file_errors"]] == ["casse.xlsx", "scan.pdf"]
+    assert parallel.stats
+
+
+def test_compiled_plan_runs_only_enabled_rules(tmp_path, monkeypatch):
+    S = get_settings()
+    table = ShiftTable.from_shifts(_iter_ingested([_write_planning(tmp_path / "p.csv")], S, [], {}))
+    _, stats, everything = compile_plan(S).run(table)
+
+    plan = compile_plan(S, enabled=["DAILY_MAX", "DAILY_REST"])
+    assert [r.type for r in plan.rules] == ["DAILY_REST", "DAILY_MAX"]
+    assert "rolling12" not in plan.needs and "streak" not in plan.needs
+
+    computed = []
+    for name in ("rolling12", "streak"):
+        original = getattr(Sweep, name)
+        monkeypatch.setattr(Sweep, name, property(lambda sw, f=original.func, n=name: computed.append(n) or f(sw)))
+    _, subset_stats, subset = plan.run(table)
+    assert not computed  # accumulateurs des règles inactives jamais calculés
+    assert subset_stats == stats
+    assert subset == [v for v in everything if v.type in ("DAILY_MAX", "DAILY_REST")]
+
+    with pytest.raises(ValueError):
+        compile_plan(S, enabled=["NIGHT_MAX"])
+
+
+def test_shared_kernel_on_caller_columns():
+    day = 20_000 * 1440.0
+    # lignes dans le désordre ; B : 22h -> 6h le lendemain
+    sw = Sweep(table_from_bounds(
+        ["B", "A", "A", "B"],
+        [day + 1320, day + 1440 + 480, day + 480, day + 1440 + 1320],
+        [day + 1800, day + 1440 + 1080, day + 1020, day + 1440 + 1800],
+        minutes=np.array([480.0, 600.0, 540.0, 480.0]),
+        hours=np.array([8.0, 10.0, 9.0, 8.0]),
+    ))
+    assert sw.names == ["A", "B"] and sw.t["row"].tolist() == [2, 1, 0, 3]
+    assert sw.per_day("hours").tolist() == [9.0, 10.0, 8.0, 8.0]
+    assert sw.rest_hours[[1, 3]].tolist() == [15.0, 16.0]
+    assert sw.runs["length"].tolist() == [2, 2]
+    night = sw.band_minutes({"night": clock_band(21 * 60, 6 * 60)})["night"]
+    assert sw.in_row_order(night).tolist() == [480.0, 0.0, 0.0, 480.0]
+
+
+def test_group_sum_matches_pandas_bit_for_bit():
+    rng = np.random.default_rng(3)
+    groups = np.sort(rng.integers(0, 3000, 20_000))
+    values = np.round(rng.uniform(0, 12, 20_000), 2)
+    values[rng.random(20_000) < 0.01] = np.nan
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    np.testing.assert_array_equal(group_sum(values, starts), pd.Series(values).groupby(groups).sum().to_numpy())
@@ -0,0 +1,130 @@
+import random
+from datetime import date, timedelta
+
+from app.services.schedule_checker import check_schedules
+from app.services.schedule_state import check_schedules_incremental
+
+
+def _write_months(folder, n_agents=6, seed=11):
+    """Un fichier par mois (juillet -> décembre), vacations de nuit incluses."""
+    rnd = random.Random(seed)
+    by_month = {}
+    d = date(2025, 7, 1)
+    while d < date(2026, 1, 1):
+        for a in range(n_agents):
+            if rnd.random() < 0.2:
+                continue
+            sh = rnd.choice([6, 8, 14, 20, 22])
+            eh = (sh + rnd.choice([8, 10, 12])) % 24
+            by_month.setdefault(d.month, []).append(f"A{a},{d.isoformat()},{sh:02d}:00,{eh:02d}:00,{rnd.choice([0, 30])}")
+        d += timedelta(days=1)
+    paths = []
+    for m, lines in sorted(by_month.items()):
+        p = folder / f"planning_{m:02d}.csv"
+        p.write_text("agent_id,date,start_time,end_time,break_minutes\n" + "\n".join(lines), encoding="utf-8")
+        paths.append(p)
+    return paths
+
+
+def _core(res):
+    d = res.model_dump()
+    d["extras"].pop("incremental", None)
+    return d
+
+
+def test_incremental_matches_full_recompute(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSI_SCHEDULE_STATE_DIR", str(tmp_path / "state"))
+    paths = _write_months(tmp_path)
+
+    first = check_schedules_incremental("societe", paths[:4])
+    assert first.extras["incremental"] == {"mode": "full", "new_files": 4}
+    assert _core(first) == check_schedules(paths[:4]).model_dump()
+
+    for k in (5, 6):
+        res = check_schedules_incremental("societe", paths[:k])
+        assert res.extras["incremental"] == {"mode": "incremental", "new_files": 1}
+        assert _core(res) == check_schedules(paths[:k]).model_dump()
+
+    cached = check_schedules_incremental("societe", paths)
+    assert cached.extras["incremental"]["mode"] == "cached"
+    assert _core(cached) == check_schedules(paths).model_dump()
+
+
+def test_full_recompute_when_forced_or_history_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSI_SCHEDULE_STATE_DIR", str(tmp_path / "state"))
+    paths = _write_months(tmp_path)
+    check_schedules_incremental("societe", paths[1:])
+
+    # mois antérieur ajouté après coup : l'état ne suffit plus
+    res = check_schedules_incremental("societe", paths)
+    assert res.extras["incremental"]["mode"] == "full"
+    assert _core(res) == check_schedules(paths).model_dump()
+
+    assert check_schedules_incremental("societe", paths, full=True).extras["incremental"]["mode"] == "full"
+
+    monkeypatch.setenv("CSI_MAX_HOURS_PER_WEEK", "40")
+    res = check_schedules_incremental("societe", paths)
+    assert res.extras["incremental"]["mode"] == "full"
+    assert _core(res) == check_schedules(paths).model_dump()
+
+
+def test_incremental_after_gap_month(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSI_SCHEDULE_STATE_DIR", str(tmp_path / "state"))
+    paths = _write_months(tmp_path)
+    del paths[3]  # pas de fichier d'octobre : les fenêtres 12 sem. finissant en octobre n'ont pas de vacation
+
+    check_schedules_incremental("societe", paths[:3])
+    res = check_schedules_incremental("societe", paths[:4])
+    assert res.extras["incremental"] == {"mode": "incremental", "new_files": 1}
+    assert _core(res) == check_schedules(paths[:4]).model_dump()
+
+
+def test_failed_file_is_retried_on_next_check(tmp_path, monkeypatch):
+    from app.services import schedule_checker
+
+    monkeypatch.setenv("CSI_SCHEDULE_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("CSI_SCHEDULE_INGEST_WORKERS", "1")
+    paths = _write_months(tmp_path)
+    check_schedules_incremental("societe", paths[:3])
+
+    read = schedule_checker._iter_file
+    def failing(p, *args, **kwargs):
+        if p.name == paths[3].name:
+            raise OSError("partage réseau indisponible")
+        return read(p, *args, **kwargs)
+    monkeypatch.setattr(schedule_checker, "_iter_file", failing)
+    res = check_schedules_incremental("societe", paths[:4])
+    assert res.extras["file_errors"] == [{"file": paths[3].name, "error": "OSError: partage réseau indisponible"}]
+
+    # erreur passagère : le fichier n'est pas tenu pour lu, il est relu au contrôle suivant
+    monkeypatch.setattr(schedule_checker, "_iter_file", read)
+    res = check_schedules_incremental("societe", paths[:4])
+    assert res.extras["incremental"] == {"mode": "incremental", "new_files": 1}
+    assert _core(res) == check_schedules(paths[:4]).model_dump()
+
+
+def test_incremental_matches_full_recompute_at_any_split(tmp_path, monkeypatch):
+    """Découpes quelconques (fichier suivant commençant le même jour), longue série et trou de 10 semaines."""
+    monkeypatch.setenv("CSI_SCHEDULE_STATE_DIR", str(tmp_path / "state"))
+    rnd = random.Random(5)
+    rows = []
+    for i in range(240):
+        d = date(2025, 1, 1) + timedelta(days=i)
+        for a in range(4):
+            if (a == 1 and 40 < i < 110) or rnd.random() < (0.02 if a == 0 else 0.25):
+                continue
+            for sh in rnd.sample([0, 6, 14, 20], rnd.choice([1, 1, 2])):
+                eh = (sh + rnd.choice([8, 10, 13])) % 24
+                rows.append((d, sh, f"A{a},{d.isoformat()},{sh:02d}:00,{eh:02d}:00,{rnd.choice([0, 30])}"))
+    rows.sort()
+    cuts = [0, *sorted(rnd.sample(range(1, len(rows)), 5)), len(rows)]
+    paths = []
+    for k, (lo, hi) in enumerate(zip(cuts, cuts[1:])):
+        p = tmp_path / f"part_{k:02d}.csv"
+        p.write_text("agent_id,date,start_time,end_time,break_minutes\n" + "\n".join(r[2] for r in rows[lo:hi]), encoding="utf-8")
+        paths.append(p)
+
+    for k in range(1, len(paths) + 1):
+        res = check_schedules_incremental("societe", paths[:k])
+        assert res.extras["incremental"]["mode"] == ("full" if k == 1 else "incremental")
+        assert _core(res) == check_schedules(paths[:k]).model_dump()
@@ -0,0 +1,26 @@
+from app.services.shift_table import Shift, ShiftTable
+
+
+def test_shift_table_sorts_and_slices_by_agent():
+    t = ShiftTable()
+    t.append("B", 20001, 480, 1080, 30)
+    t.extend([Shift("A", 20002, 1320, 360, 0), Shift("B", 20000, 600, 720, 0), Shift("A", 20001, 480, 600, 0)])
+    assert len(t) == 4
+    assert t.nbytes == 4 * 14
+
+    t.sort()
+    assert t.agents == ["A", "B"]
+    assert [(s.agent_id, s.day, s.start) for s in t] == [
+        ("A", 20001, 480), ("A", 20002, 1320), ("B", 20000, 600), ("B", 20001, 480),
+    ]
+    sl = t.agent_slice("B")
+    assert t.day[sl].tolist() == [20000, 20001]
+    assert [a for a, _ in t.iter_agents()] == ["A", "B"]
+
+
+def test_shift_table_to_frame():
+    t = ShiftTable.from_shifts([Shift("X", 0, 1320, 360, 15)])
+    f = t.to_frame()
+    assert list(f.columns) == ["agent_id", "day", "start_min", "end_min", "break_min"]
+    assert str(f["day"].iloc[0].date()) == "1970-01-01"
+    assert int(f["break_min"].iloc[0]) == 15
@@ -0,0 +1,32 @@
+import asyncio
+from tempfile import SpooledTemporaryFile
+
+from fastapi import UploadFile
+
+from app.core.uploads import save_upload
+from app.plannings.ingest import load_schedule
+
+
+def _upload(data: bytes, max_size: int, name: str = "planning.csv") -> UploadFile:
+    spool = SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    return UploadFile(spool, filename=name)
+
+
+def test_save_upload_from_memory_and_from_disk(tmp_path):
+    data = b"agent_id;date\n" + b"A1;2025-07-01\n" * 10_000
+    small = _upload(data, max_size=len(data) + 1)
+    spooled = _upload(data, max_size=1024)
+    assert not small.file._rolled and spooled.file._rolled
+
+    assert save_upload(small, tmp_path / "a.csv").read_bytes() == data
+    assert save_upload(spooled, tmp_path / "b.csv").read_bytes() == data
+    assert save_upload(spooled, tmp_path / "b.csv").read_bytes() == data  # relecture : rembobiné
+
+
+def test_load_schedule_reads_spooled_file_in_place():
+    rows = "".join(f"A{i % 7};2025-07-01;08:00;17:00;30\n" for i in range(5_000))
+    upload = _upload(("agent_id;date;start;end;pause_min\n" + rows).encode(), max_size=1024)
+    df = asyncio.run(load_schedule(upload))
+    assert len(df) == 5_000 and df["pause_min"].sum() == 150_000
+    assert not upload.file.closed
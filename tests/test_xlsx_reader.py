@@ -0,0 +1,34 @@
+from datetime import datetime, time
+
+import openpyxl
+
+from app.services.schedule_checker import _iter_xlsx, check_schedules
+
+
+def test_reads_every_sheet_past_title_rows(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Juillet"
+    ws.append(["Société X — planning de juillet"])
+    ws.append([])
+    ws.append(["Matricule", "Date", "Début", "Fin", "Pause (min)", "Site"])
+    ws.append(["T1", datetime(2025, 7, 1), time(8, 0), time(18, 0), 30, "Gare"])
+    ws.append([None, None, None, None, None, None])
+    ws.append(["T2", "02/07/2025", "22h00", "06h00", None, "Port"])
+    aout = wb.create_sheet("Août")
+    aout.append(["agent", "jour", "debut", "fin", "pause"])
+    aout.append(["T1", "2025-08-01", "08:00", "12:00", 0])
+    wb.create_sheet("Légende").append(["Codes absences"])
+    p = tmp_path / "planning.xlsx"
+    wb.save(p)
+
+    rows = list(_iter_xlsx(p))
+    assert [r["agent_id"] for r in rows] == ["T1", "T2", "T1"]
+    assert rows[0] == {
+        "agent_id": "T1", "date": "2025-07-01", "start_time": "08:00",
+        "end_time": "18:00", "break_minutes": "30",
+    }
+    assert rows[1]["break_minutes"] == ""
+
+    res = check_schedules([p])
+    assert {s.agent_id: s.days_worked for s in res.stats} == {"T1": 2, "T2": 1}